@@ -0,0 +1,231 @@
+"""
+Admin API
+=========
+Authenticated create, update and delete of portfolio content under
+``/api/admin``. Requests carry ``Authorization: Bearer <token>``, and a
+token only opens the admin API of its own tenant: the tenant whose
+``admin_token_hash`` it matches (``seed.py --admin-token``), or the default
+tenant for ``ADMIN_TOKEN``. A tenant without a token gets 404.
+
+Rows are returned with their ``row_version``. Updates and deletes name the
+``row_version`` they were based on, and fail with 409 and the current row
+if it has changed since (another edit, or ``seed.py``) instead of
+overwriting that change. The check is repeated by the UPDATE or DELETE
+statement itself, so concurrent edits cannot slip between check and write.
+
+Writes go through the ORM like any other session: the commit bumps the
+versions of the resources it touched only, the snapshots built from them
+are rebuilt (composite views reuse their unchanged parts) and the derived
+indexes refresh the written rows only.
+"""
+
+import hashlib
+import hmac
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from database import DEFAULT_TENANT_ID, SessionLocal, get_db, run_db
+from models import (
+    Certification, Education, Experience, Project, Responsibility, Skill, SkillCategory, Tenant,
+)
+from schemas import (
+    CertificationBase, CertificationUpdate, EducationBase, EducationUpdate,
+    ExperienceBase, ExperienceUpdate, ProjectBase, ProjectUpdate,
+    ResponsibilityCreate, ResponsibilityUpdate, SkillCategoryBase, SkillCategoryUpdate,
+    SkillCreate, SkillUpdate,
+)
+from settings import get_settings
+from tenancy import get_tenant_id
+
+
+def hash_admin_token(token: str) -> str:
+    """What is stored of a tenant's admin token"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def admin_token_hashes(tenant_id: int) -> List[str]:
+    """Hashes of the tokens accepted for ``tenant_id``'s admin API"""
+    db = SessionLocal()
+    try:
+        stored = db.scalar(select(Tenant.admin_token_hash).where(Tenant.id == tenant_id))
+    finally:
+        db.close()
+    hashes = [stored] if stored else []
+    token = get_settings().admin_token
+    if token and tenant_id == DEFAULT_TENANT_ID:
+        hashes.append(hash_admin_token(token))
+    return hashes
+
+
+def require_admin(authorization: Optional[str] = Header(None), tenant_id: int = Depends(get_tenant_id)):
+    hashes = admin_token_hashes(tenant_id)
+    if not hashes:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, credentials = (authorization or "").partition(" ")
+    presented = hash_admin_token(credentials)
+    # Every hash is compared, so the time taken does not tell which one matched
+    matches = [hmac.compare_digest(presented, expected) for expected in hashes]
+    if scheme.lower() != "bearer" or not any(matches):
+        raise HTTPException(
+            status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+class AdminCollection:
+    """A content table exposed by the admin API"""
+    
+    def __init__(self, path: str, model, create, update,
+                 parents: Optional[Dict[str, type]] = None, children: Tuple[str, ...] = ()):
+        """
+        Args:
+            path: URL segment under ``/api/admin``
+            create: Request schema of a new row
+            update: Request schema of a change, with ``row_version``
+            parents: Foreign key columns and the models they must point to
+            children: Relationships whose rows are deleted with the row
+        """
+        self.path = path
+        self.model = model
+        self.create = create
+        self.update = update
+        self.parents = parents or {}
+        self.children = children
+    
+    @property
+    def name(self) -> str:
+        return self.model.__name__.lower()
+
+
+COLLECTIONS = [
+    AdminCollection("education", Education, EducationBase, EducationUpdate),
+    AdminCollection("experience", Experience, ExperienceBase, ExperienceUpdate,
+                    children=("responsibilities",)),
+    AdminCollection("responsibilities", Responsibility, ResponsibilityCreate, ResponsibilityUpdate,
+                    parents={"experience_id": Experience}),
+    AdminCollection("projects", Project, ProjectBase, ProjectUpdate),
+    AdminCollection("skill-categories", SkillCategory, SkillCategoryBase, SkillCategoryUpdate,
+                    children=("skills",)),
+    AdminCollection("skills", Skill, SkillCreate, SkillUpdate,
+                    parents={"category_id": SkillCategory}),
+    AdminCollection("certifications", Certification, CertificationBase, CertificationUpdate),
+]
+
+
+def row_dict(obj) -> dict:
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def _get(db: Session, collection: AdminCollection, row_id: int):
+    obj = db.get(collection.model, row_id)
+    if obj is None:
+        raise HTTPException(status_code=404, detail=f"No {collection.name} {row_id}")
+    return obj
+
+
+def _conflict(db: Session, collection: AdminCollection, row_id: int):
+    db.rollback()
+    current = db.get(collection.model, row_id)
+    raise HTTPException(status_code=409, detail={
+        "message": f"{collection.name} {row_id} was changed or deleted by another request",
+        "current": row_dict(current) if current is not None else None,
+    })
+
+
+def _check_values(db: Session, collection: AdminCollection, values: dict):
+    columns = collection.model.__table__.c
+    for name, value in values.items():
+        if value is None and not columns[name].nullable:
+            raise HTTPException(status_code=422, detail=f"{name} cannot be null")
+        parent = collection.parents.get(name)
+        if parent is not None and db.get(parent, value) is None:
+            raise HTTPException(status_code=422, detail=f"No {parent.__name__.lower()} {value}")
+
+
+def list_rows(db: Session, collection: AdminCollection) -> List[dict]:
+    model = collection.model
+    return [row_dict(obj) for obj in db.query(model).order_by(model.id)]
+
+
+def get_row(db: Session, collection: AdminCollection, row_id: int) -> dict:
+    return row_dict(_get(db, collection, row_id))
+
+
+def create_row(db: Session, collection: AdminCollection, payload: BaseModel) -> dict:
+    values = payload.model_dump()
+    _check_values(db, collection, values)
+    obj = collection.model(**values)
+    db.add(obj)
+    db.commit()
+    return row_dict(obj)
+
+
+def update_row(db: Session, collection: AdminCollection, row_id: int, payload: BaseModel) -> dict:
+    values = payload.model_dump(exclude_unset=True)
+    row_version = values.pop("row_version")
+    obj = _get(db, collection, row_id)
+    if obj.row_version != row_version:
+        _conflict(db, collection, row_id)
+    _check_values(db, collection, values)
+    for name, value in values.items():
+        setattr(obj, name, value)
+    try:
+        db.commit()
+    except StaleDataError:
+        _conflict(db, collection, row_id)
+    return row_dict(obj)
+
+
+def delete_row(db: Session, collection: AdminCollection, row_id: int, row_version: int):
+    obj = _get(db, collection, row_id)
+    if obj.row_version != row_version:
+        _conflict(db, collection, row_id)
+    for relationship in collection.children:
+        for child in getattr(obj, relationship):
+            db.delete(child)
+    db.delete(obj)
+    try:
+        db.commit()
+    except StaleDataError:
+        _conflict(db, collection, row_id)
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def add_routes(collection: AdminCollection):
+    """List, read, create, update and delete routes of ``collection``"""
+    path = f"/{collection.path}"
+    
+    @router.get(path, name=f"list_{collection.name}")
+    async def list_collection(db: Session = Depends(get_db)):
+        return await run_db(db, list_rows, collection)
+    
+    @router.get(path + "/{row_id}", name=f"get_{collection.name}")
+    async def get_item(row_id: int, db: Session = Depends(get_db)):
+        return await run_db(db, get_row, collection, row_id)
+    
+    @router.post(path, status_code=201, name=f"create_{collection.name}")
+    async def create_item(payload: collection.create, db: Session = Depends(get_db)):
+        return await run_db(db, create_row, collection, payload)
+    
+    @router.patch(path + "/{row_id}", name=f"update_{collection.name}")
+    async def update_item(row_id: int, payload: collection.update, db: Session = Depends(get_db)):
+        return await run_db(db, update_row, collection, row_id, payload)
+    
+    @router.delete(path + "/{row_id}", status_code=204, name=f"delete_{collection.name}")
+    async def delete_item(
+        row_id: int,
+        row_version: int = Query(..., description="Version of the row being deleted"),
+        db: Session = Depends(get_db)
+    ):
+        await run_db(db, delete_row, collection, row_id, row_version)
+        return Response(status_code=204)
+
+
+for _collection in COLLECTIONS:
+    add_routes(_collection)
@@ -0,0 +1,81 @@
+"""
+In-process ASGI client for benchmarks
+=====================================
+Drives an ASGI app directly, without sockets or an HTTP client library, so
+the numbers measure the application rather than the network stack.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+
+class ASGIClient:
+    def __init__(self, app):
+        self.app = app
+    
+    @asynccontextmanager
+    async def lifespan(self):
+        """Run the app's startup before the block and its shutdown after it"""
+        receive_queue = asyncio.Queue()
+        send_queue = asyncio.Queue()
+        task = asyncio.create_task(self.app(
+            {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}},
+            receive_queue.get, send_queue.put,
+        ))
+        await receive_queue.put({"type": "lifespan.startup"})
+        message = await send_queue.get()
+        if message["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"Startup failed: {message}")
+        try:
+            yield self
+        finally:
+            await receive_queue.put({"type": "lifespan.shutdown"})
+            await send_queue.get()
+            await task
+    
+    async def request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None,
+                      body: bytes = b"") -> Tuple[int, Dict[str, str], bytes]:
+        """Send one request, returning ``(status, headers, body)``"""
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"benchmark")] + [
+                (k.lower().encode(), v.encode()) for k, v in (headers or {}).items()
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+        }
+        request_sent = False
+        
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()  # no disconnect until the response is done
+        
+        status = 0
+        response_headers = {}
+        chunks = []
+        
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.update(
+                    (k.decode().lower(), v.decode()) for k, v in message.get("headers", [])
+                )
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+        
+        await self.app(scope, receive, send)
+        return status, response_headers, b"".join(chunks)
@@ -0,0 +1,216 @@
+"""
+Load Benchmark
+==============
+Drives the FastAPI app in process, through ``benchmarks.asgi``, against a
+scratch database seeded by ``seed.py`` at several content scales. Each scale
+runs in its own process so it gets a fresh engine, database and caches.
+
+For every endpoint it reports throughput and p50/p95/p99 latency, including
+concurrent POST /api/contact with email delivery stubbed out by the
+in-memory transport. Results are written as JSON. ``--save-baseline``
+stores them as the baseline and ``--compare`` exits with status 1 when p95
+latency or throughput is worse than the baseline by more than
+``--tolerance``.
+
+Usage (from backend/):
+    python -m benchmarks.load [--scales 1 10 100 1000] [--requests 500] [--concurrency 20]
+    python -m benchmarks.load --save-baseline
+    python -m benchmarks.load --compare
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).parent
+BASELINE_FILE = BENCHMARK_DIR / "baseline.json"
+RESULTS_FILE = BENCHMARK_DIR / "results.json"
+
+CONTACT_BODY = json.dumps({
+    "name": "Load Test",
+    "email": "load@example.com",
+    "message": "Benchmark contact submission",
+}).encode()
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+async def measure(client, method: str, path: str, requests: int, concurrency: int,
+                  headers=None, body: bytes = b"", expect: int = 200) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            status, _, _ = await client.request(method, path, headers, body)
+            latencies.append(time.perf_counter() - start)
+            if status != expect:
+                raise RuntimeError(f"{method} {path} returned {status}, expected {expect}")
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "throughput_rps": round(requests / wall, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_scale(scale: int, requests: int, concurrency: int) -> dict:
+    """Seed the scratch database at ``scale`` and benchmark every endpoint"""
+    from benchmarks.asgi import ASGIClient
+    from migrations import migrate
+    from seed import seed_database
+    import main
+    
+    migrate()
+    seed_database(scale=scale)
+    client = ASGIClient(main.app)
+    compressed = {"Accept-Encoding": "br, gzip"}
+    
+    results = {}
+    async with client.lifespan():
+        _, headers, body = await client.request("GET", "/api/portfolio", compressed)
+        results["_portfolio_bytes"] = len(body)
+        etag = {"If-None-Match": headers["etag"]}
+        
+        scenarios = [
+            ("GET /api/portfolio", "GET", "/api/portfolio", compressed, b"", 200),
+            ("GET /api/portfolio (304)", "GET", "/api/portfolio", etag, b"", 304),
+            ("GET /api/profile", "GET", "/api/profile", compressed, b"", 200),
+            ("GET /api/experience", "GET", "/api/experience", compressed, b"", 200),
+            ("GET /api/projects", "GET", "/api/projects", compressed, b"", 200),
+            ("GET /api/projects?tech=", "GET", "/api/projects?tech=Python&tech=FastAPI&match=any",
+             compressed, b"", 200),
+            ("GET /api/technologies", "GET", "/api/technologies", compressed, b"", 200),
+            ("GET /api/skills", "GET", "/api/skills", compressed, b"", 200),
+            ("GET /api/certifications", "GET", "/api/certifications", compressed, b"", 200),
+            ("POST /api/contact", "POST", "/api/contact",
+             {"Content-Type": "application/json"}, CONTACT_BODY, 200),
+        ]
+        for name, method, path, headers, body, expect in scenarios:
+            # Warm-up so that one-off snapshot builds are not in the numbers
+            await measure(client, method, path, min(20, requests), concurrency, headers, body, expect)
+            results[name] = await measure(
+                client, method, path, requests, concurrency, headers, body, expect
+            )
+    return results
+
+
+def run_scale_in_subprocess(scale: int, requests: int, concurrency: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="portfolio-load-") as scratch:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{scratch}/load.db",
+            MAIL_TRANSPORT="memory",
+        )
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.load", "--worker",
+             "--scales", str(scale), "--requests", str(requests),
+             "--concurrency", str(concurrency)],
+            cwd=BENCHMARK_DIR.parent, env=env, check=True,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        ).stdout
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions of ``results`` against ``baseline`` beyond ``tolerance`` (fraction)"""
+    regressions = []
+    for scale, endpoints in results["results"].items():
+        for name, current in endpoints.items():
+            base = baseline.get("results", {}).get(scale, {}).get(name)
+            if not isinstance(current, dict) or not base:
+                continue
+            if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"scale {scale} {name}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms"
+                )
+            if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"scale {scale} {name}: {current['throughput_rps']} req/s "
+                    f"vs baseline {base['throughput_rps']} req/s"
+                )
+    return regressions
+
+
+def print_report(results: dict):
+    for scale, endpoints in results["results"].items():
+        print(f"\nScale {scale}x (portfolio {endpoints['_portfolio_bytes']:,} bytes compressed)")
+        print(f"  {'endpoint':<28} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name, r in endpoints.items():
+            if isinstance(r, dict):
+                print(f"  {name:<28} {r['throughput_rps']:>10,.1f} {r['p50_ms']:>9.3f} "
+                      f"{r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write {BASELINE_FILE.name}")
+    parser.add_argument("--compare", action="store_true", help=f"Fail on regressions against {BASELINE_FILE.name}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression (fraction)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        results = asyncio.run(run_scale(args.scales[0], args.requests, args.concurrency))
+        print(json.dumps(results))
+        return
+    
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "db_async": os.getenv("DB_ASYNC", "0") == "1",
+        },
+        "results": {},
+    }
+    for scale in args.scales:
+        print(f"Running scale {scale}x...", file=sys.stderr)
+        results["results"][str(scale)] = run_scale_in_subprocess(scale, args.requests, args.concurrency)
+    
+    print_report(results)
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"\nResults written to {args.output}")
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {BASELINE_FILE}")
+    
+    if args.compare:
+        if not BASELINE_FILE.exists():
+            sys.exit(f"No baseline at {BASELINE_FILE}; run with --save-baseline first")
+        regressions = compare(results, json.loads(BASELINE_FILE.read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
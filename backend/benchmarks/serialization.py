@@ -0,0 +1,81 @@
+"""
+Serialization Benchmark
+=======================
+Compares the Pydantic and fast serialization paths for GET /api/portfolio,
+at the seeded content size and with content scaled 100x by ``seed.py``.
+
+Each path is timed twice: serialization alone (rows already loaded) and the
+full snapshot build including the queries.
+
+Usage (from backend/):
+    python -m benchmarks.serialization [--repeat 50]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+# Use a scratch database; must be set before the app modules are imported
+_scratch_dir = tempfile.mkdtemp(prefix="portfolio-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch_dir}/bench.db"
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from database import SessionLocal  # noqa: E402
+from migrations import migrate  # noqa: E402
+from portfolio import load_portfolio  # noqa: E402
+from schemas import PortfolioResponse  # noqa: E402
+from seed import seed_database  # noqa: E402
+from serializers import dumps, fast_builder, field_encoder, pydantic_builder  # noqa: E402
+
+
+def median_us(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def run(label: str, repeat: int):
+    db = SessionLocal()
+    data = load_portfolio(db)
+    adapter = TypeAdapter(PortfolioResponse)
+    encode = field_encoder(PortfolioResponse)
+    body = dumps(encode(data))
+    assert body == adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    
+    results = {
+        "pydantic serialize": median_us(
+            lambda: adapter.dump_json(adapter.validate_python(data, from_attributes=True)), repeat
+        ),
+        "fast serialize": median_us(lambda: dumps(encode(data)), repeat),
+        "pydantic build": median_us(lambda: pydantic_builder(load_portfolio, PortfolioResponse)(db), repeat),
+        "fast build": median_us(lambda: fast_builder(load_portfolio, PortfolioResponse)(db), repeat),
+    }
+    db.close()
+    
+    print(f"\n{label}: {len(body):,} bytes")
+    for name, us in results.items():
+        print(f"  {name:<20} {us:>12,.1f} us")
+    print(f"  serialize speedup    {results['pydantic serialize'] / results['fast serialize']:>12.1f}x")
+    print(f"  build speedup        {results['pydantic build'] / results['fast build']:>12.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    
+    migrate()
+    seed_database()
+    run("Seeded content", args.repeat)
+    seed_database(scale=100)
+    run("100x content", max(5, args.repeat // 5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Startup Benchmark
+=================
+Measures what a visitor waits for when the instance has been spun down:
+importing the app, running its startup (migrations check and warm-up) and
+serving the first request. Every run is a fresh interpreter against the
+same scratch database, seeded once by ``seed.py``, like a restart.
+
+Reports the median and worst of ``--runs`` runs and writes them as JSON.
+``--save-baseline`` stores them as the baseline and ``--compare`` exits
+with status 1 when the median is slower than the baseline by more than
+``--tolerance``.
+
+Usage (from backend/):
+    python -m benchmarks.startup [--runs 5]
+    python -m benchmarks.startup --save-baseline
+    python -m benchmarks.startup --compare
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).parent
+BASELINE_FILE = BENCHMARK_DIR / "startup_baseline.json"
+RESULTS_FILE = BENCHMARK_DIR / "startup_results.json"
+
+PHASES = ("import_ms", "startup_ms", "first_request_ms", "second_request_ms", "ready_ms", "process_ms")
+
+
+def run_worker() -> dict:
+    """One cold start, timed from inside the fresh interpreter"""
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    from benchmarks.asgi import ASGIClient
+
+    async def boot():
+        client = ASGIClient(main.app)
+        async with client.lifespan():
+            started = time.perf_counter()
+            status, _, _ = await client.request("GET", "/api/portfolio")
+            if status != 200:
+                raise RuntimeError(f"GET /api/portfolio returned {status}")
+            first = time.perf_counter()
+            await client.request("GET", "/api/portfolio")
+            second = time.perf_counter()
+        return started, first, second
+
+    started, first, second = asyncio.run(boot())
+    return {
+        "import_ms": (imported - start) * 1000,
+        "startup_ms": (started - imported) * 1000,
+        "first_request_ms": (first - started) * 1000,
+        "second_request_ms": (second - first) * 1000,
+        "ready_ms": (first - start) * 1000,
+    }
+
+
+def run_in_subprocess(env: dict) -> dict:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--worker"],
+        cwd=BENCHMARK_DIR.parent, env=env, check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    ).stdout
+    result = json.loads(output.decode().strip().splitlines()[-1])
+    # Interpreter start to exit, as seen by the process manager
+    result["process_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def summarize(runs: list) -> dict:
+    return {
+        phase: {
+            "median": round(statistics.median(r[phase] for r in runs), 1),
+            "max": round(max(r[phase] for r in runs), 1),
+        }
+        for phase in PHASES
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Phases whose median is slower than ``baseline`` beyond ``tolerance`` (fraction)"""
+    regressions = []
+    for phase, current in results["results"].items():
+        base = baseline.get("results", {}).get(phase)
+        if base and current["median"] > base["median"] * (1 + tolerance):
+            regressions.append(f"{phase}: {current['median']}ms vs baseline {base['median']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write {BASELINE_FILE.name}")
+    parser.add_argument("--compare", action="store_true", help=f"Fail on regressions against {BASELINE_FILE.name}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression (fraction)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker()))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="portfolio-startup-") as scratch:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{scratch}/startup.db",
+            MAIL_TRANSPORT="memory",
+            LOG_LEVEL="WARNING",
+        )
+        subprocess.run(
+            [sys.executable, "seed.py"], cwd=BENCHMARK_DIR.parent, env=env, check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        runs = []
+        for i in range(args.runs):
+            print(f"Run {i + 1}/{args.runs}...", file=sys.stderr)
+            runs.append(run_in_subprocess(env))
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "db_async": os.getenv("DB_ASYNC", "0") == "1",
+        },
+        "results": summarize(runs),
+    }
+    print(f"\n  {'phase':<20} {'median ms':>10} {'max ms':>10}")
+    for phase, r in results["results"].items():
+        print(f"  {phase:<20} {r['median']:>10.1f} {r['max']:>10.1f}")
+
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"\nResults written to {args.output}")
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {BASELINE_FILE}")
+
+    if args.compare:
+        if not BASELINE_FILE.exists():
+            sys.exit(f"No baseline at {BASELINE_FILE}; run with --save-baseline first")
+        regressions = compare(results, json.loads(BASELINE_FILE.read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
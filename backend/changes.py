@@ -0,0 +1,89 @@
+"""
+Content Deltas
+==============
+Answers ``/api/portfolio/changes?since=<version>`` from the
+``content_changes`` log: for every content table, the rows inserted or
+updated and the ids deleted after ``since``, as plain column records of
+the requesting tenant's rows.
+
+A table is sent whole, flagged ``reset``, when the log cannot say which of
+its rows changed: after a bulk statement, or when ``since`` predates the
+log (0 for a first sync) or comes from another database.
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.orm import Session
+
+from database import TENANT_KEY, Base, tenant_of
+from models import ContentChange
+from versioning import ALL_RESOURCES, DELETE, RESET, RESOURCE_BY_TABLE, get_versions
+
+CONTENT_TABLES = tuple(RESOURCE_BY_TABLE)
+
+
+def _rows(db: Session, table: Table, ids=None) -> List[dict]:
+    columns = [column for column in table.c if column.name != TENANT_KEY]
+    query = select(*columns).where(table.c.tenant_id == tenant_of(db)).order_by(table.c.id)
+    if ids is not None:
+        query = query.where(table.c.id.in_(ids))
+    return [dict(row) for row in db.execute(query).mappings()]
+
+
+def log_start(db: Session) -> int:
+    """Version of the tenant's oldest logged change; earlier versions cannot be diffed"""
+    return db.execute(
+        select(func.min(ContentChange.version)).where(ContentChange.tenant_id == tenant_of(db))
+    ).scalar() or 0
+
+
+def load_changes(db: Session, since: int) -> dict:
+    """
+    Changes to the content after version ``since``
+
+    Returns:
+        dict: ``since``, the current ``version`` and per-table ``changes``
+        with ``reset``, ``upserted`` rows and ``deleted`` ids
+    """
+    version = get_versions(db).version(ALL_RESOURCES)
+    result = {"since": since, "version": version, "changes": {}}
+    if since == version:
+        return result
+
+    if since > version or since < log_start(db):
+        resets = set(CONTENT_TABLES)
+        latest = {}
+    else:
+        # Last operation per row after ``since``
+        last = (
+            select(ContentChange.table_name, ContentChange.row_id,
+                   func.max(ContentChange.id).label("id"))
+            .where(ContentChange.tenant_id == tenant_of(db), ContentChange.version > since)
+            .group_by(ContentChange.table_name, ContentChange.row_id)
+            .subquery()
+        )
+        entries = db.execute(
+            select(ContentChange.table_name, ContentChange.row_id, ContentChange.operation)
+            .join(last, ContentChange.id == last.c.id)
+        ).all()
+        resets = {table for table, _, operation in entries if operation == RESET}
+        latest: Dict[str, Dict[int, str]] = {}
+        for table, row_id, operation in entries:
+            if table not in resets:
+                latest.setdefault(table, {})[row_id] = operation
+
+    tables = Base.metadata.tables
+    for name in CONTENT_TABLES:
+        if name in resets:
+            result["changes"][name] = {"reset": True, "upserted": _rows(db, tables[name]), "deleted": []}
+        elif name in latest:
+            upserted = _rows(db, tables[name], [i for i, op in latest[name].items() if op != DELETE])
+            present = {row["id"] for row in upserted}
+            result["changes"][name] = {
+                "reset": False,
+                "upserted": upserted,
+                # Rows upserted and then deleted in a later transaction are gone too
+                "deleted": sorted(i for i in latest[name] if i not in present),
+            }
+    return result
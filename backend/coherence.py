@@ -0,0 +1,123 @@
+"""
+Cross-Process Version Cache
+===========================
+Every read request needs its tenant's content versions for its ETag, and
+snapshots are rebuilt only when those versions move. Each worker keeps them
+in memory (for the most recently served tenants) and re-reads the
+``content_versions`` table only when content changed, which another worker,
+``seed.py`` or a migration may have done. Version numbers are global, so
+one stamp serves every tenant; a commit makes each tenant reload once.
+
+For a SQLite database file the change signal is a stamp file next to it
+(``<database>-version``) holding the latest committed version. The
+versioning hooks write it after every commit that changes content, in any
+process, and readers compare it with the stamp their cached versions were
+loaded under: a single ``pread`` of 20 bytes per request. Other databases,
+and writers that bypass the session hooks, are covered by re-reading the
+versions at least every ``CONTENT_VERSION_TTL`` seconds.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from database import SQLITE_PATH, tenant_of
+from settings import get_settings
+from versioning import ContentVersions, get_versions
+
+logger = logging.getLogger(__name__)
+
+STAMP_WIDTH = 20
+
+
+class VersionStamp:
+    """Latest committed content version, in a file shared by every process"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+    
+    def _open(self) -> Optional[int]:
+        if self._fd is None:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            except OSError as e:
+                logger.warning(f"Version stamp {self.path} unavailable: {e}")
+                self._fd = -1
+        return self._fd if self._fd >= 0 else None
+    
+    def read(self) -> Optional[bytes]:
+        fd = self._open()
+        return os.pread(fd, STAMP_WIDTH, 0) if fd is not None else None
+    
+    def write(self, version: int):
+        fd = self._open()
+        if fd is not None:
+            # Fixed width, so one write replaces the whole value
+            os.pwrite(fd, str(version).rjust(STAMP_WIDTH, "0").encode(), 0)
+
+
+class VersionCache:
+    """Content versions of this process by tenant, reloaded when the stamp or the TTL says so"""
+    
+    def __init__(self, stamp: Optional[VersionStamp], ttl: float, max_tenants: int = 100):
+        self.stamp = stamp
+        self.ttl = ttl
+        self.max_tenants = max_tenants
+        self._cached: "OrderedDict[int, tuple]" = OrderedDict()  # tenant -> (stamp, loaded at, versions)
+        self._generation = 0
+        self._lock = threading.Lock()
+    
+    def get(self, db: Session) -> ContentVersions:
+        tenant_id = tenant_of(db)
+        token = self.stamp.read() if self.stamp else None
+        cached = self._cached.get(tenant_id)
+        if cached is not None and cached[0] == token and time.monotonic() - cached[1] < self.ttl:
+            return cached[2]
+        
+        # The stamp is read before the query, so a commit racing with the
+        # query changes the stamp again and is never missed
+        generation = self._generation
+        loaded_at = time.monotonic()
+        versions = get_versions(db)
+        with self._lock:
+            if generation == self._generation:
+                self._cached[tenant_id] = (token, loaded_at, versions)
+                self._cached.move_to_end(tenant_id)
+                while len(self._cached) > self.max_tenants:
+                    self._cached.popitem(last=False)
+        return versions
+    
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._cached.clear()
+    
+    def publish(self, version: int):
+        """Announce a commit of ``version`` to this and every other process"""
+        self.invalidate()
+        if self.stamp:
+            self.stamp.write(version)
+
+
+# Global version cache
+version_cache = None
+
+def get_version_cache() -> VersionCache:
+    """Get or create the version cache (``versioning`` publishes commits to it)"""
+    global version_cache
+    if version_cache is None:
+        stamp = VersionStamp(f"{SQLITE_PATH}-version") if SQLITE_PATH else None
+        settings = get_settings()
+        version_cache = VersionCache(stamp, settings.content_version_ttl, settings.snapshot_max_tenants)
+    return version_cache
+
+
+def current_versions(db: Session) -> ContentVersions:
+    """Content versions for a read request, usually without a query"""
+    return get_version_cache().get(db)
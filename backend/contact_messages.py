@@ -0,0 +1,160 @@
+"""
+Contact Message Inbox
+=====================
+Reading back the contact messages of the request's tenant, with the admin
+token (see ``admin``):
+
+- ``GET /api/contact/messages`` returns them newest first, a page at a
+  time. Pages are keyset-paginated on ``(created_at, id)``: a page's
+  ``next_cursor`` names its last row and the next page starts right after
+  it. Every page is one range scan of the ``(tenant_id, created_at, id)``
+  index, however deep, and messages arriving between pages neither shift
+  nor repeat rows the way OFFSET pages would.
+- ``GET /api/contact/messages/export?format=ndjson|csv`` streams all of
+  them, oldest first, in batches of ``EXPORT_BATCH`` rows read the same
+  way. Each batch is read in its own short transaction and written out
+  before the next is read, so memory stays constant and a long download
+  never holds a database snapshot open.
+"""
+
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, List, Literal, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from admin import require_admin
+from database import TENANT_KEY, SessionLocal, get_db, run_db
+from models import ContactMessage
+from schemas import ContactMessagePage, ContactMessageResponse
+from serializers import dumps
+from tenancy import get_tenant_id
+
+# Rows per export query
+EXPORT_BATCH = 500
+EXPORT_COLUMNS = ("id", "created_at", "name", "email", "message")
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+def keyset_after(query, cursor: Cursor, newest_first: bool):
+    """``query`` continued past the row at ``cursor`` in its (created_at, id) order"""
+    created_at, row_id = cursor
+    if newest_first:
+        return query.where(
+            ContactMessage.created_at <= created_at,
+            or_(ContactMessage.created_at < created_at, ContactMessage.id < row_id),
+        )
+    return query.where(
+        ContactMessage.created_at >= created_at,
+        or_(ContactMessage.created_at > created_at, ContactMessage.id > row_id),
+    )
+
+
+def list_messages(db: Session, limit: int, cursor: Optional[Cursor]) -> ContactMessagePage:
+    query = select(ContactMessage).order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc())
+    if cursor is not None:
+        query = keyset_after(query, cursor, newest_first=True)
+    # One row more than asked tells whether there is a next page
+    rows = db.scalars(query.limit(limit + 1)).all()
+    page = rows[:limit]
+    return ContactMessagePage(
+        messages=[ContactMessageResponse.model_validate(row) for row in page],
+        next_cursor=encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None,
+    )
+
+
+def export_batches(tenant_id: int) -> Iterator[List[dict]]:
+    """A tenant's messages, oldest first, ``EXPORT_BATCH`` rows at a time"""
+    columns = [getattr(ContactMessage, name) for name in EXPORT_COLUMNS]
+    cursor = None
+    while True:
+        query = select(*columns).order_by(ContactMessage.created_at, ContactMessage.id)
+        if cursor is not None:
+            query = keyset_after(query, cursor, newest_first=False)
+        db = SessionLocal(info={TENANT_KEY: tenant_id})
+        try:
+            rows = db.execute(query.limit(EXPORT_BATCH)).all()
+        finally:
+            db.close()
+        if not rows:
+            return
+        yield [
+            {**row._asdict(), "created_at": row.created_at.isoformat()}
+            for row in rows
+        ]
+        if len(rows) < EXPORT_BATCH:
+            return
+        cursor = (rows[-1].created_at, rows[-1].id)
+
+
+def ndjson_chunks(batches: Iterator[List[dict]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(dumps(row) + b"\n" for row in batch)
+
+
+def csv_chunks(batches: Iterator[List[dict]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # Header of an empty export
+        yield buffer.getvalue().encode()
+
+
+# Format -> (chunk encoder, media type)
+EXPORT_FORMATS = {
+    "ndjson": (ndjson_chunks, "application/x-ndjson"),
+    "csv": (csv_chunks, "text/csv; charset=utf-8"),
+}
+
+router = APIRouter(prefix="/api/contact/messages", tags=["contact"], dependencies=[Depends(require_admin)])
+
+
+@router.get("", response_model=ContactMessagePage)
+async def list_contact_messages(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: Session = Depends(get_db)
+):
+    after = decode_cursor(cursor) if cursor else None
+    return await run_db(db, list_messages, limit, after)
+
+
+@router.get("/export")
+async def export_contact_messages(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    tenant_id: int = Depends(get_tenant_id)
+):
+    # Batches open their own sessions: the request's session is closed
+    # before the body is streamed
+    encode, media_type = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        encode(export_batches(tenant_id)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="contact_messages.{format}"'},
+    )
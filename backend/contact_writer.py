@@ -0,0 +1,163 @@
+"""
+Contact Group Commit
+====================
+POST /api/contact hands its message to a single writer thread instead of
+committing it in its own transaction. The writer collects the messages that
+arrive within ``CONTACT_BATCH_WINDOW_MS`` (up to ``CONTACT_BATCH_MAX``),
+inserts them with their outbox entries in one transaction and commits once,
+so a burst of submissions costs one sync instead of one per message.
+
+Ids come back from the insert itself and timestamps (UTC, like the outbox)
+are assigned on submission, so responses are built without reading the rows
+back. A request is answered only after its batch has committed on the
+durable engine (``synchronous=FULL`` on SQLite), so an acknowledged message
+survives a crash or power loss.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+import metrics
+from database import DEFAULT_TENANT_ID, get_durable_engine
+from models import ContactMessage
+from outbox import enqueue_contact_notification, notifications_enabled, utcnow
+from schemas import ContactMessageCreate, ContactMessageResponse
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    """A submitted message and the request waiting for it"""
+    
+    __slots__ = ("message", "tenant_id", "created_at", "loop", "future")
+    
+    def __init__(self, message: ContactMessageCreate, tenant_id: int, loop, future):
+        self.message = message
+        self.tenant_id = tenant_id
+        self.created_at = utcnow()
+        self.loop = loop
+        self.future = future
+
+
+def _resolve(future: asyncio.Future, result, error: Optional[BaseException]):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class ContactWriter:
+    """Single writer thread committing contact messages in groups"""
+    
+    def __init__(self, window: Optional[float] = None, max_batch: Optional[int] = None):
+        settings = get_settings()
+        self.window = settings.contact_batch_window if window is None else window
+        self.max_batch = max_batch or settings.contact_batch_max
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name="contact-writer", daemon=True)
+                self._thread.start()
+    
+    def stop(self, timeout: float = 10):
+        """Commit what is queued, then stop the thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+    
+    async def submit(self, message: ContactMessageCreate,
+                     tenant_id: int = DEFAULT_TENANT_ID) -> ContactMessageResponse:
+        """Queue ``message`` to ``tenant_id`` and wait until it is durably committed"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        pending = _Pending(message, tenant_id, loop, loop.create_future())
+        self._queue.put(pending)
+        return await pending.future
+    
+    def run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    pending = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+            self.write(batch)
+    
+    def write(self, batch: list):
+        """Insert and commit ``batch`` in one transaction, then answer its requests"""
+        results, error, db = [], None, None
+        try:
+            db = Session(bind=get_durable_engine(), expire_on_commit=False)
+            messages = [
+                ContactMessage(
+                    tenant_id=p.tenant_id,
+                    name=p.message.name,
+                    email=p.message.email,
+                    message=p.message.message,
+                    created_at=p.created_at,
+                )
+                for p in batch
+            ]
+            db.add_all(messages)
+            # Queue the email notifications in the same transaction; the
+            # outbox worker delivers them after the responses have been sent
+            if notifications_enabled():
+                for message in messages:
+                    enqueue_contact_notification(db, message)
+            db.commit()
+            results = [
+                ContactMessageResponse(
+                    id=m.id, name=m.name, email=m.email, message=m.message, created_at=m.created_at
+                )
+                for m in messages
+            ]
+            metrics.contact_batch_size.observe(len(batch))
+        except Exception as e:
+            if db is not None:
+                db.rollback()
+            logger.error(f"Contact batch of {len(batch)} failed: {e}")
+            error = e
+        finally:
+            if db is not None:
+                db.close()
+        
+        for i, pending in enumerate(batch):
+            pending.loop.call_soon_threadsafe(
+                _resolve, pending.future, results[i] if results else None, error
+            )
+
+
+# Global contact writer
+contact_writer = None
+
+def get_contact_writer() -> ContactWriter:
+    """Get or create the contact writer"""
+    global contact_writer
+    if contact_writer is None:
+        contact_writer = ContactWriter()
+    return contact_writer
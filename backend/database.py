@@ -1,20 +1,247 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./portfolio.db"
+from sqlalchemy import Column, ForeignKey, Integer, create_engine, event, make_url
+from sqlalchemy.orm import Session, declarative_base, declared_attr, sessionmaker, with_loader_criteria
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+from settings import get_settings
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Async-driver equivalent of a sync database URL"""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def engine_options(url: str) -> dict:
+    settings = get_settings()
+    if url.startswith("sqlite"):
+        return {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": settings.sqlite_busy_timeout / 1000,
+            },
+        }
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": True,
+    }
+
+
+def configure_sqlite(dbapi_connection, connection_record):
+    """
+    Per-connection SQLite tuning
+    
+    WAL lets readers proceed while a writer commits, synchronous=NORMAL only
+    fsyncs at checkpoints (safe in WAL mode), mmap avoids read() copies and
+    busy_timeout makes writers wait for the lock instead of failing.
+    New database files use incremental auto-vacuum, so ``retention`` can
+    return the pages of deleted rows to the file system a few at a time.
+    """
+    settings = get_settings()
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}")
+    cursor.close()
+
+
+SQLALCHEMY_DATABASE_URL = get_settings().database_url
+ASYNC_DATABASE_URL = async_database_url(SQLALCHEMY_DATABASE_URL)
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+# Database file, for SQLite databases stored in one
+SQLITE_PATH = make_url(SQLALCHEMY_DATABASE_URL).database if IS_SQLITE else None
+if SQLITE_PATH in ("", ":memory:"):
+    SQLITE_PATH = None
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# With DB_ASYNC=1 requests use an asyncio engine and never occupy the
+# threadpool; scripts, seeding and the outbox worker keep the sync engine
+if get_settings().db_async:
+    # Imported only when used; the async stack adds to cold-start time
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
+if IS_SQLITE:
+    event.listen(engine, "connect", configure_sqlite)
+    if async_engine is not None:
+        event.listen(async_engine.sync_engine, "connect", configure_sqlite)
+
 Base = declarative_base()
 
+# ``Session.info`` key of the tenant whose content a session reads and writes
+# (see ``tenancy``); sessions without one are unscoped
+TENANT_KEY = "tenant_id"
+# Tenant of databases created before multi-tenancy, and of unknown hosts
+DEFAULT_TENANT_ID = 1
+
+
+def tenant_of(session) -> int:
+    return session.info.get(TENANT_KEY, DEFAULT_TENANT_ID)
+
+
+class TenantScoped:
+    """
+    Mixin of models whose rows belong to one tenant
+    
+    ORM queries of a session bound to a tenant only see that tenant's rows,
+    and rows it adds without a tenant get it.
+    """
+    
+    @declared_attr
+    def tenant_id(cls):
+        # Existing rows, and writers that set no tenant, belong to the default tenant
+        return Column(Integer, ForeignKey("tenants.id"), nullable=False, server_default="1")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_tenant(orm_execute_state):
+    tenant_id = orm_execute_state.session.info.get(TENANT_KEY)
+    if tenant_id is None or orm_execute_state.is_column_load or orm_execute_state.is_relationship_load:
+        return
+    if orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            with_loader_criteria(TenantScoped, lambda cls: cls.tenant_id == tenant_id, include_aliases=True)
+        )
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_tenant(session, flush_context, instances):
+    tenant_id = session.info.get(TENANT_KEY)
+    if tenant_id is not None:
+        for obj in session.new:
+            if isinstance(obj, TenantScoped) and obj.tenant_id is None:
+                obj.tenant_id = tenant_id
+
+
+_durable_engine = None
+
+
+def get_durable_engine():
+    """
+    Engine for writes that must be on disk before they are acknowledged
+    
+    With WAL and synchronous=NORMAL a power loss can drop the latest commits;
+    these SQLite connections use synchronous=FULL, which syncs the WAL on
+    every commit. Server databases are durable on commit already.
+    """
+    global _durable_engine
+    if not IS_SQLITE:
+        return engine
+    if _durable_engine is None:
+        durable = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+        event.listen(durable, "connect", configure_sqlite)
+        event.listen(
+            durable, "connect",
+            lambda dbapi_connection, record: dbapi_connection.execute("PRAGMA synchronous=FULL")
+        )
+        event.listen(durable, "before_cursor_execute", _start_query)
+        event.listen(durable, "after_cursor_execute", _finish_query)
+        _durable_engine = durable
+    return _durable_engine
+
+
+async def get_db(request: Request):
+    """
+    Request-scoped session: ``AsyncSession`` with DB_ASYNC=1, ``Session`` otherwise
+    
+    Scoped to the tenant the request was resolved to.
+    """
+    info = {TENANT_KEY: getattr(request.state, "tenant_id", DEFAULT_TENANT_ID)}
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal(info=info) as db:
+            yield db
+    else:
+        db = SessionLocal(info=info)
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+async def run_db(db, fn, *args):
+    """
+    Run ``fn(session, *args)`` against either kind of session
+    
+    Data access is written once against the sync ``Session`` API. An
+    ``AsyncSession`` runs it through ``run_sync`` on the event loop, a sync
+    session runs it in the threadpool.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args)
+    return await db.run_sync(fn, *args)
+
+
+# Query counting
+# The counter is a mutable object stored in a context variable so that work
+# done in Starlette's threadpool (which copies the request context) still
+# increments the counter owned by the request.
+
+class QueryCounter:
+    """Number and total duration of SQL statements executed while the counter is active"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_query_counter: ContextVar = ContextVar("query_counter", default=None)
+
+# Callables invoked with the duration of every statement (see ``metrics``)
+query_observers = []
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info.pop("query_started_at", time.perf_counter())
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.duration += duration
+    for observer in query_observers:
+        observer(duration)
+
+
+event.listen(engine, "before_cursor_execute", _start_query)
+event.listen(engine, "after_cursor_execute", _finish_query)
+if async_engine is not None:
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _start_query)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", _finish_query)
+
 
-def get_db():
-    db = SessionLocal()
+@contextmanager
+def count_queries():
+    """Count the queries executed inside the ``with`` block"""
+    counter = QueryCounter()
+    token = _query_counter.set(counter)
     try:
-        yield db
+        yield counter
     finally:
-        db.close()
+        _query_counter.reset(token)
@@ -0,0 +1,92 @@
+"""
+Derived Indexes
+===============
+Tables derived from content rows, such as the search index and the
+technology index, are refreshed inside the transaction that changes the
+content, so readers never see them out of step.
+
+Each index registers the content tables it is built from and a
+``refresh(conn, table, ids)`` function. ORM flushes refresh exactly the rows
+they touched; bulk statements (as used by ``seed.py``) refresh the whole
+table just before commit.
+"""
+
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_STALE_KEY = "derived_stale_tables"
+
+
+class DerivedIndex:
+    def __init__(self, name: str, tables: Iterable[str],
+                 refresh: Callable[..., None], available: Optional[Callable] = None):
+        """
+        Args:
+            name: Index name, for logs
+            tables: Content tables the index is built from
+            refresh: ``refresh(conn, table, ids)``; ``ids=None`` means the whole table
+            available: ``available(conn)``, False while the index does not exist yet
+        """
+        self.name = name
+        self.tables = frozenset(tables)
+        self.refresh = refresh
+        self.available = available or (lambda conn: True)
+
+
+_indexes = []
+
+
+def register(index: DerivedIndex) -> DerivedIndex:
+    _indexes.append(index)
+    return index
+
+
+def refresh_all(conn, tables: Optional[Iterable[str]] = None):
+    """Rebuild every registered index (or only their ``tables``) from scratch"""
+    for index in _indexes:
+        if index.available(conn):
+            for table in sorted(index.tables if tables is None else index.tables.intersection(tables)):
+                index.refresh(conn, table, None)
+
+
+def _table_name(obj) -> Optional[str]:
+    return getattr(getattr(obj, "__table__", None), "name", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_flushed(session, flush_context):
+    touched: Dict[str, Set[int]] = {}
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        touched.setdefault(_table_name(obj), set()).add(getattr(obj, "id", None))
+    conn = None
+    for index in _indexes:
+        tables = index.tables.intersection(touched)
+        if not tables:
+            continue
+        conn = conn or session.connection()
+        if index.available(conn):
+            for table in sorted(tables):
+                index.refresh(conn, table, touched[table])
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(getattr(orm_execute_state.statement, "table", None), "name", None)
+        if any(table in index.tables for index in _indexes):
+            orm_execute_state.session.info.setdefault(_STALE_KEY, set()).add(table)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_stale(session):
+    if not session.info.get(_STALE_KEY):
+        return
+    session.flush()
+    refresh_all(session.connection(), session.info.pop(_STALE_KEY))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale(session):
+    session.info.pop(_STALE_KEY, None)
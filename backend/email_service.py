@@ -4,43 +4,289 @@ Email Service for Portfolio Contact Form
 Sends email notifications when someone submits the contact form.
 """
 
+import asyncio
 import os
+import queue
 import smtplib
+import threading
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from datetime import datetime
+from typing import Optional
 import logging
 
-# Load environment variables from .env file
-from pathlib import Path
-
 try:
-    from dotenv import load_dotenv
-    # Get the directory where this file is located
-    env_path = Path(__file__).parent / ".env"
-    load_dotenv(env_path)
-    print(f"Loaded .env from: {env_path}")
+    import aiosmtplib
 except ImportError:
-    print("python-dotenv not installed, using system environment variables")
+    aiosmtplib = None
+
+import metrics
+from settings import get_settings
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class SMTPTransport:
+    """
+    Delivers messages over a persistent, authenticated SMTP connection
+    
+    The connection is opened on first use and reused for later messages. If
+    it has been idle for longer than ``keepalive`` seconds it is checked with
+    NOOP first, and a dropped connection is re-established once per message.
+    """
+    
+    def __init__(self, server: str, port: int, username: str, password: str,
+                 timeout: float = 30, keepalive: float = 30):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self._connection = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        connection = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            connection.starttls()
+            connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        self._connection = connection
+        logger.info(f"SMTP session opened: {self.server}:{self.port}")
+    
+    def _ensure_connection(self):
+        if self._connection is not None and time.monotonic() - self._last_used > self.keepalive:
+            try:
+                status, _ = self._connection.noop()
+                if status != 250:
+                    self._disconnect()
+            except OSError:
+                self._disconnect()
+        if self._connection is None:
+            self._connect()
+    
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except Exception:
+                self._connection.close()
+            self._connection = None
+    
+    def _send_one(self, from_addr: str, to_addrs: list, msg: str):
+        try:
+            self._ensure_connection()
+            self._connection.sendmail(from_addr, to_addrs, msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # The server dropped the session; reconnect and try once more
+            self._disconnect()
+            self._connect()
+            self._connection.sendmail(from_addr, to_addrs, msg)
+        self._last_used = time.monotonic()
+    
+    def send(self, from_addr: str, to_addrs: list, msg: str):
+        with self._lock:
+            self._send_one(from_addr, to_addrs, msg)
+    
+    def send_many(self, messages: list) -> list:
+        """
+        Send ``(from_addr, to_addrs, msg)`` tuples over one session
+        
+        Returns:
+            list: ``None`` for each delivered message, the exception otherwise
+        """
+        results = []
+        with self._lock:
+            for from_addr, to_addrs, msg in messages:
+                try:
+                    self._send_one(from_addr, to_addrs, msg)
+                    results.append(None)
+                except Exception as e:
+                    results.append(e)
+        return results
+    
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+class SMTPConnectionPool:
+    """Fixed number of persistent ``SMTPTransport`` sessions shared between threads"""
+    
+    def __init__(self, size: int, **transport_options):
+        self._idle = queue.LifoQueue()
+        self._transports = [SMTPTransport(**transport_options) for _ in range(size)]
+        for transport in self._transports:
+            self._idle.put(transport)
+    
+    def _checkout(self):
+        return self._idle.get()
+    
+    def send(self, from_addr: str, to_addrs: list, msg: str):
+        transport = self._checkout()
+        try:
+            transport.send(from_addr, to_addrs, msg)
+        finally:
+            self._idle.put(transport)
+    
+    def send_many(self, messages: list) -> list:
+        transport = self._checkout()
+        try:
+            return transport.send_many(messages)
+        finally:
+            self._idle.put(transport)
+    
+    def close(self):
+        for transport in self._transports:
+            transport.close()
+
+
+class AsyncSMTPTransport:
+    """
+    asyncio-native counterpart of ``SMTPTransport`` built on aiosmtplib
+    
+    Keeps one authenticated session per instance, with the same NOOP health
+    check and reconnect-on-failure behaviour.
+    """
+    
+    def __init__(self, server: str, port: int, username: str, password: str,
+                 timeout: float = 30, keepalive: float = 30):
+        if aiosmtplib is None:
+            raise RuntimeError("aiosmtplib is not installed")
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self._connection = None
+        self._last_used = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def _connect(self):
+        connection = aiosmtplib.SMTP(
+            hostname=self.server, port=self.port, timeout=self.timeout, start_tls=True
+        )
+        await connection.connect()
+        try:
+            await connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        self._connection = connection
+        logger.info(f"Async SMTP session opened: {self.server}:{self.port}")
+    
+    async def _ensure_connection(self):
+        if self._connection is not None and time.monotonic() - self._last_used > self.keepalive:
+            try:
+                response = await self._connection.noop()
+                if response.code != 250:
+                    await self._disconnect()
+            except (aiosmtplib.SMTPException, OSError):
+                await self._disconnect()
+        if self._connection is None:
+            await self._connect()
+    
+    async def _disconnect(self):
+        if self._connection is not None:
+            try:
+                await self._connection.quit()
+            except Exception:
+                self._connection.close()
+            self._connection = None
+    
+    async def _send_one(self, from_addr: str, to_addrs: list, msg: str):
+        try:
+            await self._ensure_connection()
+            await self._connection.sendmail(from_addr, to_addrs, msg)
+        except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+            await self._disconnect()
+            await self._connect()
+            await self._connection.sendmail(from_addr, to_addrs, msg)
+        self._last_used = time.monotonic()
+    
+    async def send(self, from_addr: str, to_addrs: list, msg: str):
+        async with self._lock:
+            await self._send_one(from_addr, to_addrs, msg)
+    
+    async def send_many(self, messages: list) -> list:
+        results = []
+        async with self._lock:
+            for from_addr, to_addrs, msg in messages:
+                try:
+                    await self._send_one(from_addr, to_addrs, msg)
+                    results.append(None)
+                except Exception as e:
+                    results.append(e)
+        return results
+    
+    async def close(self):
+        async with self._lock:
+            await self._disconnect()
+
+
+class InMemoryTransport:
+    """Keeps messages in memory instead of delivering them (tests, local development)"""
+    
+    def __init__(self):
+        self.messages = []
+    
+    def send(self, from_addr: str, to_addrs: list, msg: str):
+        self.messages.append((from_addr, list(to_addrs), msg))
+    
+    def send_many(self, messages: list) -> list:
+        for from_addr, to_addrs, msg in messages:
+            self.send(from_addr, to_addrs, msg)
+        return [None] * len(messages)
+    
+    def close(self):
+        pass
+
+
 class EmailService:
     """Simple email service for contact form notifications"""
     
-    def __init__(self):
+    def __init__(self, transport=None, async_transport=None):
+        get_settings()  # backend/.env, if nothing has loaded it yet
         self.smtp_server = os.getenv("MAIL_SERVER", "smtp.gmail.com")
         self.smtp_port = int(os.getenv("MAIL_PORT", "587"))
         self.username = os.getenv("MAIL_USERNAME")
         self.password = os.getenv("MAIL_PASSWORD")
         self.from_email = os.getenv("MAIL_FROM")
+        self.pool_size = int(os.getenv("MAIL_POOL_SIZE", "1"))
+        self.timeout = float(os.getenv("MAIL_TIMEOUT", "30"))
+        self.keepalive = float(os.getenv("MAIL_KEEPALIVE", "30"))
+        self.async_transport = async_transport
         
-        if not all([self.username, self.password, self.from_email]):
+        if transport is None and os.getenv("MAIL_TRANSPORT", "smtp") == "memory":
+            transport = InMemoryTransport()
+        
+        if transport is not None:
+            self.transport = transport
+            self.from_email = self.from_email or "portfolio@localhost"
+            self.is_configured = True
+            logger.info(f"Email service initialized with {type(transport).__name__}")
+        elif not all([self.username, self.password, self.from_email]):
             logger.warning("Email credentials not fully configured. Emails will not be sent.")
+            self.transport = None
             self.is_configured = False
         else:
+            options = dict(
+                server=self.smtp_server, port=self.smtp_port,
+                username=self.username, password=self.password,
+                timeout=self.timeout, keepalive=self.keepalive,
+            )
+            if self.pool_size > 1:
+                self.transport = SMTPConnectionPool(self.pool_size, **options)
+            else:
+                self.transport = SMTPTransport(**options)
+            if self.async_transport is None and aiosmtplib is not None:
+                self.async_transport = AsyncSMTPTransport(**options)
             self.is_configured = True
             logger.info(f"Email service initialized: {self.smtp_server}:{self.smtp_port}")
     
@@ -61,31 +307,89 @@ class EmailService:
             return False
         
         try:
-            msg = MIMEMultipart()
-            msg['From'] = f"Portfolio Contact <{self.from_email}>"
-            msg['To'] = self.from_email  # Send to yourself
-            msg['Subject'] = f"🚀 New Portfolio Contact: {name}"
-            msg['Reply-To'] = email  # Reply goes to the sender
-            
-            html_body = self._create_html_body(name, email, message)
-            msg.attach(MIMEText(html_body, 'html'))
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                server.sendmail(self.from_email, self.from_email, msg.as_string())
-            
-            logger.info(f"Contact notification sent for: {name} <{email}>")
+            self.deliver_contact_notification(name, email, message)
             return True
-            
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
             return False
     
-    def _create_html_body(self, name: str, email: str, message: str) -> str:
-        """Create HTML email body for contact notification"""
-        timestamp = datetime.now().strftime("%B %d, %Y at %I:%M %p")
+    def deliver_contact_notification(self, name: str, email: str, message: str):
+        """
+        Send the contact notification, raising on failure so callers can retry
+        
+        Args:
+            name: Sender's name
+            email: Sender's email
+            message: Contact message
+        """
+        msg = self._build_contact_notification(name, email, message)
+        start = time.perf_counter()
+        try:
+            self.transport.send(*msg)
+        except Exception:
+            self._record_sends(start, [False])
+            raise
+        self._record_sends(start, [True])
+        logger.info(f"Contact notification sent for: {name} <{email}>")
+    
+    def deliver_contact_notifications(self, notifications: list) -> list:
+        """
+        Send many contact notifications over a single SMTP session
+        
+        Args:
+            notifications: ``(name, email, message, created_at)`` tuples
+            
+        Returns:
+            list: ``None`` for each delivered notification, the exception otherwise
+        """
+        messages = [self._build_contact_notification(*n) for n in notifications]
+        start = time.perf_counter()
+        results = self.transport.send_many(messages)
+        self._record_sends(start, [r is None for r in results])
+        logger.info(f"Sent {results.count(None)}/{len(results)} contact notifications")
+        return results
+    
+    async def deliver_contact_notifications_async(self, notifications: list) -> list:
+        """Async variant of ``deliver_contact_notifications``"""
+        if self.async_transport is None:
+            return await asyncio.to_thread(self.deliver_contact_notifications, notifications)
+        messages = [self._build_contact_notification(*n) for n in notifications]
+        start = time.perf_counter()
+        results = await self.async_transport.send_many(messages)
+        self._record_sends(start, [r is None for r in results])
+        return results
+    
+    def _record_sends(self, start: float, outcomes: list):
+        elapsed = time.perf_counter() - start
+        for sent in outcomes:
+            metrics.email_sends.inc("sent" if sent else "failed")
+        metrics.email_send_time.observe(elapsed, "sent" if all(outcomes) else "failed")
+    
+    def close(self):
+        """Close open SMTP sessions"""
+        if self.transport is not None:
+            self.transport.close()
+    
+    def _build_contact_notification(
+        self, name: str, email: str, message: str, created_at: Optional[datetime] = None
+    ) -> tuple:
+        """Build the ``(from_addr, to_addrs, msg)`` tuple for a contact notification"""
+        msg = MIMEMultipart()
+        msg['From'] = f"Portfolio Contact <{self.from_email}>"
+        msg['To'] = self.from_email  # Send to yourself
+        msg['Subject'] = f"🚀 New Portfolio Contact: {name}"
+        msg['Reply-To'] = email  # Reply goes to the sender
+        
+        html_body = self._create_html_body(name, email, message, created_at)
+        msg.attach(MIMEText(html_body, 'html'))
+        
+        return self.from_email, [self.from_email], msg.as_string()
+    
+    def _create_html_body(
+        self, name: str, email: str, message: str, created_at: Optional[datetime] = None
+    ) -> str:
+        """Create HTML email body for contact notification, stamped with the submission time"""
+        timestamp = (created_at or datetime.now()).strftime("%B %d, %Y at %I:%M %p")
         
         return f"""
         <!DOCTYPE html>
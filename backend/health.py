@@ -0,0 +1,132 @@
+"""
+Health Checks
+=============
+``/health/live`` only says the process is serving requests. ``/health/ready``
+says whether this instance should receive traffic:
+
+- ``startup``: migrations and warm-up have finished
+- ``database``: a read round trip completes within ``HEALTH_DB_MAX_MS``
+- ``snapshots``: every response snapshot is built
+- ``outbox``: no more than ``HEALTH_OUTBOX_MAX_PENDING`` notifications are
+  waiting, and none has been due for longer than ``HEALTH_OUTBOX_MAX_OVERDUE``
+  seconds. Only reported, never failing, when this process does not
+  deliver email (no MAIL_* credentials, or ``OUTBOX_WORKER_ENABLED=0``):
+  its backlog cannot clear here, and serving traffic does not depend on it
+
+Each check reports its duration. The report is computed at most once per
+``HEALTH_CACHE_TTL`` seconds, however many probes arrive, so polling it
+every second adds two indexed queries per second at most.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import ContentVersion, EmailOutbox
+from settings import get_settings
+from snapshot import get_snapshot_store
+
+
+def _timed(check: Callable[[], dict]) -> dict:
+    start = time.perf_counter()
+    try:
+        result = check()
+    except Exception as e:
+        result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    result["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def check_database(db: Session) -> dict:
+    settings = get_settings()
+    start = time.perf_counter()
+    db.execute(select(func.max(ContentVersion.version))).scalar()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return {"ok": elapsed_ms <= settings.health_db_max_ms, "limit_ms": settings.health_db_max_ms}
+
+
+def check_snapshots() -> dict:
+    return {"ok": get_snapshot_store().is_warm()}
+
+
+def delivers_email() -> bool:
+    """Whether this process's outbox worker can deliver notifications"""
+    if not get_settings().outbox_worker_enabled:
+        return False
+    # Imported here, like the outbox does, to keep the email stack off startup
+    from email_service import get_email_service
+    return get_email_service().is_configured
+
+
+def check_outbox(db: Session) -> dict:
+    settings = get_settings()
+    pending, oldest_due = db.execute(
+        select(func.count(), func.min(EmailOutbox.next_attempt_at))
+        .where(EmailOutbox.status.in_(("pending", "sending")))
+    ).one()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    overdue = max(0.0, (now - oldest_due).total_seconds()) if oldest_due else 0.0
+    delivering = delivers_email()
+    return {
+        "ok": not delivering or (
+            pending <= settings.health_outbox_max_pending
+            and overdue <= settings.health_outbox_max_overdue
+        ),
+        "delivering": delivering,
+        "pending": pending,
+        "overdue_seconds": round(overdue, 1),
+    }
+
+
+class ReadinessProbe:
+    """Readiness report, recomputed at most once per ``HEALTH_CACHE_TTL``"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._report = None
+        self._checked = 0.0
+    
+    def check(self, started: bool) -> Tuple[bool, dict]:
+        """``(ready, report)``; concurrent callers wait for one computation"""
+        with self._lock:
+            if (
+                self._report is None
+                or self._report["checks"]["startup"]["ok"] != started
+                or time.monotonic() - self._checked >= get_settings().health_cache_ttl
+            ):
+                self._report = self._run(started)
+                self._checked = time.monotonic()
+            return self._report["status"] == "ready", self._report
+    
+    def _run(self, started: bool) -> dict:
+        checks = {"startup": {"ok": started}}
+        if started:
+            db = SessionLocal()
+            try:
+                checks["database"] = _timed(lambda: check_database(db))
+                checks["snapshots"] = _timed(check_snapshots)
+                checks["outbox"] = _timed(lambda: check_outbox(db))
+            finally:
+                db.close()
+        ready = all(check["ok"] for check in checks.values())
+        return {
+            "status": "ready" if ready else "not_ready",
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "checks": checks,
+        }
+
+
+# Global readiness probe
+readiness_probe = None
+
+def get_readiness_probe() -> ReadinessProbe:
+    """Get or create the readiness probe"""
+    global readiness_probe
+    if readiness_probe is None:
+        readiness_probe = ReadinessProbe()
+    return readiness_probe
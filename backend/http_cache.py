@@ -0,0 +1,71 @@
+"""
+HTTP Conditional Caching
+========================
+ETag / Last-Modified validators for read endpoints, derived from the content
+versions in ``versioning``. A request whose validators still match gets an
+empty 304 before any content is loaded or serialized.
+"""
+
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable
+
+from fastapi import Request, Response
+
+from settings import get_settings
+from versioning import ContentVersions
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 section 13.1.2)
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _not_modified_since(if_modified_since: str, last_modified: str) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(last_modified) <= since
+
+
+def validators(versions: ContentVersions, resources: Iterable[str]) -> dict:
+    """ETag, Last-Modified and Cache-Control headers for ``resources``"""
+    resources = tuple(resources)
+    settings = get_settings()
+    headers = {
+        "ETag": f'W/"v{versions.version(resources)}"',
+        "Cache-Control": (
+            f"public, max-age={settings.cache_max_age}, "
+            f"stale-while-revalidate={settings.cache_stale_while_revalidate}"
+        ),
+    }
+    last_modified = versions.last_modified(resources)
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def is_not_modified(request: Request, headers: dict) -> bool:
+    """Whether the client's cached copy, described by its conditional headers, is current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, headers["ETag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and "Last-Modified" in headers:
+        return _not_modified_since(if_modified_since, headers["Last-Modified"])
+    return False
+
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -1,28 +1,97 @@
-from fastapi import FastAPI, Depends, HTTPException
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List
+from typing import List, Literal, Optional
 
-from database import get_db, engine, Base
-from models import (
-    Profile, Education, Experience, Responsibility, 
-    Project, SkillCategory, Skill, Certification, ContactMessage
-)
+from admin import router as admin_router
+from contact_messages import router as contact_messages_router
+from database import async_engine, get_db, run_db, DEFAULT_TENANT_ID, SessionLocal, TENANT_KEY
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry
 from schemas import (
     ProfileResponse, EducationResponse, ExperienceResponse,
     ProjectResponse, SkillCategoryResponse, CertificationResponse,
-    ContactMessageCreate, ContactMessageResponse, PortfolioResponse
+    ContactMessageCreate, ContactMessageResponse, PortfolioResponse, SearchResponse,
+    TechnologyUsageResponse, ChangesResponse
 )
-from email_service import get_email_service
+from changes import load_changes
+from coherence import current_versions
+from contact_writer import get_contact_writer
+from health import get_readiness_probe
+from http_cache import is_not_modified, not_modified_response, validators
+from outbox import get_outbox_worker
+from retention import get_retention_worker
+from portfolio import (
+    load_profile, load_education, load_experiences,
+    load_projects, load_skill_categories, load_certifications,
+    load_selection, parse_selection, selection_key, selection_resources, selection_schema
+)
+from migrations import migrate
+from search import search
+from serializers import dumps, json_builder
+from settings import get_settings
+from singleflight import get_single_flight
+from tenancy import TenantMiddleware, get_tenant_id
+from snapshot import get_snapshot_store
+from technologies import load_projects_with_technologies, load_technology_usage
+from versioning import ALL_RESOURCES
+
+logging.basicConfig(level=get_settings().log_level)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes and warm-up run here rather than at import, and finish
+    # before the server starts accepting requests
+    app.state.ready = False
+    await run_in_threadpool(migrate)
+    await run_in_threadpool(warm_snapshots)
+    if async_engine is not None:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    writer = get_contact_writer()
+    writer.start()
+    worker = get_outbox_worker() if get_settings().outbox_worker_enabled else None
+    if worker:
+        worker.start()
+    retention = get_retention_worker() if get_settings().contact_retention_days > 0 else None
+    if retention:
+        retention.start()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    writer.stop()
+    if worker:
+        worker.stop()
+    if retention:
+        retention.stop()
+
+
+def warm_snapshots():
+    """
+    Build the default tenant's snapshots, which also opens and primes the database connection
+    
+    They are compressed at the fast setting; the recompression to the
+    smallest variants runs in the background, after startup.
+    """
+    db = SessionLocal(info={TENANT_KEY: DEFAULT_TENANT_ID})
+    try:
+        get_snapshot_store().warm(db)
+    finally:
+        db.close()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Naveen S Portfolio API",
     description="API for personal portfolio website",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration - Allow frontend origins
@@ -38,89 +107,207 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Query-Count", "ETag", "Last-Modified"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
+# Added last so it runs first: routing sees the path without its /t/<slug> prefix
+app.add_middleware(TenantMiddleware)
+
+app.include_router(admin_router)
+app.include_router(contact_messages_router)
+
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 
-@app.get("/api/portfolio", response_model=PortfolioResponse)
-def get_portfolio(db: Session = Depends(get_db)):
-    profile = db.query(Profile).first()
-    education = db.query(Education).all()
-    experiences = db.query(Experience).all()
-    projects = db.query(Project).all()
-    skill_categories = db.query(SkillCategory).all()
-    certifications = db.query(Certification).all()
-    
-    return PortfolioResponse(
-        profile=profile,
-        education=education,
-        experiences=experiences,
-        projects=projects,
-        skill_categories=skill_categories,
-        certifications=certifications
+@app.get("/health/live")
+async def liveness():
+    """The process is up and its event loop is responsive; touches nothing else"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness(request: Request):
+    """Whether this instance should receive traffic, with per-check timings"""
+    started = getattr(request.app.state, "ready", False)
+    ready, report = await run_in_threadpool(get_readiness_probe().check, started)
+    return JSONResponse(report, status_code=200 if ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+flights = get_single_flight()
+
+
+async def read(request: Request, db: Session, fn, *args):
+    """``fn(db, request, *args)``, computed once for concurrent identical requests"""
+    return await flights.read(request, lambda: run_db(db, fn, request, *args))
+
+
+snapshots = get_snapshot_store()
+snapshots.register(
+    "profile", ("profile",), json_builder(load_profile, ProfileResponse),
+    not_found="Profile not found"
+)
+snapshots.register("education", ("education",), json_builder(load_education, List[EducationResponse]))
+snapshots.register("experience", ("experience",), json_builder(load_experiences, List[ExperienceResponse]))
+snapshots.register("projects", ("projects",), json_builder(load_projects, List[ProjectResponse]))
+snapshots.register("skills", ("skills",), json_builder(load_skill_categories, List[SkillCategoryResponse]))
+snapshots.register(
+    "certifications", ("certifications",),
+    json_builder(load_certifications, List[CertificationResponse])
+)
+# Same body as serializing load_portfolio() with PortfolioResponse, built
+# from the section snapshots above
+snapshots.register_composite("portfolio", {
+    "profile": "profile",
+    "education": "education",
+    "experiences": "experience",
+    "projects": "projects",
+    "skill_categories": "skills",
+    "certifications": "certifications",
+})
+snapshots.register(
+    "technologies", ("projects", "experience"),
+    json_builder(load_technology_usage, List[TechnologyUsageResponse])
+)
+
+
+def portfolio_selection_view(selection, tenant_id: int):
+    """Transient snapshot view of a tenant's sparse portfolio selection"""
+    return snapshots.transient_view(
+        tenant_id, f"portfolio:{selection_key(selection)}", selection_resources(selection),
+        lambda: json_builder(lambda db: load_selection(db, selection), selection_schema(selection)),
     )
 
 
+@app.get("/api/portfolio", response_model=PortfolioResponse)
+async def get_portfolio(
+    request: Request,
+    include: Optional[str] = Query(
+        None, description="Comma-separated sections to return, e.g. projects,skills"
+    ),
+    db: Session = Depends(get_db),
+    tenant_id: int = Depends(get_tenant_id)
+):
+    """Whole portfolio; ``fields[section]=a,b`` limits a section to those fields"""
+    fields = {
+        name[len("fields["):-1]: value
+        for name, value in request.query_params.items()
+        if name.startswith("fields[") and name.endswith("]")
+    }
+    try:
+        selection = parse_selection(include, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if selection is None:
+        return await read(request, db, snapshots.serve, "portfolio")
+    return await read(request, db, snapshots.serve_view, portfolio_selection_view(selection, tenant_id))
+
+
+def changes_response(db: Session, request: Request, since: int) -> Response:
+    headers = validators(current_versions(db), ALL_RESOURCES)
+    if is_not_modified(request, headers):
+        return not_modified_response(headers)
+    return Response(content=dumps(load_changes(db, since)), media_type="application/json", headers=headers)
+
+
+@app.get("/api/portfolio/changes", response_model=ChangesResponse)
+async def get_portfolio_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="Content version the client has; 0 for everything"),
+    db: Session = Depends(get_db)
+):
+    return await read(request, db, changes_response, since)
+
+
 @app.get("/api/profile", response_model=ProfileResponse)
-def get_profile(db: Session = Depends(get_db)):
-    profile = db.query(Profile).first()
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-    return profile
+async def get_profile(request: Request, db: Session = Depends(get_db)):
+    return await read(request, db, snapshots.serve, "profile")
 
 
 @app.get("/api/education", response_model=List[EducationResponse])
-def get_education(db: Session = Depends(get_db)):
-    return db.query(Education).all()
+async def get_education(request: Request, db: Session = Depends(get_db)):
+    return await read(request, db, snapshots.serve, "education")
 
 
 @app.get("/api/experience", response_model=List[ExperienceResponse])
-def get_experience(db: Session = Depends(get_db)):
-    return db.query(Experience).all()
+async def get_experience(request: Request, db: Session = Depends(get_db)):
+    return await read(request, db, snapshots.serve, "experience")
+
+
+build_tagged_projects = json_builder(load_projects_with_technologies, List[ProjectResponse])
+
+
+def tagged_projects_response(db: Session, request: Request, tech: List[str], match_all: bool) -> Response:
+    headers = validators(current_versions(db), ("projects",))
+    if is_not_modified(request, headers):
+        return not_modified_response(headers)
+    body = build_tagged_projects(db, tech, match_all)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.get("/api/projects", response_model=List[ProjectResponse])
-def get_projects(db: Session = Depends(get_db)):
-    return db.query(Project).all()
+async def get_projects(
+    request: Request,
+    tech: Optional[List[str]] = Query(None, description="Only projects using these technologies"),
+    match: Literal["all", "any"] = Query("all", description="Require all technologies, or any of them"),
+    db: Session = Depends(get_db)
+):
+    if tech:
+        return await read(request, db, tagged_projects_response, tech, match == "all")
+    return await read(request, db, snapshots.serve, "projects")
+
+
+@app.get("/api/technologies", response_model=List[TechnologyUsageResponse])
+async def get_technologies(request: Request, db: Session = Depends(get_db)):
+    return await read(request, db, snapshots.serve, "technologies")
 
 
 @app.get("/api/skills", response_model=List[SkillCategoryResponse])
-def get_skills(db: Session = Depends(get_db)):
-    return db.query(SkillCategory).all()
+async def get_skills(request: Request, db: Session = Depends(get_db)):
+    return await read(request, db, snapshots.serve, "skills")
 
 
 @app.get("/api/certifications", response_model=List[CertificationResponse])
-def get_certifications(db: Session = Depends(get_db)):
-    return db.query(Certification).all()
+async def get_certifications(request: Request, db: Session = Depends(get_db)):
+    return await read(request, db, snapshots.serve, "certifications")
+
+
+SEARCH_RESOURCES = ("experience", "projects", "skills")
+
+
+def search_response(db: Session, request: Request, q: str, limit: int) -> Response:
+    headers = validators(current_versions(db), SEARCH_RESOURCES)
+    if is_not_modified(request, headers):
+        return not_modified_response(headers)
+    body = dumps({"query": q, "hits": search(db, q, limit)})
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/search", response_model=SearchResponse)
+async def search_portfolio(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    return await read(request, db, search_response, q, limit)
 
 
 @app.post("/api/contact", response_model=ContactMessageResponse)
-def submit_contact(message: ContactMessageCreate, db: Session = Depends(get_db)):
-    # Save to database
-    db_message = ContactMessage(
-        name=message.name,
-        email=message.email,
-        message=message.message,
-        created_at=datetime.now().isoformat()
-    )
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
+async def submit_contact(message: ContactMessageCreate, tenant_id: int = Depends(get_tenant_id)):
+    # Committed together with concurrent submissions, durably, before we answer
+    saved = await get_contact_writer().submit(message, tenant_id)
     
-    # Send email notification
-    try:
-        email_svc = get_email_service()
-        email_svc.send_contact_notification(
-            name=message.name,
-            email=message.email,
-            message=message.message
-        )
-    except Exception as e:
-        # Log error but don't fail the request
-        print(f"Email notification failed: {e}")
+    if get_settings().outbox_worker_enabled:
+        get_outbox_worker().wake()
     
-    return db_message
+    return saved
@@ -0,0 +1,209 @@
+"""
+Metrics
+=======
+In-process counters and histograms exposed in the Prometheus text format at
+``/metrics``.
+
+``MetricsMiddleware`` records per-route latency, request counts by status
+and the number and duration of SQL statements each request executed (from
+the query counter in ``database``). ``EmailService`` and the outbox record
+send durations and outcomes, and ``singleflight`` how many reads were
+coalesced. Observations are a bisect plus a locked increment, cheap enough
+for the hot path.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, Tuple
+
+from database import count_queries, query_observers
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+EMAIL_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+    
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+    
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with labels"""
+    
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+    
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+    
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+    
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+http_db_queries = registry.histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("route",),
+    buckets=QUERY_COUNT_BUCKETS
+)
+http_db_time = registry.histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ("route",)
+)
+db_queries = registry.counter("db_queries_total", "SQL statements executed")
+db_query_time = registry.histogram("db_query_duration_seconds", "SQL statement latency")
+email_sends = registry.counter("email_sends_total", "Email messages by outcome", ("outcome",))
+email_send_time = registry.histogram(
+    "email_send_duration_seconds", "Time to hand email to the transport, per call",
+    ("outcome",), buckets=EMAIL_BUCKETS
+)
+outbox_deliveries = registry.counter(
+    "outbox_deliveries_total", "Outbox delivery attempts by result", ("result",)
+)
+contact_batch_size = registry.histogram(
+    "contact_write_batch_size", "Contact messages committed per group commit",
+    buckets=QUERY_COUNT_BUCKETS
+)
+singleflight_requests = registry.counter(
+    "singleflight_requests_total",
+    "Read requests that computed a response (leader) or shared one in flight (coalesced)",
+    ("route", "role")
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def observe_query(duration: float):
+    db_queries.inc()
+    db_query_time.observe(duration)
+
+
+query_observers.append(observe_query)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and SQL work per route
+    
+    Also reports the request's statement count in the X-Query-Count header.
+    Routes are labelled by their path template, and unmatched paths share one
+    label, so cardinality stays bounded.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status = 500
+        start = time.perf_counter()
+        with count_queries() as counter:
+            async def send_with_metrics(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"x-query-count", str(counter.count).encode())
+                    ]
+                await send(message)
+            
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            finally:
+                elapsed = time.perf_counter() - start
+                route = scope.get("route")
+                route = getattr(route, "path", None) or "unmatched"
+                http_requests.inc(scope["method"], route, str(status))
+                http_latency.observe(elapsed, scope["method"], route)
+                http_db_queries.observe(counter.count, route)
+                http_db_time.observe(counter.duration, route)
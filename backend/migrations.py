@@ -0,0 +1,333 @@
+"""
+Schema Migrations
+=================
+``create_all`` adds missing tables but never changes existing ones or fills
+new tables from existing data. Steps that do are listed in ``MIGRATIONS``,
+in order, and recorded in ``schema_migrations`` once applied, so each runs
+exactly once per database, in the same transaction as its record.
+
+Databases from before multi-tenancy are converted by ``tenant_schema``
+first, since every step works on the current models: their content becomes
+the default tenant's.
+
+``migrate()`` brings a database up to date; the API runs it at startup and
+``seed.py`` before seeding. Workers starting together take turns: the first
+applies the migrations and the others find nothing left to do.
+"""
+
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, Text, bindparam, cast, func, insert, inspect, select, text, type_coerce, update
+from sqlalchemy.engine import Connection
+
+from coherence import get_version_cache
+from database import DEFAULT_TENANT_ID, Base, engine
+from models import (
+    ContactMessage, ContentVersion, Experience, Project, SchemaMigration, Skill, Technology, Tenant,
+    experience_technologies, project_technologies,
+)
+from search import ensure_search_index, reindex, search_index
+from technologies import backfill_technologies, parse_technologies
+from versioning import ALL_RESOURCES, RESET, RESOURCE_BY_TABLE, bump, log_changes
+
+try:
+    import fcntl
+except ImportError:  # Windows; run a single worker there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key of migrate()
+MIGRATION_LOCK_KEY = 7_361_022
+
+# Time of contact messages stored without one
+EPOCH = datetime(1970, 1, 1)
+
+
+def _text_list(value) -> list:
+    """A legacy highlights value (JSON array text, or a single plain string) as a list"""
+    if not value:
+        return []
+    try:
+        decoded = json.loads(value)
+    except ValueError:
+        return [value]
+    return [str(v) for v in decoded] if isinstance(decoded, list) else [value]
+
+
+def json_list_columns(conn):
+    """
+    Store technologies and highlights as JSON lists
+
+    Comma-separated technologies and JSON-encoded highlight strings are
+    rewritten as JSON arrays (NULL becomes ``[]``). On PostgreSQL the
+    columns are also converted to the ``json`` type; SQLite stores JSON as
+    text and needs no schema change.
+    """
+    columns = [
+        (Project.__table__.c.technologies, parse_technologies),
+        (Project.__table__.c.highlights, _text_list),
+        (Experience.__table__.c.technologies, parse_technologies),
+    ]
+    for column, decode in columns:
+        table = column.table
+        rows = conn.execute(select(table.c.id, type_coerce(column, Text))).all()
+        if rows:
+            conn.execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values({column.name: type_coerce(bindparam("value"), Text)}),
+                [
+                    {"row_id": row_id, "value": json.dumps(decode(value), ensure_ascii=False)}
+                    for row_id, value in rows
+                ],
+            )
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ALTER COLUMN {column.name} "
+                f"TYPE JSON USING {column.name}::json"
+            ))
+    # Cached responses have the old string format
+    bump(conn, ["experience", "projects"])
+
+
+def content_change_log(conn):
+    """Start the change log with a reset of every content table"""
+    version = bump(conn, ALL_RESOURCES)
+    log_changes(conn, version, {(table, None): RESET for table in RESOURCE_BY_TABLE})
+
+
+def row_versions(conn):
+    """Add the ``row_version`` column to content tables created without it"""
+    for table in Base.metadata.sorted_tables:
+        if "row_version" not in table.c:
+            continue
+        columns = {column["name"] for column in inspect(conn).get_columns(table.name)}
+        if "row_version" not in columns:
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1"
+            ))
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def tenant_schema(conn: Connection):
+    """
+    Add tenants to a database created without them, and make sure the default tenant exists
+    
+    Content tables get ``tenant_id`` (existing rows belong to the default
+    tenant) and their tenant indexes. Tables whose keys change are rebuilt:
+    ``content_versions`` keeps its rows, while the technology tags and the
+    search index are derived and are built again from the content.
+    """
+    if conn.execute(select(Tenant.id).where(Tenant.id == DEFAULT_TENANT_ID)).first() is None:
+        conn.execute(insert(Tenant.__table__), {
+            "id": DEFAULT_TENANT_ID, "slug": "default", "name": "Default",
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        })
+    # Content tables have existed from the start, and create_all only adds new ones
+    if "tenant_id" in _columns(conn, Project.__tablename__):
+        return
+    logger.info("Adding tenants to the schema")
+    
+    versions = []
+    if "tenant_id" not in _columns(conn, ContentVersion.__tablename__):
+        table = ContentVersion.__table__
+        versions = [dict(row) for row in conn.execute(
+            select(table.c.resource, table.c.version, table.c.updated_at)
+        ).mappings()]
+        ContentVersion.__table__.drop(conn)
+    if "tenant_id" not in _columns(conn, Technology.__tablename__):
+        for table in (project_technologies, experience_technologies, Technology.__table__):
+            table.drop(conn)
+    if inspect(conn).has_table(search_index.name):
+        conn.execute(text(f"DROP TABLE {search_index.name}"))
+    
+    for table in Base.metadata.sorted_tables:
+        if "tenant_id" in table.c and inspect(conn).has_table(table.name) \
+                and "tenant_id" not in _columns(conn, table.name):
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN tenant_id INTEGER NOT NULL DEFAULT {DEFAULT_TENANT_ID}"
+            ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_content_changes_version"))
+    Base.metadata.create_all(bind=conn)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    
+    if versions:
+        conn.execute(insert(ContentVersion.__table__), versions)
+    backfill_technologies(conn)
+
+
+def _timestamp(value) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return EPOCH
+
+
+def contact_timestamps(conn: Connection):
+    """
+    Store contact message times as timestamps, indexed for keyset pages
+
+    ``created_at`` held ``isoformat()`` text, which SQLite's datetime format
+    does not compare with correctly; rows without a time sort as the oldest.
+    """
+    table = ContactMessage.__table__
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(
+            "ALTER TABLE contact_messages ALTER COLUMN created_at "
+            "TYPE TIMESTAMP USING created_at::timestamp"
+        ))
+        conn.execute(update(table).where(table.c.created_at.is_(None)).values(created_at=EPOCH))
+        conn.execute(text("ALTER TABLE contact_messages ALTER COLUMN created_at SET NOT NULL"))
+    else:
+        rows = conn.execute(select(table.c.id, type_coerce(table.c.created_at, Text))).all()
+        if rows:
+            conn.execute(
+                update(table).where(table.c.id == bindparam("row_id"))
+                .values(created_at=bindparam("value", type_=table.c.created_at.type)),
+                [{"row_id": row_id, "value": _timestamp(value)} for row_id, value in rows],
+            )
+    conn.execute(text("DROP INDEX IF EXISTS ix_contact_messages_tenant_id"))
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def search_list_text(conn: Connection):
+    """Re-index projects, whose highlights were indexed as JSON text"""
+    if inspect(conn).has_table(search_index.name):
+        reindex(conn, "projects")
+
+
+def required_columns(conn: Connection):
+    """
+    Fill the NULLs of columns the API always returns a value for
+
+    List columns hold ``[]`` instead of SQL or JSON ``null``, which the
+    serializers cannot iterate; flags and proficiencies get their defaults.
+    The columns become NOT NULL on PostgreSQL; on SQLite the admin API
+    rejects nulls. Each tenant whose rows were filled gets new versions of
+    those resources.
+    """
+    # Resources whose rows were filled, by tenant
+    filled = {}
+    for column, value in [
+        (Project.__table__.c.technologies, []),
+        (Project.__table__.c.highlights, []),
+        (Experience.__table__.c.technologies, []),
+        (Project.__table__.c.is_featured, 0),
+        (Skill.__table__.c.proficiency, 80),
+    ]:
+        table = column.table
+        missing = column.is_(None)
+        if isinstance(column.type, JSON):
+            missing = missing | (cast(column, Text) == "null")
+        for tenant_id in conn.scalars(select(table.c.tenant_id).where(missing).distinct()):
+            filled.setdefault(tenant_id, set()).add(RESOURCE_BY_TABLE[table.name])
+        conn.execute(update(table).where(missing).values({column.name: value}))
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN {column.name} SET NOT NULL"))
+    for tenant_id, resources in filled.items():
+        bump(conn, sorted(resources), tenant_id)
+
+
+def cascade_technology_links(conn: Connection):
+    """
+    Delete the technology tags of a deleted project or experience with it
+
+    The technology index removes them after the row's DELETE, which
+    PostgreSQL rejects while the tags still reference the row. SQLite does
+    not enforce these foreign keys and needs no change.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for table in (project_technologies, experience_technologies):
+        for key in inspect(conn).get_foreign_keys(table.name):
+            if key["referred_table"] == "technologies":
+                continue
+            column, = key["constrained_columns"]
+            conn.execute(text(f"ALTER TABLE {table.name} DROP CONSTRAINT {key['name']}"))
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ADD CONSTRAINT {key['name']} FOREIGN KEY ({column}) "
+                f"REFERENCES {key['referred_table']} (id) ON DELETE CASCADE"
+            ))
+
+
+def tenant_admin_tokens(conn: Connection):
+    """Add the ``admin_token_hash`` column to tenants created without it"""
+    if "admin_token_hash" not in _columns(conn, Tenant.__tablename__):
+        conn.execute(text("ALTER TABLE tenants ADD COLUMN admin_token_hash VARCHAR(64)"))
+
+
+# (id, step) pairs; a step receives the migrating connection. Never reorder
+# or rename applied steps, only append new ones.
+MIGRATIONS = [
+    ("0001_technology_index", backfill_technologies),
+    ("0002_json_list_columns", json_list_columns),
+    ("0003_content_change_log", content_change_log),
+    ("0004_row_versions", row_versions),
+    ("0005_contact_timestamps", contact_timestamps),
+    ("0006_search_list_text", search_list_text),
+    ("0007_required_columns", required_columns),
+    ("0008_cascade_technology_links", cascade_technology_links),
+    ("0009_tenant_admin_tokens", tenant_admin_tokens),
+]
+
+
+@contextmanager
+def migration_lock(bind):
+    """Hold a lock that only one process migrating the database can have"""
+    if bind.dialect.name == "postgresql":
+        with bind.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                conn.commit()
+    elif bind.dialect.name == "sqlite" and bind.url.database not in (None, "", ":memory:") and fcntl:
+        with open(f"{bind.url.database}-migrate.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+
+def migrate(bind=engine) -> list:
+    """
+    Create missing tables and apply pending migrations
+
+    Returns:
+        list: Ids of the migrations applied now
+    """
+    applied_now = []
+    with migration_lock(bind):
+        Base.metadata.create_all(bind=bind)
+        with bind.begin() as conn:
+            tenant_schema(conn)
+            ensure_search_index(conn)
+            applied = set(conn.scalars(select(SchemaMigration.id)))
+            for migration_id, step in MIGRATIONS:
+                if migration_id in applied:
+                    continue
+                logger.info("Applying migration %s", migration_id)
+                step(conn)
+                conn.execute(insert(SchemaMigration.__table__), {
+                    "id": migration_id,
+                    "applied_at": datetime.now(timezone.utc).replace(tzinfo=None),
+                })
+                applied_now.append(migration_id)
+            version = conn.execute(select(func.max(ContentVersion.version))).scalar() or 0
+    # Migrations bump versions outside the session hooks; tell running workers
+    get_version_cache().publish(version)
+    return applied_now
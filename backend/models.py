@@ -1,9 +1,21 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, JSON, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
-from database import Base
+from database import Base, TenantScoped
 
 
-class Profile(Base):
+class Tenant(Base):
+    """A hosted portfolio, reached by ``/t/<slug>/...`` or by its own host name"""
+    __tablename__ = "tenants"
+    
+    id = Column(Integer, primary_key=True)
+    slug = Column(String(100), nullable=False, unique=True)
+    name = Column(String(200))
+    host = Column(String(255), unique=True)  # e.g. portfolio.example.com
+    admin_token_hash = Column(String(64))  # SHA-256 of the tenant's admin token, see ``admin``
+    created_at = Column(DateTime)
+
+
+class Profile(TenantScoped, Base):
     __tablename__ = "profile"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -16,9 +28,13 @@ class Profile(Base):
     linkedin = Column(String(200))
     github = Column(String(200))
     leetcode = Column(String(200))
+    
+    __table_args__ = (
+        Index("ix_profile_tenant_id", "tenant_id"),
+    )
 
 
-class Education(Base):
+class Education(TenantScoped, Base):
     __tablename__ = "education"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -28,9 +44,47 @@ class Education(Base):
     start_year = Column(String(10))
     end_year = Column(String(10))
     location = Column(String(100))
+    # Optimistic concurrency: ORM updates check and increment it
+    row_version = Column(Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {"version_id_col": row_version}
+    __table_args__ = (
+        Index("ix_education_tenant_id", "tenant_id", "id"),
+    )
+
+
+# Technology tags of projects and experiences, derived from their
+# ``technologies`` lists by ``technologies.py``. The derived index drops a
+# deleted row's tags only after the row's DELETE, so the database drops them
+# first (ON DELETE CASCADE)
+project_technologies = Table(
+    "project_technologies", Base.metadata,
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+    Column("technology_id", Integer, ForeignKey("technologies.id"), primary_key=True),
+    Index("ix_project_technologies_technology_id", "technology_id", "project_id"),
+)
+
+experience_technologies = Table(
+    "experience_technologies", Base.metadata,
+    Column("experience_id", Integer, ForeignKey("experience.id", ondelete="CASCADE"), primary_key=True),
+    Column("technology_id", Integer, ForeignKey("technologies.id"), primary_key=True),
+    Index("ix_experience_technologies_technology_id", "technology_id", "experience_id"),
+)
+
+
+class Technology(TenantScoped, Base):
+    __tablename__ = "technologies"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    slug = Column(String(100), nullable=False)  # Case-insensitive lookup key, unique per tenant
+    
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "slug", name="uq_technologies_tenant_slug"),
+    )
 
 
-class Experience(Base):
+class Experience(TenantScoped, Base):
     __tablename__ = "experience"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -40,52 +94,90 @@ class Experience(Base):
     start_date = Column(String(20))
     end_date = Column(String(20))
     description = Column(Text)
-    responsibilities = relationship("Responsibility", back_populates="experience")
-    technologies = Column(Text)  # Comma-separated
+    responsibilities = relationship(
+        "Responsibility", back_populates="experience", order_by="Responsibility.id"
+    )
+    technologies = Column(JSON, nullable=False, default=list)  # List of names
+    technology_tags = relationship(
+        "Technology", secondary=experience_technologies, viewonly=True, order_by="Technology.name"
+    )
+    row_version = Column(Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {"version_id_col": row_version}
+    __table_args__ = (
+        Index("ix_experience_tenant_id", "tenant_id", "id"),
+    )
 
 
-class Responsibility(Base):
+class Responsibility(TenantScoped, Base):
     __tablename__ = "responsibilities"
     
     id = Column(Integer, primary_key=True, index=True)
     experience_id = Column(Integer, ForeignKey("experience.id"))
     description = Column(Text, nullable=False)
     experience = relationship("Experience", back_populates="responsibilities")
+    row_version = Column(Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {"version_id_col": row_version}
+    __table_args__ = (
+        Index("ix_responsibilities_tenant_id", "tenant_id", "experience_id"),
+    )
 
 
-class Project(Base):
+class Project(TenantScoped, Base):
     __tablename__ = "projects"
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text)
-    technologies = Column(Text)  # Comma-separated
-    highlights = Column(Text)  # JSON array as string
+    technologies = Column(JSON, nullable=False, default=list)  # List of names
+    highlights = Column(JSON, nullable=False, default=list)  # List of strings
     link = Column(String(300))
     github = Column(String(300))
-    is_featured = Column(Integer, default=0)
+    is_featured = Column(Integer, nullable=False, default=0)
+    technology_tags = relationship(
+        "Technology", secondary=project_technologies, viewonly=True, order_by="Technology.name"
+    )
+    row_version = Column(Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {"version_id_col": row_version}
+    __table_args__ = (
+        Index("ix_projects_tenant_id", "tenant_id", "id"),
+    )
 
 
-class SkillCategory(Base):
+class SkillCategory(TenantScoped, Base):
     __tablename__ = "skill_categories"
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     icon = Column(String(50))
-    skills = relationship("Skill", back_populates="category")
+    skills = relationship("Skill", back_populates="category", order_by="Skill.id")
+    row_version = Column(Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {"version_id_col": row_version}
+    __table_args__ = (
+        Index("ix_skill_categories_tenant_id", "tenant_id", "id"),
+    )
 
 
-class Skill(Base):
+class Skill(TenantScoped, Base):
     __tablename__ = "skills"
     
     id = Column(Integer, primary_key=True, index=True)
     category_id = Column(Integer, ForeignKey("skill_categories.id"))
     name = Column(String(100), nullable=False)
-    proficiency = Column(Integer, default=80)  # 0-100
+    proficiency = Column(Integer, nullable=False, default=80)  # 0-100
     category = relationship("SkillCategory", back_populates="skills")
+    row_version = Column(Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {"version_id_col": row_version}
+    __table_args__ = (
+        Index("ix_skills_tenant_id", "tenant_id", "category_id"),
+    )
 
 
-class Certification(Base):
+class Certification(TenantScoped, Base):
     __tablename__ = "certifications"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -93,13 +185,84 @@ class Certification(Base):
     issuer = Column(String(200), nullable=False)
     date = Column(String(20))
     link = Column(String(300))
+    row_version = Column(Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {"version_id_col": row_version}
+    __table_args__ = (
+        Index("ix_certifications_tenant_id", "tenant_id", "id"),
+    )
 
 
-class ContactMessage(Base):
+class ContactMessage(TenantScoped, Base):
     __tablename__ = "contact_messages"
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     email = Column(String(100), nullable=False)
     message = Column(Text, nullable=False)
-    created_at = Column(String(50))
+    created_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        # Newest-first listing and export pages (keyset on created_at, id)
+        Index("ix_contact_messages_tenant_created", "tenant_id", "created_at", "id"),
+    )
+
+
+class EmailOutbox(Base):
+    """Pending notification email for a contact message, delivered by ``outbox``"""
+    __tablename__ = "email_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    contact_message_id = Column(Integer, ForeignKey("contact_messages.id"), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, sending, sent, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime)
+    contact_message = relationship("ContactMessage")
+    
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+
+class SchemaMigration(Base):
+    """Data migration applied to this database, see ``migrations.py``"""
+    __tablename__ = "schema_migrations"
+    
+    id = Column(String(100), primary_key=True)
+    applied_at = Column(DateTime, nullable=False)
+
+
+class ContentVersion(Base):
+    """Version stamp of a tenant's content resource, bumped on every committed change"""
+    __tablename__ = "content_versions"
+    
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), primary_key=True, server_default="1")
+    resource = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
+
+class ContentVersionCounter(Base):
+    """The last content version handed out, in a single row"""
+    __tablename__ = "content_version_counter"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+
+
+class ContentChange(TenantScoped, Base):
+    """A content row changed at ``version``; ``reset`` means any row of the table may have"""
+    __tablename__ = "content_changes"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer)  # None for reset
+    operation = Column(String(10), nullable=False)  # upsert, delete, reset
+    
+    __table_args__ = (
+        Index("ix_content_changes_tenant_version", "tenant_id", "version"),
+    )
@@ -0,0 +1,247 @@
+"""
+Email Outbox
+============
+Contact notifications are queued in the ``email_outbox`` table in the same
+transaction as the contact message and delivered by a background worker,
+so POST /api/contact never waits on SMTP.
+
+Due entries are sent as one batch over a single SMTP session. Failed
+deliveries are retried with exponential backoff; after
+``OUTBOX_MAX_ATTEMPTS`` failures an entry is dead-lettered (status ``dead``)
+and kept for inspection. Entries are claimed with a conditional UPDATE and a
+lease, so several workers can share the table and a crashed worker's claims
+are picked up again once the lease expires.
+
+Run ``python outbox.py`` to deliver from a standalone process.
+"""
+
+import logging
+import random
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, joinedload
+
+import metrics
+from database import SessionLocal
+from models import ContactMessage, EmailOutbox
+from settings import get_settings
+
+if TYPE_CHECKING:
+    from email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue_contact_notification(db: Session, message: ContactMessage) -> EmailOutbox:
+    """Queue the notification for ``message``; committed with the caller's transaction"""
+    now = utcnow()
+    entry = EmailOutbox(
+        contact_message=message,
+        status="pending",
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    )
+    db.add(entry)
+    return entry
+
+
+def notifications_enabled() -> bool:
+    """
+    Whether contact notifications should be queued at all
+    
+    Entries queued without email credentials would never be delivered, and
+    retention keeps the messages of undelivered entries. With the worker
+    disabled delivery is left to a standalone ``python outbox.py``, which
+    has credentials of its own.
+    """
+    if not get_settings().outbox_worker_enabled:
+        return True
+    from email_service import get_email_service
+    return get_email_service().is_configured
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt, after ``attempts`` failures"""
+    settings = get_settings()
+    delay = min(
+        settings.outbox_retry_max_delay,
+        settings.outbox_retry_base_delay * 2 ** (attempts - 1),
+    )
+    # Jitter keeps retries of a burst from hitting the server in lockstep
+    return delay * random.uniform(0.8, 1.0)
+
+
+def claim_due(db: Session, now: datetime, limit: int) -> list:
+    """Claim up to ``limit`` entries that are due, returning their ids"""
+    settings = get_settings()
+    due = db.execute(
+        select(EmailOutbox.id)
+        .where(
+            EmailOutbox.status.in_(("pending", "sending")),
+            EmailOutbox.next_attempt_at <= now,
+        )
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(limit)
+    ).scalars().all()
+    
+    claimed = []
+    lease_until = now + timedelta(seconds=settings.outbox_lease)
+    for entry_id in due:
+        result = db.execute(
+            update(EmailOutbox)
+            .where(
+                EmailOutbox.id == entry_id,
+                EmailOutbox.status.in_(("pending", "sending")),
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .values(status="sending", next_attempt_at=lease_until)
+        )
+        if result.rowcount == 1:
+            claimed.append(entry_id)
+    db.commit()
+    return claimed
+
+
+def record_outcome(entry: EmailOutbox, error: Optional[Exception]):
+    """Mark ``entry`` sent, schedule a retry or dead-letter it"""
+    settings = get_settings()
+    entry.attempts += 1
+    if error is None:
+        entry.status = "sent"
+        entry.sent_at = utcnow()
+        entry.last_error = None
+        metrics.outbox_deliveries.inc("sent")
+    elif entry.attempts >= settings.outbox_max_attempts:
+        entry.status = "dead"
+        entry.last_error = str(error)
+        metrics.outbox_deliveries.inc("dead")
+        logger.error(
+            f"Giving up on notification for contact message {entry.contact_message_id} "
+            f"after {entry.attempts} attempts: {error}"
+        )
+    else:
+        entry.status = "pending"
+        entry.last_error = str(error)
+        metrics.outbox_deliveries.inc("retry")
+        entry.next_attempt_at = utcnow() + timedelta(seconds=retry_delay(entry.attempts))
+        logger.warning(
+            f"Notification for contact message {entry.contact_message_id} failed, will retry: {error}"
+        )
+
+
+def deliver_due(email_service: Optional["EmailService"] = None, limit: Optional[int] = None) -> int:
+    """
+    Deliver the entries that are due, as one batch over a single SMTP session
+    
+    Returns:
+        int: Number of entries attempted
+    """
+    if email_service is None:
+        # The email stack is imported on first delivery, off the startup path
+        from email_service import get_email_service
+        email_service = get_email_service()
+    if not email_service.is_configured:
+        return 0
+    limit = limit or get_settings().outbox_batch_size
+    
+    db = SessionLocal()
+    try:
+        claimed = claim_due(db, utcnow(), limit)
+        if not claimed:
+            return 0
+        entries = (
+            db.query(EmailOutbox)
+            .options(joinedload(EmailOutbox.contact_message))
+            .filter(EmailOutbox.id.in_(claimed))
+            .order_by(EmailOutbox.id)
+            .all()
+        )
+        try:
+            errors = email_service.deliver_contact_notifications([
+                (m.name, m.email, m.message, m.created_at)
+                for m in (e.contact_message for e in entries)
+            ])
+        except Exception as e:
+            errors = [e] * len(entries)
+        for entry, error in zip(entries, errors):
+            record_outcome(entry, error)
+        db.commit()
+        return len(entries)
+    finally:
+        db.close()
+
+
+class OutboxWorker:
+    """Background thread that delivers the outbox"""
+    
+    def __init__(self, email_service: Optional["EmailService"] = None):
+        self.email_service = email_service
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if self._thread is None:
+            # A worker can be started again after stop()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self.run, name="email-outbox", daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout: float = 10):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # Release the persistent SMTP session, if email was ever used
+        email_service = self.email_service
+        if email_service is None and "email_service" in sys.modules:
+            email_service = sys.modules["email_service"].email_service
+        if email_service is not None:
+            email_service.close()
+    
+    def wake(self):
+        """Deliver now instead of waiting for the next poll"""
+        self._wakeup.set()
+    
+    def run(self):
+        """Deliver until stopped"""
+        settings = get_settings()
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                attempted = deliver_due(self.email_service)
+            except Exception as e:
+                logger.error(f"Outbox delivery failed: {e}")
+                attempted = 0
+            # A full batch means more may be due right away
+            if attempted < settings.outbox_batch_size:
+                self._wakeup.wait(settings.outbox_poll_interval)
+
+
+# Global worker instance
+outbox_worker = None
+
+def get_outbox_worker() -> OutboxWorker:
+    """Get or create outbox worker instance"""
+    global outbox_worker
+    if outbox_worker is None:
+        outbox_worker = OutboxWorker()
+    return outbox_worker
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=get_settings().log_level)
+    try:
+        get_outbox_worker().run()
+    except KeyboardInterrupt:
+        pass
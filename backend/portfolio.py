@@ -0,0 +1,198 @@
+"""
+Portfolio Assembly
+==================
+Loads the portfolio object graph with eager loading so that serializing it
+never triggers lazy loads. The number of queries is fixed regardless of how
+many experiences, responsibilities, categories or skills exist.
+
+Every loader takes an optional list of ``fields``: only those columns are
+read, and a relationship (responsibilities, skills) is loaded only when it
+is one of them. ``/api/portfolio?include=...&fields[section]=...`` uses this
+to serve sparse selections, see ``parse_selection``.
+"""
+
+from copy import copy
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import create_model
+from sqlalchemy.orm import Session, load_only, selectinload
+
+from models import (
+    Profile, Education, Experience, Project,
+    SkillCategory, Certification
+)
+from schemas import PortfolioResponse
+
+
+def _options(model, fields: Optional[Iterable[str]], relationships: Tuple[str, ...] = ()) -> list:
+    """Loader options reading only ``fields``; selected ``relationships`` are eager loaded"""
+    if fields is None:
+        return [selectinload(getattr(model, name)) for name in relationships]
+    columns = [getattr(model, name) for name in fields if name not in relationships]
+    options = [load_only(*columns or [model.id])]
+    options.extend(selectinload(getattr(model, name)) for name in relationships if name in fields)
+    return options
+
+
+def load_profile(db: Session, fields: Optional[List[str]] = None):
+    return db.query(Profile).options(*_options(Profile, fields)).order_by(Profile.id).first()
+
+
+def load_education(db: Session, fields: Optional[List[str]] = None):
+    return db.query(Education).options(*_options(Education, fields)).order_by(Education.id).all()
+
+
+def load_experiences(db: Session, fields: Optional[List[str]] = None):
+    """Experiences with their responsibilities (2 queries)"""
+    return (
+        db.query(Experience)
+        .options(*_options(Experience, fields, ("responsibilities",)))
+        .order_by(Experience.id)
+        .all()
+    )
+
+
+def load_projects(db: Session, fields: Optional[List[str]] = None):
+    return db.query(Project).options(*_options(Project, fields)).order_by(Project.id).all()
+
+
+def load_skill_categories(db: Session, fields: Optional[List[str]] = None):
+    """Skill categories with their skills (2 queries)"""
+    return (
+        db.query(SkillCategory)
+        .options(*_options(SkillCategory, fields, ("skills",)))
+        .order_by(SkillCategory.id)
+        .all()
+    )
+
+
+def load_certifications(db: Session, fields: Optional[List[str]] = None):
+    return db.query(Certification).options(*_options(Certification, fields)).order_by(Certification.id).all()
+
+
+def load_portfolio(db: Session) -> dict:
+    """
+    Load every portfolio section in a fixed number of queries (8)
+
+    Returns:
+        dict: Keyword arguments for ``PortfolioResponse``
+    """
+    return {
+        "profile": load_profile(db),
+        "education": load_education(db),
+        "experiences": load_experiences(db),
+        "projects": load_projects(db),
+        "skill_categories": load_skill_categories(db),
+        "certifications": load_certifications(db),
+    }
+
+
+# Portfolio sections: response key -> (loader, content resource)
+SECTIONS = {
+    "profile": (load_profile, "profile"),
+    "education": (load_education, "education"),
+    "experiences": (load_experiences, "experience"),
+    "projects": (load_projects, "projects"),
+    "skill_categories": (load_skill_categories, "skills"),
+    "certifications": (load_certifications, "certifications"),
+}
+
+# Accepted alternative section names, matching the per-section endpoints
+SECTION_ALIASES = {"experience": "experiences", "skills": "skill_categories"}
+
+# A selection: ((section, fields or None for all), ...) in response order
+Selection = Tuple[Tuple[str, Optional[Tuple[str, ...]]], ...]
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _section_schema(section: str):
+    """Response schema of one item of ``section``"""
+    annotation = PortfolioResponse.model_fields[section].annotation
+    return getattr(annotation, "__args__", (annotation,))[0]
+
+
+def parse_selection(include: Optional[str], fields: Dict[str, str]) -> Optional[Selection]:
+    """
+    Normalize ``?include=`` and ``?fields[section]=`` parameters
+
+    Args:
+        include: Comma-separated sections; all sections when omitted
+        fields: Section name -> comma-separated fields of that section
+
+    Returns:
+        Selection or None when the whole portfolio is requested
+
+    Raises:
+        ValueError: On unknown sections or fields
+    """
+    if include is None and not fields:
+        return None
+
+    def section_name(name: str) -> str:
+        section = SECTION_ALIASES.get(name, name)
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown portfolio section: {name}")
+        return section
+
+    sections = set(map(section_name, _split(include))) if include is not None else set(SECTIONS)
+    selected_fields = {}
+    for name, value in fields.items():
+        section = section_name(name)
+        known = _section_schema(section).model_fields
+        requested = set(_split(value))
+        unknown = requested.difference(known)
+        if unknown:
+            raise ValueError(f"Unknown {section} fields: {', '.join(sorted(unknown))}")
+        # ids are always returned so that items can be told apart
+        selected_fields[section] = tuple(f for f in known if f in requested or f == "id")
+    return tuple(
+        (section, selected_fields.get(section)) for section in SECTIONS if section in sections
+    )
+
+
+def selection_key(selection: Selection) -> str:
+    """Stable name of ``selection``, e.g. ``projects(id,title);skill_categories``"""
+    return ";".join(
+        section if fields is None else f"{section}({','.join(fields)})"
+        for section, fields in selection
+    )
+
+
+def selection_resources(selection: Selection) -> Tuple[str, ...]:
+    return tuple(sorted({SECTIONS[section][1] for section, _ in selection}))
+
+
+@lru_cache(maxsize=256)
+def selection_schema(selection: Selection):
+    """
+    Response model containing only the selected sections and fields
+
+    Fields are copied from the full schemas: ``create_model`` takes ownership
+    of the ``FieldInfo`` it is given and would otherwise retype them in place.
+    """
+    sections = {}
+    for section, fields in selection:
+        annotation = PortfolioResponse.model_fields[section].annotation
+        if fields is not None:
+            schema = _section_schema(section)
+            item = create_model(
+                f"{schema.__name__}Fields",
+                __config__=schema.model_config,
+                **{name: (schema.model_fields[name].annotation, copy(schema.model_fields[name]))
+                   for name in fields},
+            )
+            annotation = Optional[item] if section == "profile" else List[item]
+        sections[section] = (annotation, copy(PortfolioResponse.model_fields[section]))
+    return create_model("PortfolioSelection", **sections)
+
+
+def load_selection(db: Session, selection: Selection) -> dict:
+    """Load the sections of ``selection``, reading only the selected columns"""
+    return {
+        section: SECTIONS[section][0](db, list(fields) if fields is not None else None)
+        for section, fields in selection
+    }
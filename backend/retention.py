@@ -0,0 +1,376 @@
+"""
+Contact Message Retention
+=========================
+Contact messages older than ``CONTACT_RETENTION_DAYS`` leave the hot
+database, which then stays small: its page cache holds the content tables
+rather than years of old messages, and backups copy less.
+
+A run goes through every tenant's old messages oldest first, in batches of
+``CONTACT_RETENTION_BATCH`` read from the ``(tenant_id, created_at, id)``
+index. Each batch is written to the archive and made durable there, then
+deleted (with its delivered notification entries) in its own short
+transaction, so contact submissions never wait long behind a run. Messages
+whose notification is still being delivered stay until a later run.
+
+The archive (``CONTACT_ARCHIVE``) is either a directory, getting one
+gzip-compressed NDJSON file per tenant and run (one gzip member per batch,
+so the file is complete after every batch), or a database URL, getting a
+``contact_messages_archive`` table. A crash between archiving and deleting
+a batch archives it again on the next run: the table keeps one copy, the
+files may repeat those rows.
+
+On SQLite the run ends by returning up to ``SQLITE_VACUUM_PAGES`` free
+pages to the file system with an incremental vacuum. Database files
+created before incremental auto-vacuum need one full ``VACUUM`` first
+(``python retention.py --vacuum``), which blocks writers while it runs.
+
+The API runs retention every ``CONTACT_RETENTION_INTERVAL`` seconds when
+``CONTACT_RETENTION_DAYS`` is set; one process at a time does the work.
+
+Usage:
+    python retention.py [--days N] [--dry-run]
+    python retention.py --vacuum
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, Text, create_engine, delete, func,
+    insert, select, text
+)
+
+from contact_messages import EXPORT_COLUMNS, keyset_after
+from database import SQLITE_PATH, SessionLocal, engine
+from models import ContactMessage, EmailOutbox, Tenant
+from serializers import dumps
+from settings import get_settings, normalize_database_url
+
+try:
+    import fcntl
+except ImportError:  # Windows; run a single worker there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_lock key of a retention run
+RETENTION_LOCK_KEY = 7_361_025
+
+# Notifications still to be delivered keep their message in the hot database
+UNDELIVERED = ("pending", "sending")
+
+ARCHIVE_COLUMNS = ("tenant_id",) + EXPORT_COLUMNS
+
+_archive_metadata = MetaData()
+archived_contact_messages = Table(
+    "contact_messages_archive", _archive_metadata,
+    Column("tenant_id", Integer, primary_key=True),
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("created_at", DateTime, nullable=False, index=True),
+    Column("name", String(100), nullable=False),
+    Column("email", String(100), nullable=False),
+    Column("message", Text, nullable=False),
+    Column("archived_at", DateTime, nullable=False),
+)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class FileArchive:
+    """Archived messages as ``.ndjson.gz`` files in a directory"""
+    
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.run = utcnow().strftime("%Y%m%dT%H%M%S")
+    
+    def path(self, tenant_id: int) -> Path:
+        return self.directory / f"contact_messages-tenant{tenant_id}-{self.run}.ndjson.gz"
+    
+    def write(self, tenant_id: int, rows: List[dict]):
+        """Append ``rows`` as a gzip member, on disk before returning"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(tenant_id)
+        created = not path.exists()
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+                archive.write(b"".join(
+                    dumps({**row, "created_at": row["created_at"].isoformat()}) + b"\n" for row in rows
+                ))
+            raw.flush()
+            os.fsync(raw.fileno())
+        if created and hasattr(os, "O_DIRECTORY"):
+            # Make the new directory entry durable too
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    
+    def close(self):
+        pass
+
+
+class DatabaseArchive:
+    """Archived messages in the ``contact_messages_archive`` table of another database"""
+    
+    def __init__(self, url: str):
+        self.engine = create_engine(normalize_database_url(url))
+        _archive_metadata.create_all(bind=self.engine)
+    
+    def write(self, tenant_id: int, rows: List[dict]):
+        """Insert ``rows``, replacing copies from an interrupted run"""
+        table = archived_contact_messages
+        archived_at = utcnow()
+        with self.engine.begin() as conn:
+            conn.execute(delete(table).where(
+                table.c.tenant_id == tenant_id, table.c.id.in_([row["id"] for row in rows])
+            ))
+            conn.execute(insert(table), [{**row, "archived_at": archived_at} for row in rows])
+    
+    def close(self):
+        self.engine.dispose()
+
+
+def open_archive(location: str):
+    """The archive at ``location``: a database URL, or else a directory"""
+    if "://" in location:
+        return DatabaseArchive(location)
+    return FileArchive(location)
+
+
+def _expired(tenant_id: int, cutoff: datetime):
+    """A tenant's messages created before ``cutoff`` that may leave, oldest first"""
+    undelivered = select(EmailOutbox.contact_message_id).where(EmailOutbox.status.in_(UNDELIVERED))
+    return (
+        select(*(getattr(ContactMessage, name) for name in ARCHIVE_COLUMNS))
+        .where(
+            ContactMessage.tenant_id == tenant_id,
+            ContactMessage.created_at < cutoff,
+            ContactMessage.id.not_in(undelivered),
+        )
+        .order_by(ContactMessage.created_at, ContactMessage.id)
+    )
+
+
+def expire_tenant(archive, tenant_id: int, cutoff: datetime, batch_size: int) -> int:
+    """Archive and delete a tenant's messages created before ``cutoff``; returns how many"""
+    moved = 0
+    cursor = None
+    while True:
+        query = _expired(tenant_id, cutoff)
+        if cursor is not None:
+            query = keyset_after(query, cursor, newest_first=False)
+        db = SessionLocal()
+        try:
+            rows = [row._asdict() for row in db.execute(query.limit(batch_size))]
+            # End the read before archiving: a SQLite read transaction
+            # cannot become a write once another writer has committed
+            db.rollback()
+            if not rows:
+                return moved
+            archive.write(tenant_id, rows)
+            ids = [row["id"] for row in rows]
+            # Only delivered or dead notifications are left for these messages
+            db.execute(delete(EmailOutbox).where(EmailOutbox.contact_message_id.in_(ids)))
+            db.execute(delete(ContactMessage).where(ContactMessage.id.in_(ids)))
+            db.commit()
+        finally:
+            db.close()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            return moved
+        cursor = (rows[-1]["created_at"], rows[-1]["id"])
+
+
+def count_expired(cutoff: datetime) -> Dict[int, int]:
+    """Messages a run would move now, by tenant"""
+    db = SessionLocal()
+    try:
+        tenant_ids = db.scalars(select(Tenant.id).order_by(Tenant.id)).all()
+        counts = {
+            tenant_id: db.execute(
+                select(func.count()).select_from(_expired(tenant_id, cutoff).subquery())
+            ).scalar_one()
+            for tenant_id in tenant_ids
+        }
+    finally:
+        db.close()
+    return {tenant_id: n for tenant_id, n in counts.items() if n}
+
+
+def incremental_vacuum(bind=engine, max_pages: int = 2000) -> int:
+    """Give up to ``max_pages`` free pages of a SQLite file back; returns how many"""
+    if bind.dialect.name != "sqlite":
+        return 0
+    with bind.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:  # INCREMENTAL
+            free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if free:
+                logger.info(f"{free} free pages stay in the file until `python retention.py --vacuum`")
+            return 0
+        before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        conn.commit()
+        # The pragma frees one page per step, and only executescript() steps
+        # a statement to completion
+        conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(max_pages)})")
+        freed = before - conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        # The file shrinks when the WAL is checkpointed
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").all()
+        conn.commit()
+    return freed
+
+
+def vacuum(bind=engine):
+    """Rebuild a SQLite file with incremental auto-vacuum; blocks writers while it runs"""
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+
+
+@contextmanager
+def retention_lock(bind=engine):
+    """Yield whether this process got the right to run retention now"""
+    if bind.dialect.name == "postgresql":
+        with bind.connect() as conn:
+            locked = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": RETENTION_LOCK_KEY}).scalar()
+            try:
+                yield locked
+            finally:
+                if locked:
+                    conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RETENTION_LOCK_KEY})
+                conn.commit()
+    elif SQLITE_PATH and fcntl:
+        with open(f"{SQLITE_PATH}-retention.lock", "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield True
+
+
+def run_retention(days: float = None, now: datetime = None) -> dict:
+    """
+    Move messages older than ``days`` (default ``CONTACT_RETENTION_DAYS``) to the archive
+
+    Returns:
+        dict: Messages ``archived`` by tenant and ``freed_pages``; empty
+        when another process is running retention
+    """
+    settings = get_settings()
+    days = settings.contact_retention_days if days is None else days
+    # Contact times are stored in UTC
+    cutoff = (now or utcnow()) - timedelta(days=days)
+    with retention_lock() as locked:
+        if not locked:
+            return {}
+        archive = open_archive(settings.contact_archive)
+        archived = {}
+        try:
+            db = SessionLocal()
+            try:
+                tenant_ids = db.scalars(select(Tenant.id).order_by(Tenant.id)).all()
+            finally:
+                db.close()
+            for tenant_id in tenant_ids:
+                moved = expire_tenant(archive, tenant_id, cutoff, settings.contact_retention_batch)
+                if moved:
+                    archived[tenant_id] = moved
+        finally:
+            archive.close()
+        freed = incremental_vacuum(max_pages=settings.sqlite_vacuum_pages) if archived else 0
+    if archived:
+        logger.info(f"Archived {sum(archived.values())} contact messages, freed {freed} pages")
+    return {"archived": archived, "freed_pages": freed}
+
+
+class RetentionWorker:
+    """Background thread running retention every ``CONTACT_RETENTION_INTERVAL`` seconds"""
+    
+    def __init__(self):
+        self._stopping = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if self._thread is None:
+            # A worker can be started again after stop()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self.run, name="contact-retention", daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout: float = 30):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def run(self):
+        settings = get_settings()
+        while not self._stopping.is_set():
+            try:
+                run_retention()
+            except Exception as e:
+                logger.error(f"Contact retention failed: {e}")
+            self._stopping.wait(settings.contact_retention_interval)
+
+
+# Global worker instance
+retention_worker = None
+
+def get_retention_worker() -> RetentionWorker:
+    """Get or create retention worker instance"""
+    global retention_worker
+    if retention_worker is None:
+        retention_worker = RetentionWorker()
+    return retention_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive and delete old contact messages")
+    parser.add_argument("--days", type=float, help="Keep this many days (default: CONTACT_RETENTION_DAYS)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the messages to move")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Rebuild the SQLite file with incremental auto-vacuum (blocks writers)")
+    args = parser.parse_args()
+    logging.basicConfig(level=get_settings().log_level)
+
+    if args.vacuum:
+        vacuum()
+        print("✅ Database vacuumed")
+        return
+    days = get_settings().contact_retention_days if args.days is None else args.days
+    if days <= 0:
+        parser.error("set CONTACT_RETENTION_DAYS or pass --days")
+    if args.dry_run:
+        counts = count_expired(utcnow() - timedelta(days=days))
+        for tenant_id, n in counts.items():
+            print(f"  tenant {tenant_id:<6} {n} messages")
+        print(f"{sum(counts.values())} messages older than {days:g} days")
+        return
+    report = run_retention(days)
+    if not report:
+        print("Another process is running retention")
+        return
+    for tenant_id, n in report["archived"].items():
+        print(f"  tenant {tenant_id:<6} {n} archived")
+    print(f"✅ Archived {sum(report['archived'].values())} messages, freed {report['freed_pages']} pages")
+
+
+if __name__ == "__main__":
+    main()
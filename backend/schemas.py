@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 
 # Profile schemas
@@ -49,7 +50,7 @@ class ExperienceBase(BaseModel):
     start_date: Optional[str] = None
     end_date: Optional[str] = None
     description: Optional[str] = None
-    technologies: Optional[str] = None
+    technologies: List[str] = []
 
 class ExperienceResponse(ExperienceBase):
     id: int
@@ -62,8 +63,8 @@ class ExperienceResponse(ExperienceBase):
 class ProjectBase(BaseModel):
     title: str
     description: Optional[str] = None
-    technologies: Optional[str] = None
-    highlights: Optional[str] = None
+    technologies: List[str] = []
+    highlights: List[str] = []
     link: Optional[str] = None
     github: Optional[str] = None
     is_featured: int = 0
@@ -108,6 +109,15 @@ class CertificationResponse(CertificationBase):
         from_attributes = True
 
 
+# Technology schemas
+class TechnologyUsageResponse(BaseModel):
+    id: int
+    name: str
+    slug: str
+    project_count: int = 0
+    experience_count: int = 0
+
+
 # Contact schemas
 class ContactMessageCreate(BaseModel):
     name: str
@@ -116,10 +126,77 @@ class ContactMessageCreate(BaseModel):
 
 class ContactMessageResponse(ContactMessageCreate):
     id: int
-    created_at: Optional[str] = None
+    created_at: Optional[datetime] = None
     class Config:
         from_attributes = True
 
+class ContactMessagePage(BaseModel):
+    messages: List[ContactMessageResponse] = []  # Newest first
+    next_cursor: Optional[str] = None  # Pass as ``cursor`` for the next page; None on the last
+
+
+# Admin schemas: rows are created from the *Base schemas (children also
+# name their parent); updates change only the fields sent and carry the
+# row_version they were based on
+class ResponsibilityCreate(BaseModel):
+    experience_id: int
+    description: str
+
+class SkillCreate(SkillBase):
+    category_id: int
+
+class EducationUpdate(BaseModel):
+    row_version: int
+    institution: Optional[str] = None
+    degree: Optional[str] = None
+    cgpa: Optional[str] = None
+    start_year: Optional[str] = None
+    end_year: Optional[str] = None
+    location: Optional[str] = None
+
+class ExperienceUpdate(BaseModel):
+    row_version: int
+    title: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    description: Optional[str] = None
+    technologies: Optional[List[str]] = None
+
+class ResponsibilityUpdate(BaseModel):
+    row_version: int
+    experience_id: Optional[int] = None
+    description: Optional[str] = None
+
+class ProjectUpdate(BaseModel):
+    row_version: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    technologies: Optional[List[str]] = None
+    highlights: Optional[List[str]] = None
+    link: Optional[str] = None
+    github: Optional[str] = None
+    is_featured: Optional[int] = None
+
+class SkillCategoryUpdate(BaseModel):
+    row_version: int
+    name: Optional[str] = None
+    icon: Optional[str] = None
+
+class SkillUpdate(BaseModel):
+    row_version: int
+    category_id: Optional[int] = None
+    name: Optional[str] = None
+    proficiency: Optional[int] = None
+
+class CertificationUpdate(BaseModel):
+    row_version: int
+    title: Optional[str] = None
+    issuer: Optional[str] = None
+    date: Optional[str] = None
+    link: Optional[str] = None
+
 
 # Full portfolio response
 class PortfolioResponse(BaseModel):
@@ -129,3 +206,29 @@ class PortfolioResponse(BaseModel):
     projects: List[ProjectResponse] = []
     skill_categories: List[SkillCategoryResponse] = []
     certifications: List[CertificationResponse] = []
+
+
+# Delta sync schemas
+class TableChanges(BaseModel):
+    reset: bool = False  # upserted holds every row; replace the whole table
+    upserted: List[Dict[str, Any]] = []  # Rows as column -> value
+    deleted: List[int] = []
+
+class ChangesResponse(BaseModel):
+    since: int
+    version: int  # Pass as ``since`` on the next sync
+    changes: Dict[str, TableChanges] = {}  # Keyed by table name
+
+
+# Search schemas
+class SearchHit(BaseModel):
+    kind: str  # project, experience, responsibility or skill
+    id: int
+    parent_id: Optional[int] = None  # experience of a responsibility, category of a skill
+    title: Optional[str] = None
+    snippet: str
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    hits: List[SearchHit] = []
@@ -0,0 +1,203 @@
+"""
+Full-Text Search
+================
+Projects, experiences, responsibilities and skills are indexed in an SQLite
+FTS5 table, ``search_index``, which answers ``/api/search`` with
+bm25-ranked hits and highlighted snippets. Documents carry their tenant and
+a search only matches the requesting tenant's.
+
+The index is a ``derived_indexes`` index, so it is kept current inside the
+writing transaction. Other databases fall back to a LIKE scan over the same
+documents.
+"""
+
+import re
+from typing import List, Optional, Set
+
+from sqlalchemy import (
+    Column, Integer, MetaData, String, Table, Text, and_, case, delete, func,
+    insert, literal, null, or_, select, text, type_coerce, union_all
+)
+from sqlalchemy.orm import Session
+
+from database import IS_SQLITE, tenant_of
+from derived_indexes import DerivedIndex, register
+from models import Experience, Project, Responsibility, Skill
+
+# Kept out of Base.metadata: the table is created as an FTS5 virtual table
+_fts_metadata = MetaData()
+search_index = Table(
+    "search_index", _fts_metadata,
+    Column("kind", String),
+    Column("ref_id", Integer),
+    Column("parent_id", Integer),
+    Column("tenant_id", Integer),
+    Column("title", Text),
+    Column("body", Text),
+)
+
+CREATE_INDEX_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "kind UNINDEXED, ref_id UNINDEXED, parent_id UNINDEXED, tenant_id UNINDEXED, title, body, "
+    "tokenize='porter unicode61', prefix='2 3')"
+)
+
+# Title matches weigh five times more than body matches
+SEARCH_SQL = text(
+    "SELECT kind, ref_id, parent_id, title, "
+    "snippet(search_index, -1, '<mark>', '</mark>', '…', 16) AS snippet, "
+    "bm25(search_index, 0.0, 0.0, 0.0, 0.0, 5.0, 1.0) AS score "
+    "FROM search_index WHERE search_index MATCH :query AND tenant_id = :tenant "
+    "ORDER BY score LIMIT :limit"
+)
+
+
+def _text(*columns):
+    expression = func.coalesce(columns[0], "")
+    for column in columns[1:]:
+        expression = expression + " " + func.coalesce(column, "")
+    return expression
+
+
+def _list_text(column):
+    """The elements of a JSON list column joined by spaces, for indexing without JSON punctuation"""
+    if IS_SQLITE:
+        elements = func.json_each(column).table_valued("value")
+        joined = select(func.group_concat(elements.c.value, " ")).scalar_subquery()
+        # Rows not yet migrated to JSON lists are indexed as they are
+        return case((func.json_valid(column), joined), else_=type_coerce(column, Text))
+    elements = func.json_array_elements_text(column).table_valued("value")
+    return select(func.string_agg(elements.c.value, " ")).scalar_subquery()
+
+
+def _document(kind: str, model, parent_id, title, body):
+    return select(
+        literal(kind).label("kind"), model.id.label("ref_id"), parent_id.label("parent_id"),
+        model.tenant_id.label("tenant_id"), title.label("title"), body.label("body"),
+    )
+
+
+# Index kind of each searchable table, and the query producing its documents
+KIND_BY_TABLE = {
+    "projects": "project",
+    "experience": "experience",
+    "responsibilities": "responsibility",
+    "skills": "skill",
+}
+DOCUMENTS = {
+    "projects": (Project, _document(
+        "project", Project, null(), Project.title, _text(Project.description, _list_text(Project.highlights))
+    )),
+    "experience": (Experience, _document(
+        "experience", Experience, null(),
+        Experience.title + " at " + Experience.company, _text(Experience.description)
+    )),
+    "responsibilities": (Responsibility, _document(
+        "responsibility", Responsibility, Responsibility.experience_id,
+        literal(""), Responsibility.description
+    )),
+    "skills": (Skill, _document(
+        "skill", Skill, Skill.category_id, Skill.name, literal("")
+    )),
+}
+
+_index_exists = False
+
+
+def _has_index(conn) -> bool:
+    """Whether ``search_index`` exists; a positive answer is cached for the process"""
+    global _index_exists
+    if not _index_exists:
+        _index_exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'search_index'")
+        ).first() is not None
+    return _index_exists
+
+
+def reindex(conn, table: str, ids: Optional[Set[int]] = None):
+    """Re-index ``table``: only the rows in ``ids``, or all of it"""
+    model, document = DOCUMENTS[table]
+    kind = KIND_BY_TABLE[table]
+    if ids is None:
+        conn.execute(delete(search_index).where(search_index.c.kind == kind))
+    else:
+        conn.execute(delete(search_index).where(
+            search_index.c.kind == kind, search_index.c.ref_id.in_(ids)
+        ))
+        document = document.where(model.id.in_(ids))
+    conn.execute(insert(search_index).from_select(
+        ["kind", "ref_id", "parent_id", "tenant_id", "title", "body"], document
+    ))
+
+
+def ensure_search_index(conn):
+    """Create the index if needed and build it when it is empty"""
+    if not IS_SQLITE:
+        return
+    conn.execute(text(CREATE_INDEX_SQL))
+    if conn.execute(select(func.count()).select_from(search_index)).scalar_one() == 0:
+        for table in DOCUMENTS:
+            reindex(conn, table)
+
+
+if IS_SQLITE:
+    register(DerivedIndex("search", DOCUMENTS, reindex, available=_has_index))
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def query_tokens(query: str) -> List[str]:
+    return TOKEN_RE.findall(query)[:16]
+
+
+def search(db: Session, query: str, limit: int = 10) -> List[dict]:
+    """
+    Ranked hits for ``query``; every word must match, the last one as a prefix
+    
+    Returns:
+        list: Dicts with kind, id, parent_id, title, snippet and score
+    """
+    tokens = query_tokens(query)
+    if not tokens:
+        return []
+    if not IS_SQLITE:
+        return _search_like(db, tokens, limit)
+    
+    match = " ".join(f'"{t}"' for t in tokens[:-1]) + f' "{tokens[-1]}"*'
+    rows = db.execute(
+        SEARCH_SQL, {"query": match.strip(), "tenant": tenant_of(db), "limit": limit}
+    ).mappings()
+    return [
+        {
+            "kind": row["kind"],
+            "id": row["ref_id"],
+            "parent_id": row["parent_id"],
+            "title": row["title"] or None,
+            "snippet": row["snippet"],
+            "score": round(-row["score"], 4),  # bm25 is lower-is-better
+        }
+        for row in rows
+    ]
+
+
+def _search_like(db: Session, tokens: List[str], limit: int) -> List[dict]:
+    documents = union_all(*(document for _, document in DOCUMENTS.values())).subquery()
+    conditions = [
+        or_(documents.c.title.ilike(f"%{t}%"), documents.c.body.ilike(f"%{t}%"))
+        for t in tokens
+    ]
+    rows = db.execute(
+        select(documents).where(documents.c.tenant_id == tenant_of(db), and_(*conditions)).limit(limit)
+    ).mappings()
+    return [
+        {
+            "kind": row["kind"],
+            "id": row["ref_id"],
+            "parent_id": row["parent_id"],
+            "title": row["title"] or None,
+            "snippet": (row["body"] or "")[:200],
+            "score": 0.0,
+        }
+        for row in rows
+    ]
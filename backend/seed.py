@@ -1,146 +1,300 @@
 """
 Seed script to populate database with Naveen's portfolio data
+
+The desired content lives in ``seed_data.json``. Seeding diffs it against
+the rows already in the database, matching rows by natural key (a project's
+title, a skill's category and name, ...), and applies the differences as
+bulk inserts, updates and deletes in a single transaction. Unchanged rows
+keep their ids and readers never observe a partially seeded or empty
+portfolio.
+
+``--scale N`` multiplies the projects, skills and responsibilities N times
+(with numbered copies), for load testing against larger portfolios.
+
+``--tenant SLUG`` seeds another hosted portfolio (created if needed, and
+reachable at ``/t/SLUG/...`` or at ``--host``); other tenants' rows are
+never touched. ``--admin-token`` sets the token of the tenant's admin API.
+
+Usage:
+    python seed.py [--data path/to/seed_data.json] [--scale N]
+                   [--tenant SLUG [--host HOST]] [--admin-token TOKEN]
 """
-from database import SessionLocal, engine, Base
+import argparse
+import copy
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import delete, insert, select, update
+
+from database import DEFAULT_TENANT_ID, TENANT_KEY, SessionLocal, tenant_of
 from models import (
     Profile, Education, Experience, Responsibility,
-    Project, SkillCategory, Skill, Certification
+    Project, SkillCategory, Skill, Certification, Tenant
 )
+from migrations import migrate
+from versioning import CHANGES_RECORDED, DELETE, UPSERT, record_changes
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+DEFAULT_DATA_FILE = Path(__file__).parent / "seed_data.json"
 
+# Natural key of each table, used to match desired content to existing rows
+NATURAL_KEYS = {
+    Profile: (),
+    Education: ("institution", "degree"),
+    Experience: ("company", "title", "start_date"),
+    Responsibility: ("experience_id", "description"),
+    Project: ("title",),
+    SkillCategory: ("name",),
+    Skill: ("category_id", "name"),
+    Certification: ("title", "issuer"),
+}
 
-def seed_database():
-    db = SessionLocal()
-    
-    # Clear existing data
-    db.query(Responsibility).delete()
-    db.query(Skill).delete()
-    db.query(SkillCategory).delete()
-    db.query(Certification).delete()
-    db.query(Project).delete()
-    db.query(Experience).delete()
-    db.query(Education).delete()
-    db.query(Profile).delete()
-    db.commit()
-    
-    # Profile
-    profile = Profile(
-        name="Naveen S",
-        title="AI Engineer | Full-Stack Developer",
-        tagline="Building intelligent systems and scalable applications with AI/ML, FastAPI, React, and LLM technologies",
-        about="""I'm an AI Engineering Intern at Thapovan @ Prayag.ai, where I build intelligent systems and scalable backend architectures. Currently pursuing my B.Tech in Artificial Intelligence and Data Science at Karpagam College of Engineering with a CGPA of 8.45.
-
-My passion lies at the intersection of AI/ML and software engineering. I specialize in building production-ready applications that leverage the power of Large Language Models, real-time data processing, and modern web technologies.
-
-When I'm not coding, you'll find me exploring new AI research papers, contributing to open-source projects, or solving algorithmic challenges on LeetCode.""",
-        email="naveenselvan0004@gmail.com",
-        phone="7010689737",
-        linkedin="https://linkedin.com/in/naveen0004",
-        github="https://github.com/naveencreation",
-        leetcode="https://leetcode.com/u/naveenselvan"
+
+def load_seed_data(path=DEFAULT_DATA_FILE) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _copies(items: list, factor: int, rename) -> list:
+    return [item if i == 0 else rename(item, i) for i in range(factor) for item in items]
+
+
+def scale_content(data: dict, factor: int) -> dict:
+    """Copy of ``data`` with ``factor`` times as many projects, skills and responsibilities"""
+    if factor <= 1:
+        return data
+    data = copy.deepcopy(data)
+    data["projects"] = _copies(
+        data.get("projects", []), factor, lambda p, i: {**p, "title": f"{p['title']} #{i}"}
     )
-    db.add(profile)
+    for experience in data.get("experience", []):
+        experience["responsibilities"] = _copies(
+            experience.get("responsibilities", []), factor, lambda r, i: f"{r} #{i}"
+        )
+    for category in data.get("skill_categories", []):
+        category["skills"] = _copies(
+            category.get("skills", []), factor, lambda s, i: {**s, "name": f"{s['name']} #{i}"}
+        )
+    return data
+
+
+def _row(model, values: dict) -> dict:
+    """Column values of ``model`` from a content entry, with missing columns as None"""
+    return {
+        column.name: values.get(column.name, column.default.arg if column.default is not None else None)
+        for column in model.__table__.columns if column.name not in ("id", "row_version", "tenant_id")
+    }
+
+
+def _project_row(entry: dict) -> dict:
+    row = _row(Project, entry)
+    row["technologies"] = list(entry.get("technologies", []))
+    row["highlights"] = list(entry.get("highlights", []))
+    row["is_featured"] = int(bool(entry.get("is_featured", False)))
+    return row
+
+
+def _experience_row(entry: dict) -> dict:
+    row = _row(Experience, entry)
+    row["technologies"] = list(entry.get("technologies", []))
+    return row
+
+
+class TableDiff:
+    """Rows to insert, update and delete to make a table match the desired content"""
     
-    # Education
-    education = Education(
-        institution="Karpagam College of Engineering",
-        degree="B.Tech in Artificial Intelligence and Data Science",
-        cgpa="8.45",
-        start_year="2022",
-        end_year="2026",
-        location="Coimbatore, India"
-    )
-    db.add(education)
+    def __init__(self, model):
+        self.model = model
+        self.inserts = []
+        self.updates = []
+        self.deletes = []
+        self.unchanged = 0
+        self.ids = {}  # natural key -> id of the kept or inserted row
     
-    # Experience
-    experience = Experience(
-        title="AI Engineering Intern",
-        company="Thapovan @ Prayag.ai",
-        location="India",
-        start_date="Apr 2024",
-        end_date="Present",
-        description="Building AI-powered products and scalable backend systems",
-        technologies="FastAPI,Node.js,React,Redis,PostgreSQL,OpenAI,Gemini"
-    )
-    db.add(experience)
-    db.flush()
+    def summary(self) -> dict:
+        return {
+            "inserted": len(self.inserts),
+            "updated": len(self.updates),
+            "deleted": len(self.deletes),
+            "unchanged": self.unchanged,
+        }
+
+
+def diff_table(db, model, desired: list) -> TableDiff:
+    """Compare ``desired`` rows (dicts without ids) with the current table contents"""
+    key_columns = NATURAL_KEYS[model]
+    diff = TableDiff(model)
     
-    # Responsibilities
-    responsibilities = [
-        "Engineered backend services for AI Notetaker, a scalable meeting intelligence platform using FastAPI, Node.js, React, Redis, and PostgreSQL.",
-        "Implemented secure authentication using JWT, HTTP-only cookies, session state, and token refresh for robust multi-session security.",
-        "Integrated OpenAI GPT-4/4o/4.1, Gemini 1.5/2.0, and LLM Agents for summarization, topic extraction, and workflow automation.",
-        "Built pipelines for sentiment analysis, semantic search, embeddings, vector similarity, and document processing.",
-        "Designed multi-agent orchestration for task routing, structured outputs, and contextual memory.",
-        "Optimized real-time transcription and inference using Redis caching, pub/sub, and async background workers.",
-        "Collaborated in Agile sprints, contributing to CI/CD, code reviews, and system architecture."
-    ]
-    for resp in responsibilities:
-        db.add(Responsibility(experience_id=experience.id, description=resp))
+    table = model.__table__
+    existing = {}
+    rows = select(table).where(table.c.tenant_id == tenant_of(db)).order_by(table.c.id)
+    for row in db.execute(rows).mappings():
+        key = tuple(row[c] for c in key_columns)
+        if key in existing:
+            diff.deletes.append(row["id"])  # duplicate of an earlier row
+        else:
+            existing[key] = row
     
-    # Projects
-    projects = [
-        Project(
-            title="AI Notetaker (Prayag.ai)",
-            description="A scalable meeting intelligence platform that leverages AI to transform meetings into actionable insights.",
-            technologies="React,Node.js,FastAPI,Redis,PostgreSQL,OpenAI,Gemini",
-            highlights='["Integrated OpenAI Agents and Gemini models for meeting summaries, action items, and contextual insights","Implemented RAG pipelines, sentiment analysis, and multi-format document ingestion","Built multi-agent workflow: transcription → understanding → summarization → output","Reduced inference latency by 30% using Redis caching and async processing"]',
-            link="https://prayag.ai",
-            is_featured=1
-        ),
-        Project(
-            title="Vehicle Routing Optimization",
-            description="A Genetic Algorithm-based solver for the Vehicle Routing Problem (VRP). Tackles large-scale NP-hard optimization problems.",
-            technologies="Python,DEAP,Genetic Algorithm",
-            highlights='["Built GA-based solver reducing route cost by 30%","Implemented custom crossover, mutation, and fitness strategies"]',
-            github="https://github.com/naveencreation",
-            is_featured=0
-        ),
-        Project(
-            title="AutoML Framework",
-            description="An automated machine learning pipeline for data cleaning, feature engineering, model selection, and training.",
-            technologies="Python,Streamlit,Scikit-learn,TensorFlow",
-            highlights='["Improved prediction accuracy by 20%","Reduced preprocessing time by 30%"]',
-            github="https://github.com/naveencreation",
-            is_featured=0
+    seen = set()
+    for values in desired:
+        key = tuple(values[c] for c in key_columns)
+        if key in seen:
+            raise ValueError(f"Duplicate {model.__tablename__} entry: {key}")
+        seen.add(key)
+        current = existing.pop(key, None)
+        if current is None:
+            diff.inserts.append(values)
+        elif any(current[c] != v for c, v in values.items()):
+            changed = {"id": current["id"], **values}
+            if "row_version" in current:
+                # The expected version; the update checks and bumps it like a flush
+                changed["row_version"] = current["row_version"]
+            diff.updates.append(changed)
+            diff.ids[key] = current["id"]
+        else:
+            diff.unchanged += 1
+            diff.ids[key] = current["id"]
+    diff.deletes.extend(row["id"] for row in existing.values())
+    return diff
+
+
+# Bulk statements below log their rows in the content change log themselves
+_LOGGED = {CHANGES_RECORDED: True}
+
+
+def apply_upserts(db, diff: TableDiff):
+    """Bulk insert and update; records the ids of inserted rows in ``diff.ids``"""
+    model = diff.model
+    table = model.__tablename__
+    if diff.inserts:
+        key_columns = NATURAL_KEYS[model]
+        ids = db.scalars(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            [{**values, "tenant_id": tenant_of(db)} for values in diff.inserts],
+            execution_options=_LOGGED,
+        ).all()
+        for values, row_id in zip(diff.inserts, ids):
+            diff.ids[tuple(values[c] for c in key_columns)] = row_id
+        record_changes(db, table, UPSERT, ids)
+    if diff.updates:
+        db.execute(update(model), diff.updates, execution_options=_LOGGED)
+        record_changes(db, table, UPSERT, [values["id"] for values in diff.updates])
+
+
+def apply_deletes(db, diff: TableDiff):
+    if diff.deletes:
+        db.execute(
+            delete(diff.model).where(diff.model.id.in_(diff.deletes)),
+            execution_options={"synchronize_session": False, **_LOGGED},
         )
-    ]
-    for project in projects:
-        db.add(project)
+        record_changes(db, diff.model.__tablename__, DELETE, diff.deletes)
+
+
+def get_or_create_tenant(slug: str, host: Optional[str] = None, admin_token: Optional[str] = None) -> int:
+    """
+    Id of the tenant ``slug``, created if missing
     
-    # Skills
-    skill_data = [
-        ("Languages", "code", [("Python", 95), ("JavaScript", 85), ("Java", 70), ("SQL", 85)]),
-        ("Frameworks", "framework", [("FastAPI", 90), ("Node.js", 85), ("React.js", 85), ("Express", 80), ("Streamlit", 80), ("Scikit-learn", 85), ("TensorFlow", 75)]),
-        ("Databases", "database", [("PostgreSQL", 90), ("Redis", 85), ("MongoDB", 75), ("MySQL", 80)]),
-        ("AI & LLM", "ai", [("OpenAI GPT-4", 90), ("Gemini", 85), ("LLM Agents", 85), ("Prompt Engineering", 90), ("Embeddings", 85), ("Vector Search", 85), ("RAG", 90), ("Sentiment Analysis", 85)]),
-        ("Core Skills", "core", [("API Development", 90), ("Authentication", 85), ("Microservices", 85), ("Caching", 85), ("Distributed Systems", 80), ("Real-Time Processing", 85), ("CI/CD", 80)]),
-        ("Developer Tools", "tools", [("Docker", 80), ("Git", 90), ("GitHub Actions", 80), ("Postman", 85), ("Linux", 80), ("VS Code", 90)])
-    ]
+    Args:
+        host: Replaces the tenant's host name if given
+        admin_token: Replaces the token of the tenant's admin API if given
+    """
+    db = SessionLocal()
+    try:
+        tenant = db.query(Tenant).filter(Tenant.slug == slug).one_or_none()
+        if tenant is None:
+            tenant = Tenant(slug=slug, name=slug, created_at=datetime.now(timezone.utc).replace(tzinfo=None))
+            db.add(tenant)
+        if host:
+            tenant.host = host.lower()
+        if admin_token:
+            # Imported here, the admin API is not needed to seed
+            from admin import hash_admin_token
+            tenant.admin_token_hash = hash_admin_token(admin_token)
+        db.commit()
+        return tenant.id
+    finally:
+        db.close()
+
+
+def seed_database(data_file=DEFAULT_DATA_FILE, scale: int = 1, tenant_id: int = DEFAULT_TENANT_ID) -> dict:
+    """
+    Make a tenant's content match the content in ``data_file``
     
-    for cat_name, icon, skills in skill_data:
-        category = SkillCategory(name=cat_name, icon=icon)
-        db.add(category)
-        db.flush()
-        for skill_name, proficiency in skills:
-            db.add(Skill(category_id=category.id, name=skill_name, proficiency=proficiency))
+    Args:
+        data_file: Content file (JSON)
+        scale: Multiply projects, skills and responsibilities this many times
+        tenant_id: Tenant to seed
+        
+    Returns:
+        dict: Per-table counts of inserted, updated, deleted and unchanged rows
+    """
+    data = scale_content(load_seed_data(data_file), scale)
+    db = SessionLocal(info={TENANT_KEY: tenant_id})
+    try:
+        # Parent tables first so that children can reference new ids
+        profile = diff_table(db, Profile, [_row(Profile, data["profile"])] if data.get("profile") else [])
+        education = diff_table(db, Education, [_row(Education, e) for e in data.get("education", [])])
+        projects = diff_table(db, Project, [_project_row(p) for p in data.get("projects", [])])
+        certifications = diff_table(
+            db, Certification, [_row(Certification, c) for c in data.get("certifications", [])]
+        )
+        experiences = diff_table(db, Experience, [_experience_row(e) for e in data.get("experience", [])])
+        categories = diff_table(
+            db, SkillCategory,
+            [_row(SkillCategory, c) for c in data.get("skill_categories", [])]
+        )
+        parents = [profile, education, projects, certifications, experiences, categories]
+        for diff in parents:
+            apply_upserts(db, diff)
+        
+        responsibilities = diff_table(db, Responsibility, [
+            {"experience_id": experiences.ids[(e["company"], e["title"], e.get("start_date"))],
+             "description": description}
+            for e in data.get("experience", [])
+            for description in e.get("responsibilities", [])
+        ])
+        skills = diff_table(db, Skill, [
+            {"category_id": categories.ids[(c["name"],)],
+             "name": s["name"], "proficiency": s.get("proficiency", 80)}
+            for c in data.get("skill_categories", [])
+            for s in c.get("skills", [])
+        ])
+        children = [responsibilities, skills]
+        for diff in children:
+            apply_upserts(db, diff)
+        
+        # Children before parents so foreign keys never dangle
+        for diff in children + parents:
+            apply_deletes(db, diff)
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
     
-    # Certifications
-    certifications = [
-        Certification(title="Business Analyst Qualification", issuer="Qlik"),
-        Certification(title="Python for Data Science", issuer="NPTEL"),
-        Certification(title="Data Analytics with Python", issuer="NPTEL"),
-        Certification(title="Big Data Computing", issuer="NPTEL")
-    ]
-    for cert in certifications:
-        db.add(cert)
+    return {diff.model.__tablename__: diff.summary() for diff in parents + children}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the portfolio database")
+    parser.add_argument("--data", default=DEFAULT_DATA_FILE, help="Content file (JSON)")
+    parser.add_argument("--scale", type=int, default=1, help="Content multiplier for load testing")
+    parser.add_argument("--tenant", default="default", help="Slug of the portfolio to seed")
+    parser.add_argument("--host", help="Host name serving the tenant, e.g. portfolio.example.com")
+    parser.add_argument("--admin-token", help="Bearer token of the tenant's admin API")
+    args = parser.parse_args()
     
-    db.commit()
-    db.close()
+    migrate()
+    tenant_id = get_or_create_tenant(args.tenant, args.host, args.admin_token)
+    report = seed_database(args.data, args.scale, tenant_id)
+    for table, counts in report.items():
+        changes = ", ".join(f"{n} {action}" for action, n in counts.items() if n)
+        print(f"  {table:<18} {changes or 'no rows'}")
     print("✅ Database seeded successfully!")
 
 
 if __name__ == "__main__":
-    seed_database()
+    main()
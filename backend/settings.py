@@ -0,0 +1,112 @@
+"""
+Application Settings
+====================
+Runtime configuration read from environment variables, and from
+``backend/.env`` (if python-dotenv is installed) when settings are first
+requested. That happens when ``database`` is imported, since the engines
+it creates need the database URL, which ``.env`` may set.
+"""
+
+import os
+from pathlib import Path
+
+ENV_FILE = Path(__file__).parent / ".env"
+
+
+def load_env_file(path: Path = ENV_FILE):
+    """Load ``path`` into the environment; existing variables take precedence"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv(path)
+
+
+def normalize_database_url(url: str) -> str:
+    # Render and Heroku hand out postgres:// URLs, which SQLAlchemy does not accept
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+class Settings:
+    """Runtime configuration for the API"""
+    
+    def __init__(self):
+        self.log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+        
+        # Database connection
+        self.database_url = normalize_database_url(
+            os.getenv("DATABASE_URL", "sqlite:///./portfolio.db")
+        )
+        self.db_pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        self.db_pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        self.db_pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.sqlite_busy_timeout = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms
+        self.sqlite_mmap_size = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+        self.sqlite_synchronous = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+        
+        # Serve requests from an asyncio database engine instead of the threadpool
+        self.db_async = os.getenv("DB_ASYNC", "0") == "1"
+        
+        # "fast" encodes trusted ORM rows directly, "pydantic" validates them first
+        self.serialization_mode = os.getenv("SERIALIZATION_MODE", "fast")
+        
+        # Tenants: how long host and slug lookups are cached, in seconds, and
+        # how many response snapshots are kept per tenant and for how many tenants
+        self.tenant_cache_ttl = float(os.getenv("TENANT_CACHE_TTL", "60"))
+        self.snapshot_max_tenants = int(os.getenv("SNAPSHOT_MAX_TENANTS", "100"))
+        self.snapshot_max_per_tenant = int(os.getenv("SNAPSHOT_MAX_PER_TENANT", "32"))
+        
+        # Longest a worker trusts its cached content versions without a
+        # change signal from another process, in seconds
+        self.content_version_ttl = float(os.getenv("CONTENT_VERSION_TTL", "1"))
+        
+        # Bearer token of the admin API; the API is disabled while unset
+        self.admin_token = os.getenv("ADMIN_TOKEN", "")
+        
+        # HTTP caching of read endpoints, in seconds
+        self.cache_max_age = int(os.getenv("CACHE_MAX_AGE", "60"))
+        self.cache_stale_while_revalidate = int(
+            os.getenv("CACHE_STALE_WHILE_REVALIDATE", "86400")
+        )
+        
+        # Contact submissions are committed in groups gathered over this window
+        self.contact_batch_window = float(os.getenv("CONTACT_BATCH_WINDOW_MS", "3")) / 1000
+        self.contact_batch_max = int(os.getenv("CONTACT_BATCH_MAX", "100"))
+        
+        # Contact email outbox
+        self.outbox_worker_enabled = os.getenv("OUTBOX_WORKER_ENABLED", "1") == "1"
+        self.outbox_poll_interval = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+        self.outbox_batch_size = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+        self.outbox_max_attempts = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+        self.outbox_retry_base_delay = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", "30"))
+        self.outbox_retry_max_delay = float(os.getenv("OUTBOX_RETRY_MAX_DELAY", "3600"))
+        self.outbox_lease = float(os.getenv("OUTBOX_LEASE", "300"))
+        
+        # Contact messages older than CONTACT_RETENTION_DAYS (0: never) move to
+        # CONTACT_ARCHIVE, a directory of .ndjson.gz files or a database URL
+        self.contact_retention_days = float(os.getenv("CONTACT_RETENTION_DAYS", "0"))
+        self.contact_archive = os.getenv("CONTACT_ARCHIVE", "./archive")
+        self.contact_retention_batch = int(os.getenv("CONTACT_RETENTION_BATCH", "500"))
+        self.contact_retention_interval = float(os.getenv("CONTACT_RETENTION_INTERVAL", "86400"))  # seconds
+        self.sqlite_vacuum_pages = int(os.getenv("SQLITE_VACUUM_PAGES", "2000"))  # per retention run
+        
+        # Readiness thresholds; results are reused for HEALTH_CACHE_TTL seconds
+        self.health_cache_ttl = float(os.getenv("HEALTH_CACHE_TTL", "1"))
+        self.health_db_max_ms = float(os.getenv("HEALTH_DB_MAX_MS", "250"))
+        self.health_outbox_max_pending = int(os.getenv("HEALTH_OUTBOX_MAX_PENDING", "100"))
+        self.health_outbox_max_overdue = float(os.getenv("HEALTH_OUTBOX_MAX_OVERDUE", "900"))  # seconds
+
+
+# Global settings instance
+settings = None
+
+def get_settings() -> Settings:
+    """Get or create settings instance"""
+    global settings
+    if settings is None:
+        load_env_file()
+        settings = Settings()
+    return settings
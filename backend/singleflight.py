@@ -0,0 +1,103 @@
+"""
+Single-Flight Reads
+===================
+Concurrent identical read requests share one computation: the first
+request (the leader) computes the response and every identical request
+arriving while it is in flight awaits that same result instead of running
+the same queries and serialization again. This flattens bursts of cache
+misses, e.g. right after a deploy or a content change.
+
+Requests are identical when their tenant, path, query string and the
+headers that shape the response (Accept-Encoding and the conditional
+headers) match. A flight is only joined if no content was committed in this
+process since it started, so a reader never receives a response older than
+its own request.
+
+Flights live on the event loop, so they work the same whether the handler
+runs in the threadpool or on an async session.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+from fastapi import Request
+
+import metrics
+from versioning import on_commit
+
+# Request headers a read response depends on
+KEY_HEADERS = ("accept-encoding", "if-none-match", "if-modified-since")
+
+
+class LeaderCancelled(Exception):
+    """The leading request was cancelled before producing a result"""
+
+
+def request_key(request: Request) -> Tuple:
+    tenant_id = getattr(request.state, "tenant_id", None)
+    return (tenant_id, request.url.path, request.url.query) + tuple(
+        request.headers.get(name, "") for name in KEY_HEADERS
+    )
+
+
+def _route(request: Request) -> str:
+    return getattr(request.scope.get("route"), "path", None) or request.url.path
+
+
+class SingleFlight:
+    """In-flight computations by key"""
+    
+    def __init__(self):
+        self._flights: Dict[Tuple, asyncio.Future] = {}
+        self._generation = 0
+    
+    def invalidate(self, resources=None, tenant_id=None):
+        """Stop joining flights started before now (called after each commit)"""
+        self._generation += 1
+    
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable], route: str = ""):
+        """Result of ``compute()``, shared with identical concurrent calls"""
+        key = (key, self._generation)
+        while key in self._flights:
+            metrics.singleflight_requests.inc(route, "coalesced")
+            try:
+                # Shielded: a follower going away must not cancel the others
+                return await asyncio.shield(self._flights[key])
+            except LeaderCancelled:
+                pass  # take over, unless another follower already has
+        
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        metrics.singleflight_requests.inc(route, "leader")
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            flight.set_exception(LeaderCancelled())
+            flight.exception()  # retrieved; followers recompute
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+    
+    async def read(self, request: Request, compute: Callable[[], Awaitable]):
+        """``do()`` keyed by the request"""
+        return await self.do(request_key(request), compute, _route(request))
+
+
+# Global single-flight group
+single_flight = None
+
+def get_single_flight() -> SingleFlight:
+    """Get or create the single-flight group, reset by content commits"""
+    global single_flight
+    if single_flight is None:
+        single_flight = SingleFlight()
+        on_commit(single_flight.invalidate)
+    return single_flight
@@ -0,0 +1,384 @@
+"""
+Response Snapshots
+==================
+Read endpoints serve JSON bodies that were serialized once per content
+version, together with gzip and brotli variants compressed ahead of time.
+A request only reads the content versions, picks the variant matching its
+Accept-Encoding and returns the bytes; the ORM and Pydantic are involved
+only when the content has changed since the snapshot was built.
+
+Snapshots are built compressed at ``FAST``, which costs milliseconds, so
+neither a request nor one waiting for a rebuild pays for ``BEST`` (brotli
+11, gzip 9), which can take seconds on large content. A background thread
+recompresses them at ``BEST`` and swaps the smaller variants in.
+
+Snapshots are dropped and rebuilt in the background after every commit
+that changes their resources in this process; composite views reuse the
+snapshots of their unchanged parts. A snapshot is built by one thread at a
+time: requests that need it meanwhile, such as the first ones after a
+commit, wait for that build instead of repeating it. Transient views,
+registered on demand for parameterized requests such as sparse portfolio
+selections, are kept in a bounded LRU per tenant, rebuilt lazily on their
+next request and never recompressed at ``BEST``. Changes made by other
+processes (other workers, ``seed.py``) are picked up on the next request,
+when ``coherence`` reports new versions.
+"""
+
+import asyncio
+import gzip
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from coherence import current_versions
+from database import DEFAULT_TENANT_ID, TENANT_KEY, SessionLocal, tenant_of
+from settings import get_settings
+from http_cache import is_not_modified, not_modified_response, validators
+from serializers import dumps
+from versioning import get_versions, on_commit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+# Most transient views kept per tenant; the least recently used are dropped
+MAX_TRANSIENT_VIEWS = 16
+
+# Seconds a request waits for another thread's build of the snapshot it
+# needs before building its own
+BUILD_WAIT_TIMEOUT = 10.0
+
+# (brotli quality, gzip level) of snapshots as built, and as recompressed
+FAST = (4, 6)
+BEST = (11, 9)
+
+
+def parse_accept_encoding(header: str) -> set:
+    """Content codings the client accepts (q > 0)"""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class Snapshot:
+    """Serialized response body and its precompressed variants"""
+    
+    def __init__(self, version: int, body: Optional[bytes], quality: tuple = BEST):
+        self.version = version
+        self.body = body
+        self.quality = None
+        self.variants = {}
+        self.compress(quality)
+    
+    def compress(self, quality: tuple):
+        """Replace the variants with ones compressed at ``quality``"""
+        if self.body is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return
+        brotli_quality, gzip_level = quality
+        variants = {}
+        if brotli is not None:
+            variants["br"] = brotli.compress(self.body, quality=brotli_quality)
+        variants["gzip"] = gzip.compress(self.body, compresslevel=gzip_level, mtime=0)
+        # A single assignment, so readers see either set whole
+        self.variants = variants
+        self.quality = quality
+    
+    def select(self, accept_encoding: str):
+        """Smallest acceptable ``(body, content_encoding)`` pair"""
+        if self.variants and accept_encoding:
+            accepted = parse_accept_encoding(accept_encoding)
+            for coding in ("br", "gzip"):
+                if coding in self.variants and (coding in accepted or "*" in accepted):
+                    return self.variants[coding], coding
+        return self.body, None
+
+
+def _on_event_loop() -> bool:
+    """Whether the calling thread runs an event loop (``run_sync`` of an ``AsyncSession``)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class _Build:
+    """A snapshot being built, which requests for the same version wait for"""
+    
+    __slots__ = ("version", "thread", "done", "snapshot")
+    
+    def __init__(self, version: int):
+        self.version = version
+        self.thread = threading.get_ident()
+        self.done = threading.Event()
+        self.snapshot = None
+
+
+class SnapshotView:
+    """A snapshot-backed endpoint: the resources it reads and how to serialize it"""
+    
+    def __init__(self, key: str, resources: Iterable[str],
+                 build: Callable[[Session], Optional[bytes]], not_found: str = "Not found"):
+        self.key = key
+        self.resources = tuple(resources)
+        self.build = build
+        self.not_found = not_found
+
+
+class SnapshotStore:
+    """Current snapshot of every registered view"""
+    
+    def __init__(self, max_tenants: int = 100, max_per_tenant: int = 32):
+        """
+        Args:
+            max_tenants: Tenants whose snapshots are kept; the least recently used are dropped
+            max_per_tenant: Snapshots kept per tenant; the least recently used are dropped
+        """
+        self.views: Dict[str, SnapshotView] = {}
+        self._transient: "OrderedDict[int, OrderedDict[str, SnapshotView]]" = OrderedDict()
+        self._tenants: "OrderedDict[int, OrderedDict[str, Snapshot]]" = OrderedDict()
+        self.max_tenants = max_tenants
+        self.max_per_tenant = max_per_tenant
+        self._built = set()  # views built at least once
+        self._lock = threading.Lock()
+        self._building: "Dict[tuple, _Build]" = {}  # (tenant_id, key) -> build in progress
+        self._recompress = []  # FAST snapshots waiting for BEST variants
+        self._recompressor = None
+    
+    def register(self, key: str, resources: Iterable[str],
+                 build: Callable[[Session], Optional[bytes]], not_found: str = "Not found"):
+        self.views[key] = SnapshotView(key, resources, build, not_found)
+    
+    def register_composite(self, key: str, parts: Dict[str, str]):
+        """
+        View of a JSON object whose ``parts`` (member name -> view key) are other views
+        
+        It is assembled from their snapshots, so after a change only the
+        parts whose resources changed are loaded and serialized again.
+        """
+        def build(db: Session) -> bytes:
+            versions = current_versions(db)
+            members = []
+            for name, part in parts.items():
+                body = self.get(db, part, versions.version(self.views[part].resources)).body
+                members.append(dumps(name) + b":" + (body if body is not None else b"null"))
+            return b"{" + b",".join(members) + b"}"
+        
+        resources = sorted({r for part in parts.values() for r in self.views[part].resources})
+        self.register(key, resources, build)
+    
+    def transient_view(self, tenant_id: int, key: str, resources: Iterable[str],
+                       build: Callable[[], Callable[[Session], Optional[bytes]]]) -> SnapshotView:
+        """
+        Transient view ``key`` of a tenant, registered on first use
+        
+        Each tenant has its own LRU of transient views, so the requests of
+        one tenant never evict another's views or their snapshots.
+        
+        Args:
+            build: Called once, on registration, to create the view's builder
+        """
+        with self._lock:
+            view = self._transient.get(tenant_id, {}).get(key)
+            if view is not None:
+                self._transient[tenant_id].move_to_end(key)
+                return view
+        view = SnapshotView(key, resources, build())
+        with self._lock:
+            views = self._transient.get(tenant_id)
+            if views is None:
+                views = self._transient[tenant_id] = OrderedDict()
+                while len(self._transient) > self.max_tenants:
+                    self._transient.popitem(last=False)
+            else:
+                self._transient.move_to_end(tenant_id)
+            views[key] = view
+            while len(views) > MAX_TRANSIENT_VIEWS:
+                evicted, _ = views.popitem(last=False)
+                self._tenants.get(tenant_id, {}).pop(evicted, None)
+        return view
+    
+    def _snapshots(self, tenant_id: int) -> "OrderedDict[str, Snapshot]":
+        """Snapshots of ``tenant_id``, most recently used last (call with the lock held)"""
+        snapshots = self._tenants.get(tenant_id)
+        if snapshots is None:
+            snapshots = self._tenants[tenant_id] = OrderedDict()
+            while len(self._tenants) > self.max_tenants:
+                self._tenants.popitem(last=False)
+        else:
+            self._tenants.move_to_end(tenant_id)
+        return snapshots
+    
+    def get(self, db: Session, key: str, version: int) -> Snapshot:
+        """Snapshot of ``key`` at ``version``, building it if the stored one is older"""
+        return self.snapshot(db, self.views[key], version)
+    
+    def snapshot(self, db: Session, view: SnapshotView, version: int) -> Snapshot:
+        """Snapshot of ``view`` for the session's tenant at ``version``"""
+        tenant_id = tenant_of(db)
+        with self._lock:
+            snapshots = self._snapshots(tenant_id)
+            snapshot = snapshots.get(view.key)
+            if snapshot is not None and snapshot.version == version:
+                snapshots.move_to_end(view.key)
+                return snapshot
+            build = self._building.get((tenant_id, view.key))
+            if build is None or build.version < version:
+                waiting = None
+                build = self._building[(tenant_id, view.key)] = _Build(version)
+            elif build.thread == threading.get_ident() or _on_event_loop():
+                # A thread never waits for itself, and the event loop's thread
+                # (DB_ASYNC=1) never waits at all: every request on it would stall
+                waiting, build = None, None
+            else:
+                waiting = build
+        if build is None:
+            return Snapshot(version, view.build(db), FAST)
+        if waiting is not None:
+            if waiting.done.wait(BUILD_WAIT_TIMEOUT) and waiting.snapshot is not None:
+                return waiting.snapshot
+            return Snapshot(version, view.build(db), FAST)
+        try:
+            snapshot = Snapshot(version, view.build(db), FAST)
+        except BaseException:
+            self._finish(tenant_id, view.key, build, None)
+            raise
+        stored = False
+        with self._lock:
+            snapshots = self._snapshots(tenant_id)
+            current = snapshots.get(view.key)
+            transient = self._transient.get(tenant_id, {})
+            registered = view.key in self.views or view.key in transient
+            if registered and (current is None or current.version <= version):
+                snapshots[view.key] = snapshot
+                snapshots.move_to_end(view.key)
+                while len(snapshots) > self.max_per_tenant:
+                    snapshots.popitem(last=False)
+                self._built.add(view.key)
+                stored = True
+        self._finish(tenant_id, view.key, build, snapshot)
+        # Transient views are chosen by the requests themselves; recompressing
+        # whatever they ask for would let clients spend the CPU
+        if stored and snapshot.variants and view.key in self.views:
+            self._recompress_later(snapshot)
+        return snapshot
+    
+    def _finish(self, tenant_id: int, key: str, build: "_Build", snapshot: Optional[Snapshot]):
+        """Hand ``snapshot`` (None if the build failed) to the requests waiting for ``build``"""
+        with self._lock:
+            if self._building.get((tenant_id, key)) is build:
+                del self._building[(tenant_id, key)]
+        build.snapshot = snapshot
+        build.done.set()
+    
+    def _recompress_later(self, snapshot: Snapshot):
+        """Queue ``snapshot`` for ``BEST`` variants, starting the recompressor if it is idle"""
+        with self._lock:
+            self._recompress.append(snapshot)
+            if self._recompressor is None:
+                self._recompressor = threading.Thread(target=self._run_recompressor, daemon=True)
+                self._recompressor.start()
+    
+    def _run_recompressor(self):
+        # One snapshot at a time, so a burst of builds does not compete for the CPU
+        while True:
+            with self._lock:
+                if not self._recompress:
+                    self._recompressor = None
+                    return
+                snapshot = self._recompress.pop(0)
+            try:
+                snapshot.compress(BEST)
+            except Exception as e:
+                logger.error(f"Snapshot recompression failed: {e}")
+    
+    def invalidate(self, resources: Iterable[str], tenant_id: int = DEFAULT_TENANT_ID) -> list:
+        """Drop a tenant's snapshots built from any of ``resources``, returning the registered views' keys"""
+        resources = set(resources)
+        with self._lock:
+            snapshots = self._tenants.get(tenant_id, {})
+            transient = self._transient.get(tenant_id, {})
+            keys = [
+                key for key, view in list(self.views.items()) + list(transient.items())
+                if resources.intersection(view.resources) and key in snapshots
+            ]
+            for key in keys:
+                del snapshots[key]
+        return [key for key in keys if key in self.views]
+    
+    def warm(self, db: Session, keys: Optional[Iterable[str]] = None):
+        """Build the session tenant's snapshots for ``keys`` (default: every view)"""
+        versions = get_versions(db)
+        for key in (keys if keys is not None else list(self.views)):
+            self.get(db, key, versions.version(self.views[key].resources))
+    
+    def is_warm(self) -> bool:
+        """Every view has been built; a rebuild after a change does not make it cold"""
+        return self._built.issuperset(self.views)
+    
+    def _rebuild(self, keys: list, tenant_id: int):
+        db = SessionLocal(info={TENANT_KEY: tenant_id})
+        try:
+            self.warm(db, keys)
+        except Exception as e:
+            logger.error(f"Snapshot rebuild failed: {e}")
+        finally:
+            db.close()
+    
+    def handle_commit(self, resources: frozenset, tenant_id: int):
+        keys = self.invalidate(resources, tenant_id)
+        if keys:
+            threading.Thread(target=self._rebuild, args=(keys, tenant_id), daemon=True).start()
+    
+    def serve(self, db: Session, request: Request, key: str) -> Response:
+        """Response for a GET of ``key``: 304, 404 or the snapshot bytes"""
+        return self.serve_view(db, request, self.views[key])
+    
+    def serve_view(self, db: Session, request: Request, view: SnapshotView) -> Response:
+        versions = current_versions(db)
+        headers = validators(versions, view.resources)
+        if is_not_modified(request, headers):
+            return not_modified_response(headers)
+        
+        snapshot = self.snapshot(db, view, versions.version(view.resources))
+        if snapshot.body is None:
+            raise HTTPException(status_code=404, detail=view.not_found)
+        body, encoding = snapshot.select(request.headers.get("accept-encoding", ""))
+        if snapshot.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Global snapshot store
+snapshot_store = None
+
+def get_snapshot_store() -> SnapshotStore:
+    """Get or create the snapshot store, subscribed to content commits"""
+    global snapshot_store
+    if snapshot_store is None:
+        settings = get_settings()
+        snapshot_store = SnapshotStore(settings.snapshot_max_tenants, settings.snapshot_max_per_tenant)
+        on_commit(snapshot_store.handle_commit)
+    return snapshot_store
@@ -0,0 +1,163 @@
+"""
+Technology Index
+================
+The ``technologies`` lists of projects and experiences are normalized into
+the ``technologies`` tag table and the ``project_technologies`` /
+``experience_technologies`` link tables. Tags are matched case-insensitively
+by slug ("fastapi" and "FastAPI" are one tag); each tenant has its own tags.
+
+The link tables are a ``derived_indexes`` index: they follow every change
+to the source columns inside the writing transaction, and tags that are no
+longer used are removed. Filtering by technology is then an indexed join
+instead of a scan over every project's list.
+"""
+
+import json
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import Text, delete, func, insert, select, type_coerce
+from sqlalchemy.orm import Session
+
+from derived_indexes import DerivedIndex, register
+from models import Experience, Project, Technology, experience_technologies, project_technologies
+
+# Source model, link table and link column of each tagged table
+LINKS = {
+    "projects": (Project, project_technologies, project_technologies.c.project_id),
+    "experience": (Experience, experience_technologies, experience_technologies.c.experience_id),
+}
+
+
+def parse_technologies(value) -> List[str]:
+    """
+    Names in a ``technologies`` value, blanks dropped
+
+    Accepts a list, its JSON text, or a legacy comma-separated string.
+    """
+    if isinstance(value, str):
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            decoded = None
+        value = decoded if isinstance(decoded, list) else value.split(",")
+    names = (str(name).strip() for name in value or ())
+    return [name for name in names if name]
+
+
+def technology_slug(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+def _technology_ids(conn, tenant_id: int, slugs) -> dict:
+    if not slugs:
+        return {}
+    return dict(conn.execute(
+        select(Technology.slug, Technology.id)
+        .where(Technology.tenant_id == tenant_id, Technology.slug.in_(slugs))
+    ).all())
+
+
+def sync_technologies(conn, table: str, ids: Optional[Set[int]] = None):
+    """Rebuild the tags of ``table``: only the rows in ``ids``, or all of it"""
+    model, link, owner = LINKS[table]
+    # Read as text so that rows not yet migrated to JSON lists are understood too
+    rows = select(model.id, model.tenant_id, type_coerce(model.technologies, Text))
+    if ids is None:
+        conn.execute(delete(link))
+    else:
+        conn.execute(delete(link).where(owner.in_(ids)))
+        rows = rows.where(model.id.in_(ids))
+
+    tags = {}  # row id -> (tenant id, slugs)
+    names = {}  # tenant id -> slug -> display name, as first spelled
+    for row_id, tenant_id, value in conn.execute(rows):
+        _, slugs = tags.setdefault(row_id, (tenant_id, []))
+        tenant_names = names.setdefault(tenant_id, {})
+        for name in parse_technologies(value):
+            slug = technology_slug(name)
+            if slug not in slugs:
+                slugs.append(slug)
+                tenant_names.setdefault(slug, name)
+
+    technology_ids = {}  # (tenant id, slug) -> technology id
+    for tenant_id, tenant_names in names.items():
+        existing = _technology_ids(conn, tenant_id, list(tenant_names))
+        missing = [
+            {"tenant_id": tenant_id, "slug": slug, "name": name}
+            for slug, name in tenant_names.items() if slug not in existing
+        ]
+        if missing:
+            conn.execute(insert(Technology.__table__), missing)
+            existing.update(_technology_ids(conn, tenant_id, [m["slug"] for m in missing]))
+        technology_ids.update(((tenant_id, slug), i) for slug, i in existing.items())
+
+    links = [
+        {owner.name: row_id, "technology_id": technology_ids[tenant_id, slug]}
+        for row_id, (tenant_id, slugs) in tags.items() for slug in slugs
+    ]
+    if links:
+        conn.execute(insert(link), links)
+
+    conn.execute(delete(Technology.__table__).where(
+        Technology.id.not_in(select(project_technologies.c.technology_id)),
+        Technology.id.not_in(select(experience_technologies.c.technology_id)),
+    ))
+
+
+def backfill_technologies(conn):
+    """Build the tag tables from the existing ``technologies`` columns"""
+    for table in LINKS:
+        sync_technologies(conn, table)
+
+
+register(DerivedIndex("technologies", LINKS, sync_technologies))
+
+
+def project_ids_with_technologies(names: Iterable[str], match_all: bool = True):
+    """
+    Subquery of the ids of projects tagged with ``names``
+
+    Args:
+        names: Technology names, matched case-insensitively
+        match_all: Require every technology (AND) rather than any of them (OR)
+    """
+    slugs = {technology_slug(name) for name in names} - {""}
+    query = (
+        select(project_technologies.c.project_id)
+        .join(Technology, Technology.id == project_technologies.c.technology_id)
+        .where(Technology.slug.in_(slugs))
+    )
+    if match_all:
+        query = query.group_by(project_technologies.c.project_id).having(func.count() == len(slugs))
+    return query
+
+
+def load_projects_with_technologies(db: Session, names: Iterable[str], match_all: bool = True):
+    return (
+        db.query(Project)
+        .where(Project.id.in_(project_ids_with_technologies(names, match_all)))
+        .order_by(Project.id)
+        .all()
+    )
+
+
+def load_technology_usage(db: Session) -> List[dict]:
+    """Every technology with its project and experience counts, most used first"""
+    projects = (
+        select(project_technologies.c.technology_id, func.count().label("n"))
+        .group_by(project_technologies.c.technology_id).subquery()
+    )
+    experiences = (
+        select(experience_technologies.c.technology_id, func.count().label("n"))
+        .group_by(experience_technologies.c.technology_id).subquery()
+    )
+    project_count = func.coalesce(projects.c.n, 0)
+    experience_count = func.coalesce(experiences.c.n, 0)
+    rows = db.execute(
+        select(Technology.id, Technology.name, Technology.slug,
+               project_count.label("project_count"), experience_count.label("experience_count"))
+        .outerjoin(projects, projects.c.technology_id == Technology.id)
+        .outerjoin(experiences, experiences.c.technology_id == Technology.id)
+        .order_by((project_count + experience_count).desc(), Technology.name)
+    ).mappings()
+    return [dict(row) for row in rows]
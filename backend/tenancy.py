@@ -0,0 +1,129 @@
+"""
+Multi-Tenancy
+=============
+One deployment serves many portfolios. Every content row belongs to a
+tenant (``TenantScoped`` models), and a request is served from one tenant:
+
+- ``/t/<slug>/api/...`` selects the tenant by slug (unknown slugs get 404)
+- otherwise the ``Host`` header selects the tenant with that ``host``
+- otherwise the default tenant, so single-portfolio deployments and
+  databases from before multi-tenancy keep working unchanged
+
+A session whose ``info`` names a tenant (``database.TENANT_KEY``; request
+sessions get one from ``get_db``) only loads that tenant's rows, and the
+rows it adds belong to that tenant; see ``database.TenantScoped``. Core
+statements on tables are not filtered and scope themselves with
+``tenant_of(session)``.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from database import DEFAULT_TENANT_ID, SessionLocal
+from models import Tenant
+from settings import get_settings
+
+PATH_PREFIX = "/t/"
+
+
+class TenantResolver:
+    """Tenant ids by slug and by host, reloaded every ``ttl`` seconds"""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._by_slug: Dict[str, int] = {}
+        self._by_host: Dict[str, int] = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+    
+    def lookup(self, slug: Optional[str], host: str) -> Tuple[bool, Optional[int]]:
+        """
+        ``(known, tenant id)`` from the cache, without touching the database
+        
+        ``known`` is False when the cache is too old to answer, or a slug is
+        missing from a cache that may predate the tenant.
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl:
+            return False, None
+        if slug is not None:
+            tenant_id = self._by_slug.get(slug)
+            # Unknown slugs re-check at most once a second
+            return tenant_id is not None or time.monotonic() - loaded_at < 1, tenant_id
+        return True, self._by_host.get(host, DEFAULT_TENANT_ID)
+    
+    def reload(self):
+        with self._lock:
+            db = SessionLocal()
+            try:
+                rows = db.execute(select(Tenant.id, Tenant.slug, Tenant.host)).all()
+            finally:
+                db.close()
+            self._by_slug = {row.slug: row.id for row in rows}
+            self._by_host = {row.host.lower(): row.id for row in rows if row.host}
+            self._loaded_at = time.monotonic()
+    
+    async def resolve(self, slug: Optional[str], host: str) -> Optional[int]:
+        """Tenant id for a slug (None if unknown) or else a host (default if unknown)"""
+        known, tenant_id = self.lookup(slug, host)
+        if not known:
+            await run_in_threadpool(self.reload)
+            _, tenant_id = self.lookup(slug, host)
+        return tenant_id
+
+
+def request_host(scope) -> str:
+    for name, value in scope.get("headers", ()):
+        if name == b"host":
+            return value.decode("latin-1").rsplit(":", 1)[0].lower()
+    return ""
+
+
+class TenantMiddleware:
+    """
+    ASGI middleware resolving the request's tenant into ``request.state.tenant_id``
+    
+    A ``/t/<slug>`` prefix is removed from the path before routing.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        slug = None
+        path = scope["path"]
+        if path.startswith(PATH_PREFIX):
+            slug, _, rest = path[len(PATH_PREFIX):].partition("/")
+            scope = dict(scope, path="/" + rest, raw_path=("/" + rest).encode())
+        
+        tenant_id = await get_tenant_resolver().resolve(slug, request_host(scope))
+        if tenant_id is None:
+            await JSONResponse({"detail": f"Unknown portfolio {slug!r}"}, status_code=404)(scope, receive, send)
+            return
+        scope.setdefault("state", {})["tenant_id"] = tenant_id
+        await self.app(scope, receive, send)
+
+
+def get_tenant_id(request: Request) -> int:
+    """Dependency: the tenant the request was resolved to"""
+    return getattr(request.state, "tenant_id", DEFAULT_TENANT_ID)
+
+
+# Global tenant resolver
+tenant_resolver = None
+
+def get_tenant_resolver() -> TenantResolver:
+    global tenant_resolver
+    if tenant_resolver is None:
+        tenant_resolver = TenantResolver(get_settings().tenant_cache_ttl)
+    return tenant_resolver
@@ -0,0 +1,49 @@
+"""
+Test Configuration
+==================
+The API modules read their settings and create their engines when they are
+imported, so the environment is set here, before any test imports them:
+every run gets a scratch SQLite database, in-memory email and a known admin
+token. ``DB_ASYNC`` is left as the caller set it; ``test_db_modes`` runs the
+suite again with the other setting.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+ADMIN_TOKEN = "test-admin-token"
+
+_scratch = tempfile.mkdtemp(prefix="portfolio-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch}/portfolio.db"
+os.environ["MAIL_TRANSPORT"] = "memory"
+os.environ["ADMIN_TOKEN"] = ADMIN_TOKEN
+# Tests deliver the outbox themselves
+os.environ["OUTBOX_WORKER_ENABLED"] = "0"
+os.environ["CONTACT_RETENTION_DAYS"] = "0"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Client of the app, started on a database seeded with ``seed_data.json``"""
+    from fastapi.testclient import TestClient
+
+    import main
+    from migrations import migrate
+    from seed import seed_database
+
+    migrate()
+    seed_database()
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def admin_headers() -> dict:
+    return {"Authorization": f"Bearer {ADMIN_TOKEN}"}
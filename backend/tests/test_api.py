@@ -0,0 +1,117 @@
+import os
+
+import database
+from seed import load_seed_data
+
+
+def test_db_mode_is_applied():
+    assert (database.async_engine is not None) == (os.environ.get("DB_ASYNC") == "1")
+
+
+def test_portfolio_matches_sections(client):
+    portfolio = client.get("/api/portfolio").json()
+    data = load_seed_data()
+    assert portfolio["profile"]["name"] == data["profile"]["name"]
+    assert [p["title"] for p in portfolio["projects"]] == [p["title"] for p in data["projects"]]
+    assert portfolio["projects"] == client.get("/api/projects").json()
+    assert portfolio["experiences"] == client.get("/api/experience").json()
+    assert portfolio["skill_categories"] == client.get("/api/skills").json()
+
+
+def test_conditional_get(client):
+    response = client.get("/api/portfolio")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    cached = client.get("/api/portfolio", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+
+def test_compressed_variants(client):
+    plain = client.get("/api/portfolio", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    for coding in ("br", "gzip"):
+        response = client.get("/api/portfolio", headers={"Accept-Encoding": coding})
+        assert response.headers["content-encoding"] == coding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == plain.json()
+
+
+def test_sparse_selection(client):
+    response = client.get("/api/portfolio", params={"include": "projects", "fields[projects]": "title"})
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"projects"}
+    assert all(set(project) == {"id", "title"} for project in body["projects"])
+    assert client.get("/api/portfolio", params={"include": "nope"}).status_code == 400
+    # Earlier selections leave the full schema intact
+    response = client.get("/api/portfolio", params={"include": "projects", "fields[projects]": "link"})
+    assert response.status_code == 200
+    assert "technologies" in client.get("/api/portfolio").json()["projects"][0]
+
+
+def test_admin_update_is_served(client, admin_headers):
+    project = client.get("/api/admin/projects", headers=admin_headers).json()[0]
+    etag = client.get("/api/projects").headers["etag"]
+    path = f"/api/admin/projects/{project['id']}"
+    
+    response = client.patch(path, json={"row_version": project["row_version"], "title": "Renamed project"},
+                            headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["row_version"] == project["row_version"] + 1
+    
+    projects = client.get("/api/projects")
+    assert projects.headers["etag"] != etag
+    assert projects.json()[0]["title"] == "Renamed project"
+    assert client.get("/api/portfolio").json()["projects"][0]["title"] == "Renamed project"
+    
+    stale = client.patch(path, json={"row_version": project["row_version"], "title": "Lost"}, headers=admin_headers)
+    assert stale.status_code == 409
+    assert stale.json()["detail"]["current"]["title"] == "Renamed project"
+    null = client.patch(path, json={"row_version": project["row_version"] + 1, "technologies": None},
+                        headers=admin_headers)
+    assert null.status_code == 422
+
+
+def test_search(client, admin_headers):
+    hits = client.get("/api/search", params={"q": "redis"}).json()["hits"]
+    assert hits and all("<mark>" in hit["snippet"] for hit in hits)
+    assert [hit["score"] for hit in hits] == sorted((hit["score"] for hit in hits), reverse=True)
+    assert len(client.get("/api/search", params={"q": "redis", "limit": 1}).json()["hits"]) == 1
+    
+    # Indexed in the writing transaction
+    created = client.post("/api/admin/projects", json={"title": "Quokka tracker", "description": "Counts quokkas"},
+                          headers=admin_headers)
+    assert created.status_code == 201
+    hits = client.get("/api/search", params={"q": "quokka"}).json()["hits"]
+    project = created.json()
+    assert [(hit["kind"], hit["id"]) for hit in hits] == [("project", project["id"])]
+    
+    response = client.delete(f"/api/admin/projects/{project['id']}",
+                             params={"row_version": project["row_version"]}, headers=admin_headers)
+    assert response.status_code == 204
+    assert client.get("/api/search", params={"q": "quokka"}).json()["hits"] == []
+
+
+def test_admin_requires_token(client):
+    assert client.get("/api/admin/projects").status_code == 401
+    assert client.get("/api/admin/projects", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+
+def test_contact_submission_is_listed(client, admin_headers):
+    message = {"name": "Ada", "email": "ada@example.com", "message": "Hello from the tests"}
+    response = client.post("/api/contact", json=message)
+    assert response.status_code == 200
+    created = response.json()
+    assert created["id"] and created["created_at"]
+    
+    page = client.get("/api/contact/messages", headers=admin_headers).json()
+    assert page["messages"][0] == created
+
+
+def test_health(client):
+    assert client.get("/health/live").status_code == 200
+    ready = client.get("/health/ready")
+    assert ready.status_code == 200
+    assert ready.json()["checks"]["outbox"]["ok"]
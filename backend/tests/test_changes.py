@@ -0,0 +1,64 @@
+"""
+Delta sync through ``/api/portfolio/changes``: rows changed and deleted
+after ``since``, and whole tables flagged ``reset`` when the log cannot
+answer for ``since``.
+"""
+
+from sqlalchemy import delete
+
+from changes import CONTENT_TABLES
+from database import DEFAULT_TENANT_ID, SessionLocal
+from models import ContentChange
+
+
+def _changes(client, since: int) -> dict:
+    response = client.get("/api/portfolio/changes", params={"since": since})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _create_project(client, admin_headers, title: str) -> dict:
+    response = client.post("/api/admin/projects", json={"title": title}, headers=admin_headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def _delete_project(client, admin_headers, project: dict):
+    response = client.delete(f"/api/admin/projects/{project['id']}",
+                             params={"row_version": project["row_version"]}, headers=admin_headers)
+    assert response.status_code == 204
+
+
+def test_deletes_are_listed(client, admin_headers):
+    start = _changes(client, 0)["version"]
+    project = _create_project(client, admin_headers, "Short-lived project")
+    created = _changes(client, start)
+    assert created["changes"]["projects"]["upserted"][0]["title"] == "Short-lived project"
+    
+    _delete_project(client, admin_headers, project)
+    deleted = _changes(client, created["version"])
+    assert deleted["changes"]["projects"] == {"reset": False, "upserted": [], "deleted": [project["id"]]}
+    # Created and deleted since ``start``: only the delete is left
+    both = _changes(client, start)
+    assert both["changes"]["projects"] == {"reset": False, "upserted": [], "deleted": [project["id"]]}
+    assert _changes(client, deleted["version"])["changes"] == {}
+
+
+def test_reset_when_since_is_not_in_the_log(client, admin_headers):
+    _create_project(client, admin_headers, "Logged project")
+    version = _changes(client, 0)["version"]
+    # Trim the log as if older entries had been discarded
+    db = SessionLocal()
+    try:
+        db.execute(delete(ContentChange).where(
+            ContentChange.tenant_id == DEFAULT_TENANT_ID, ContentChange.version < version
+        ))
+        db.commit()
+    finally:
+        db.close()
+    
+    for since in (version - 1, version + 1):
+        changes = _changes(client, since)["changes"]
+        assert set(changes) == set(CONTENT_TABLES)
+        assert all(table["reset"] for table in changes.values())
+    assert any(row["title"] == "Logged project" for row in changes["projects"]["upserted"])
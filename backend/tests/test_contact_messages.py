@@ -0,0 +1,102 @@
+"""
+The contact inbox: keyset pages that neither repeat nor skip rows when
+messages arrive between them, and NDJSON and CSV exports of every message.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import contact_messages
+from database import TENANT_KEY, SessionLocal
+from models import ContactMessage
+from seed import get_or_create_tenant
+from tenancy import get_tenant_resolver
+
+INBOX_TOKEN = "inbox-admin-token"
+
+# Several messages share a timestamp: ids order them
+STARTED = datetime(2024, 3, 1, 9, 0)
+TIMES = [STARTED + timedelta(minutes=minutes) for minutes in (0, 0, 5, 5, 5, 10, 20)]
+
+
+def _add_messages(tenant_id: int, times: list) -> list:
+    """Store messages created at ``times``; returns their ids"""
+    db = SessionLocal(info={TENANT_KEY: tenant_id})
+    try:
+        messages = [
+            ContactMessage(tenant_id=tenant_id, name=f"Sender {i}", email=f"sender{i}@example.com",
+                           message=f"Message {i}, with a comma", created_at=created_at)
+            for i, created_at in enumerate(times)
+        ]
+        db.add_all(messages)
+        db.commit()
+        return [message.id for message in messages]
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module")
+def inbox(client) -> int:
+    """Id of a tenant, ``inbox``, holding only the messages at ``TIMES``"""
+    tenant_id = get_or_create_tenant("inbox", admin_token=INBOX_TOKEN)
+    get_tenant_resolver().reload()
+    _add_messages(tenant_id, TIMES)
+    return tenant_id
+
+
+@pytest.fixture
+def inbox_headers() -> dict:
+    return {"Authorization": f"Bearer {INBOX_TOKEN}"}
+
+
+def _expected(newest_first: bool) -> list:
+    """(created_at, name) of the ``TIMES`` messages in listing order"""
+    rows = [(created_at.isoformat(), f"Sender {i}") for i, created_at in enumerate(TIMES)]
+    return sorted(rows, reverse=newest_first)
+
+
+def test_pages_are_stable_while_messages_arrive(client, inbox, inbox_headers):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/t/inbox/api/contact/messages", params=params, headers=inbox_headers)
+        assert response.status_code == 200
+        page = response.json()
+        seen += page["messages"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        if len(seen) == 3:
+            # Newer than every page, so not part of this walk
+            _add_messages(inbox, [datetime(2030, 1, 1)])
+    
+    assert [(m["created_at"], m["name"]) for m in seen] == _expected(newest_first=True)
+    assert len({m["id"] for m in seen}) == len(TIMES)
+    response = client.get("/t/inbox/api/contact/messages", params={"cursor": "not a cursor"},
+                          headers=inbox_headers)
+    assert response.status_code == 400
+
+
+def test_exports(client, inbox, inbox_headers, monkeypatch):
+    # Several batches, the last one short
+    monkeypatch.setattr(contact_messages, "EXPORT_BATCH", 3)
+    path = "/t/inbox/api/contact/messages/export"
+    ndjson = client.get(path, params={"format": "ndjson"}, headers=inbox_headers)
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    
+    response = client.get(path, params={"format": "csv"}, headers=inbox_headers)
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert tuple(reader.fieldnames) == contact_messages.EXPORT_COLUMNS
+    csv_rows = list(reader)
+    
+    # Oldest first; the message added while paging comes last
+    assert [(r["created_at"], r["name"]) for r in rows[:len(TIMES)]] == _expected(newest_first=False)
+    assert len({r["id"] for r in rows}) == len(rows)
+    assert [{**r, "id": str(r["id"])} for r in rows] == csv_rows
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
@@ -0,0 +1,104 @@
+"""
+Contact messages through the group-commit writer: committed in batches of
+up to ``max_batch``, flushed on shutdown, stamped in UTC, and every request
+of a batch answered once the batch has committed or failed.
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+
+from sqlalchemy import select
+
+import contact_writer
+from database import SessionLocal
+from models import ContactMessage
+from outbox import utcnow
+from schemas import ContactMessageCreate
+
+
+def _message(i: int) -> ContactMessageCreate:
+    return ContactMessageCreate(name=f"Sender {i}", email=f"sender{i}@example.com", message=f"Message {i}")
+
+
+def _recording(writer: contact_writer.ContactWriter) -> list:
+    """Make ``writer`` record the size of every batch it writes"""
+    sizes = []
+    write = writer.write
+    
+    def recorded(batch):
+        sizes.append(len(batch))
+        write(batch)
+    
+    writer.write = recorded
+    return sizes
+
+
+def _stored(ids) -> int:
+    db = SessionLocal()
+    try:
+        return len(db.scalars(select(ContactMessage.id).where(ContactMessage.id.in_(ids))).all())
+    finally:
+        db.close()
+
+
+def test_concurrent_submissions_share_commits(client):
+    writer = contact_writer.ContactWriter(window=0.2, max_batch=4)
+    sizes = _recording(writer)
+    
+    async def submit_all():
+        return await asyncio.gather(*(writer.submit(_message(i)) for i in range(10)))
+    
+    try:
+        created = asyncio.run(submit_all())
+    finally:
+        writer.stop()
+    assert sizes == [4, 4, 2]
+    assert [m.name for m in created] == [f"Sender {i}" for i in range(10)]
+    assert _stored({m.id for m in created}) == 10
+
+
+def test_shutdown_commits_the_open_batch(client):
+    writer = contact_writer.ContactWriter(window=30)
+    sizes = _recording(writer)
+    
+    async def submit_and_stop():
+        pending = [asyncio.create_task(writer.submit(_message(i))) for i in range(3)]
+        await asyncio.sleep(0.05)
+        # Without stop() the batch would stay open for the whole window
+        await asyncio.get_running_loop().run_in_executor(None, writer.stop)
+        return await asyncio.gather(*pending)
+    
+    started = time.monotonic()
+    created = asyncio.run(submit_and_stop())
+    assert time.monotonic() - started < 10
+    assert sizes == [3]
+    assert _stored({m.id for m in created}) == 3
+
+
+def test_submission_time_is_utc(client):
+    writer = contact_writer.ContactWriter(window=0)
+    try:
+        before = utcnow()
+        created = asyncio.run(writer.submit(_message(0)))
+    finally:
+        writer.stop()
+    assert before - timedelta(seconds=1) <= created.created_at <= utcnow()
+
+
+def test_engine_failure_fails_the_batch(client, monkeypatch):
+    def unavailable():
+        raise RuntimeError("database unavailable")
+    
+    monkeypatch.setattr(contact_writer, "get_durable_engine", unavailable)
+    writer = contact_writer.ContactWriter(window=0.05)
+    
+    async def submit_two():
+        return await asyncio.gather(writer.submit(_message(1)), writer.submit(_message(2)),
+                                    return_exceptions=True)
+    
+    try:
+        results = asyncio.run(asyncio.wait_for(submit_two(), timeout=5))
+    finally:
+        writer.stop()
+    assert all(isinstance(result, RuntimeError) for result in results)
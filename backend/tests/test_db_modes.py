@@ -0,0 +1,30 @@
+"""
+The suite runs against whichever engine ``DB_ASYNC`` selects; this test runs
+it again in a fresh interpreter with the other setting, so one ``pytest``
+shows both modes behave the same.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Set in the rerun, which must not start another one
+RERUN = "PORTFOLIO_TESTS_RERUN"
+
+
+@pytest.mark.skipif(os.environ.get(RERUN) == "1", reason="already the rerun in the other mode")
+def test_suite_passes_in_other_db_mode():
+    other = "0" if os.environ.get("DB_ASYNC") == "1" else "1"
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DB_ASYNC": other, RERUN: "1"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, f"DB_ASYNC={other}:\n{result.stdout[-4000:]}{result.stderr[-2000:]}"
@@ -0,0 +1,173 @@
+"""
+Contact notifications through the outbox: queued with the message, claimed
+by one worker at a time, retried with backoff and dead-lettered after
+``OUTBOX_MAX_ATTEMPTS`` failures.
+"""
+
+import email
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import email_service
+import outbox
+from database import SessionLocal
+from email_service import EmailService, InMemoryTransport
+from models import ContactMessage, EmailOutbox
+from settings import get_settings
+
+
+class FailingTransport(InMemoryTransport):
+    """Rejects every message"""
+    
+    def send_many(self, messages: list) -> list:
+        return [ConnectionError("SMTP server unavailable")] * len(messages)
+
+
+@pytest.fixture
+def entry_id(client) -> int:
+    """Id of a new pending outbox entry, for a message submitted on 2 January 2024"""
+    db = SessionLocal()
+    try:
+        message = ContactMessage(
+            name="Grace", email="grace@example.com", message="About the routing project",
+            created_at=datetime(2024, 1, 2, 15, 30),
+        )
+        db.add(message)
+        entry = outbox.enqueue_contact_notification(db, message)
+        db.commit()
+        return entry.id
+    finally:
+        db.close()
+
+
+def _entry(entry_id: int) -> EmailOutbox:
+    db = SessionLocal()
+    try:
+        return db.get(EmailOutbox, entry_id)
+    finally:
+        db.close()
+
+
+def _make_due(entry_id: int):
+    db = SessionLocal()
+    try:
+        db.get(EmailOutbox, entry_id).next_attempt_at = outbox.utcnow() - timedelta(seconds=1)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _html(raw: str) -> str:
+    part = next(p for p in email.message_from_string(raw).walk() if p.get_content_type() == "text/html")
+    return part.get_payload(decode=True).decode()
+
+
+def test_delivery(entry_id):
+    transport = InMemoryTransport()
+    assert outbox.deliver_due(EmailService(transport=transport)) >= 1
+    entry = _entry(entry_id)
+    assert (entry.status, entry.attempts, entry.last_error) == ("sent", 1, None)
+    assert entry.sent_at is not None
+    
+    html = next(_html(msg) for _, _, msg in transport.messages if "grace@example.com" in msg)
+    # Stamped with the submission time, not the delivery time
+    assert "January 02, 2024 at 03:30 PM" in html
+    assert outbox.deliver_due(EmailService(transport=transport)) == 0
+
+
+def test_claim_is_exclusive(entry_id):
+    db = SessionLocal()
+    try:
+        now = outbox.utcnow()
+        assert entry_id in outbox.claim_due(db, now, limit=100)
+        assert entry_id not in outbox.claim_due(db, now, limit=100)
+    finally:
+        db.close()
+    entry = _entry(entry_id)
+    assert entry.status == "sending"
+    assert entry.next_attempt_at >= now + timedelta(seconds=get_settings().outbox_lease)
+
+
+def test_failure_is_retried_with_backoff(entry_id):
+    service = EmailService(transport=FailingTransport())
+    before = outbox.utcnow()
+    outbox.deliver_due(service)
+    entry = _entry(entry_id)
+    assert (entry.status, entry.attempts) == ("pending", 1)
+    assert "SMTP server unavailable" in entry.last_error
+    base = get_settings().outbox_retry_base_delay
+    assert before + timedelta(seconds=0.8 * base) <= entry.next_attempt_at
+    assert entry.next_attempt_at <= outbox.utcnow() + timedelta(seconds=base)
+    
+    # Not due again until the backoff has passed
+    outbox.deliver_due(service)
+    assert _entry(entry_id).attempts == 1
+    
+    _make_due(entry_id)
+    outbox.deliver_due(service)
+    entry = _entry(entry_id)
+    assert (entry.status, entry.attempts) == ("pending", 2)
+    assert entry.next_attempt_at >= outbox.utcnow() + timedelta(seconds=0.8 * 2 * base - 1)
+
+
+def test_dead_letter_after_max_attempts(entry_id):
+    service = EmailService(transport=FailingTransport())
+    max_attempts = get_settings().outbox_max_attempts
+    for _ in range(max_attempts):
+        _make_due(entry_id)
+        outbox.deliver_due(service)
+    entry = _entry(entry_id)
+    assert (entry.status, entry.attempts) == ("dead", max_attempts)
+    
+    _make_due(entry_id)
+    outbox.deliver_due(service)
+    assert _entry(entry_id).attempts == max_attempts
+
+
+def test_worker_restarts(entry_id):
+    db = SessionLocal()
+    try:
+        db.get(EmailOutbox, entry_id).next_attempt_at = outbox.utcnow() + timedelta(hours=1)
+        db.commit()
+    finally:
+        db.close()
+    worker = outbox.OutboxWorker(EmailService(transport=InMemoryTransport()))
+    worker.start()
+    worker.stop()
+    
+    _make_due(entry_id)
+    worker.start()
+    try:
+        worker.wake()
+        deadline = time.monotonic() + 5
+        while _entry(entry_id).status != "sent" and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert _entry(entry_id).status == "sent"
+    finally:
+        worker.stop()
+
+
+def test_nothing_is_queued_without_email(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "outbox_worker_enabled", True)
+    monkeypatch.setenv("MAIL_TRANSPORT", "smtp")
+    for name in ("MAIL_USERNAME", "MAIL_PASSWORD", "MAIL_FROM"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(email_service, "email_service", EmailService())
+    assert not outbox.notifications_enabled()
+    
+    response = client.post("/api/contact", json={
+        "name": "Alan", "email": "alan@example.com", "message": "Nobody will be emailed",
+    })
+    assert response.status_code == 200
+    db = SessionLocal()
+    try:
+        queued = db.query(EmailOutbox).filter(EmailOutbox.contact_message_id == response.json()["id"])
+        assert queued.count() == 0
+    finally:
+        db.close()
+    
+    # Unless delivery is left to a standalone worker
+    monkeypatch.setattr(get_settings(), "outbox_worker_enabled", False)
+    assert outbox.notifications_enabled()
@@ -0,0 +1,56 @@
+"""
+Reading the portfolio takes a fixed number of queries, however much content
+there is: the same count at 1x and 10x content.
+"""
+
+import pytest
+
+from database import TENANT_KEY, SessionLocal, count_queries
+from portfolio import load_portfolio
+from seed import get_or_create_tenant, load_seed_data, seed_database
+from snapshot import get_snapshot_store
+from tenancy import get_tenant_resolver
+from versioning import ALL_RESOURCES
+
+SCALES = (1, 10)
+
+
+@pytest.fixture(scope="module")
+def scaled_tenants(client) -> dict:
+    """Scale -> id of a tenant seeded with that many copies of the content"""
+    tenants = {}
+    for scale in SCALES:
+        tenants[scale] = get_or_create_tenant(f"scale-{scale}")
+        seed_database(scale=scale, tenant_id=tenants[scale])
+    get_tenant_resolver().reload()
+    for scale in SCALES:
+        # Waits for the snapshot rebuild the seeding started
+        assert client.get(f"/t/scale-{scale}/api/portfolio").status_code == 200
+    return tenants
+
+
+def test_load_portfolio(scaled_tenants):
+    projects = len(load_seed_data()["projects"])
+    counts = {}
+    for scale, tenant_id in scaled_tenants.items():
+        db = SessionLocal(info={TENANT_KEY: tenant_id})
+        try:
+            with count_queries() as counter:
+                portfolio = load_portfolio(db)
+        finally:
+            db.close()
+        assert len(portfolio["projects"]) == projects * scale
+        counts[scale] = counter.count
+    assert counts[1] == counts[10]
+
+
+def test_portfolio_endpoint_without_snapshots(client, scaled_tenants):
+    store = get_snapshot_store()
+    counts = {}
+    for scale, tenant_id in scaled_tenants.items():
+        # Without snapshots every section is loaded and serialized again
+        store.invalidate(ALL_RESOURCES, tenant_id)
+        response = client.get(f"/t/scale-{scale}/api/portfolio")
+        assert response.status_code == 200
+        counts[scale] = int(response.headers["x-query-count"])
+    assert counts[1] == counts[10] > 0
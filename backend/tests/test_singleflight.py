@@ -0,0 +1,68 @@
+"""
+Single-flight reads: identical concurrent calls share one computation,
+except across a commit, and followers take over from a cancelled leader.
+"""
+
+import asyncio
+
+from singleflight import SingleFlight
+
+
+def _counting(release: asyncio.Event, calls: list):
+    """``compute`` returning ``result <n>`` for its n-th call, once ``release`` is set"""
+    async def compute():
+        calls.append(len(calls) + 1)
+        n = calls[-1]
+        await release.wait()
+        return f"result {n}"
+    return compute
+
+
+def test_identical_calls_are_coalesced():
+    async def scenario():
+        group, release, calls = SingleFlight(), asyncio.Event(), []
+        compute = _counting(release, calls)
+        tasks = [asyncio.create_task(group.do("key", compute)) for _ in range(5)]
+        other = asyncio.create_task(group.do("other key", compute))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks), await other, calls
+    
+    results, other, calls = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert len(set(results)) == 1 and other not in results
+
+
+def test_commit_starts_a_new_flight():
+    async def scenario():
+        group, release, calls = SingleFlight(), asyncio.Event(), []
+        compute = _counting(release, calls)
+        before = asyncio.create_task(group.do("key", compute))
+        await asyncio.sleep(0)
+        group.invalidate(["projects"], 1)
+        after = asyncio.create_task(group.do("key", compute))
+        await asyncio.sleep(0)
+        release.set()
+        return await before, await after, calls
+    
+    before, after, calls = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert before != after
+
+
+def test_follower_takes_over_from_cancelled_leader():
+    async def scenario():
+        group, release, calls = SingleFlight(), asyncio.Event(), []
+        compute = _counting(release, calls)
+        leader = asyncio.create_task(group.do("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group.do("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await follower, leader.cancelled(), calls
+    
+    result, cancelled, calls = asyncio.run(scenario())
+    assert cancelled
+    assert len(calls) == 2 and result == "result 2"
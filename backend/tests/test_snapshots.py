@@ -0,0 +1,59 @@
+import threading
+import time
+
+from snapshot import _on_event_loop, get_snapshot_store
+
+
+def _slow_off_loop(monkeypatch, key: str, seconds: float) -> list:
+    """Make builds of ``key`` take ``seconds`` longer off the event loop; returns the build log"""
+    view = get_snapshot_store().views[key]
+    build = view.build
+    builds = []
+    
+    def slow(db):
+        builds.append(threading.get_ident())
+        if not _on_event_loop():
+            time.sleep(seconds)
+        return build(db)
+    
+    monkeypatch.setattr(view, "build", slow)
+    return builds
+
+
+def _rename_first_project(client, admin_headers, title: str):
+    project = client.get("/api/admin/projects", headers=admin_headers).json()[0]
+    response = client.patch(f"/api/admin/projects/{project['id']}",
+                            json={"row_version": project["row_version"], "title": title}, headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_readers_share_one_rebuild(client, admin_headers, monkeypatch):
+    builds = _slow_off_loop(monkeypatch, "projects", 0.3)
+    _rename_first_project(client, admin_headers, "Shared rebuild")
+    titles = []
+    
+    def read():
+        titles.append(client.get("/api/projects").json()[0]["title"])
+    
+    readers = [threading.Thread(target=read) for _ in range(6)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    assert titles == ["Shared rebuild"] * 6
+    # The background rebuild, plus at most the loop thread building inline (DB_ASYNC=1)
+    assert len(set(builds)) <= 2
+    assert len(builds) <= 2
+
+
+def test_waiting_never_blocks_the_event_loop(client, admin_headers, monkeypatch):
+    _slow_off_loop(monkeypatch, "projects", 1.0)
+    _rename_first_project(client, admin_headers, "Loop stays free")
+    reader = threading.Thread(target=lambda: client.get("/api/projects"))
+    reader.start()
+    time.sleep(0.1)
+    started = time.perf_counter()
+    assert client.get("/health/live").status_code == 200
+    elapsed = time.perf_counter() - started
+    reader.join()
+    assert elapsed < 0.5
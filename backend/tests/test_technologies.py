@@ -0,0 +1,23 @@
+from sqlalchemy import select, text
+
+from database import SessionLocal
+from models import Project, project_technologies
+
+
+def test_tagged_project_can_be_deleted_with_foreign_keys_enforced(client, admin_headers):
+    # SQLite only enforces foreign keys when asked to; PostgreSQL always does
+    created = client.post("/api/admin/projects", json={"title": "Tagged", "technologies": ["Zig", "Rust"]},
+                          headers=admin_headers).json()
+    assert [t["id"] for t in client.get("/api/projects", params={"tech": "zig"}).json()] == [created["id"]]
+    
+    db = SessionLocal()
+    try:
+        db.execute(text("PRAGMA foreign_keys=ON"))
+        db.delete(db.get(Project, created["id"]))
+        db.commit()
+        links = select(project_technologies).where(project_technologies.c.project_id == created["id"])
+        assert db.execute(links).all() == []
+    finally:
+        db.execute(text("PRAGMA foreign_keys=OFF"))
+        db.close()
+    assert client.get("/api/projects", params={"tech": "zig"}).json() == []
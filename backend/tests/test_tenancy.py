@@ -0,0 +1,93 @@
+import itertools
+
+import pytest
+
+from seed import get_or_create_tenant, seed_database
+from snapshot import MAX_TRANSIENT_VIEWS
+from tenancy import get_tenant_resolver
+
+ACME_TOKEN = "acme-admin-token"
+
+
+@pytest.fixture(scope="module")
+def acme(client) -> int:
+    """Id of a second tenant, ``acme``, with its own content and admin token"""
+    tenant_id = get_or_create_tenant("acme", admin_token=ACME_TOKEN)
+    seed_database(tenant_id=tenant_id)
+    get_tenant_resolver().reload()
+    return tenant_id
+
+
+@pytest.fixture
+def acme_headers() -> dict:
+    return {"Authorization": f"Bearer {ACME_TOKEN}"}
+
+
+def test_admin_token_opens_only_its_tenant(client, acme, admin_headers, acme_headers):
+    assert client.get("/api/admin/projects", headers=admin_headers).status_code == 200
+    assert client.get("/t/acme/api/admin/projects", headers=acme_headers).status_code == 200
+    assert client.get("/t/acme/api/admin/projects", headers=admin_headers).status_code == 401
+    assert client.get("/api/admin/projects", headers=acme_headers).status_code == 401
+    assert client.get("/t/acme/api/contact/messages", headers=admin_headers).status_code == 401
+    assert client.get("/t/acme/api/contact/messages", headers=acme_headers).status_code == 200
+
+
+def test_tenant_without_token_has_no_admin_api(client, acme, admin_headers):
+    get_or_create_tenant("no-admin")
+    get_tenant_resolver().reload()
+    assert client.get("/t/no-admin/api/admin/projects", headers=admin_headers).status_code == 404
+
+
+def test_rows_of_other_tenants_are_out_of_reach(client, acme, admin_headers, acme_headers):
+    theirs = client.get("/t/acme/api/admin/projects", headers=acme_headers).json()[0]
+    path = f"/api/admin/projects/{theirs['id']}"
+    response = client.patch(path, json={"row_version": theirs["row_version"], "title": "Taken over"},
+                            headers=admin_headers)
+    assert response.status_code == 404
+    assert client.get(path, headers=admin_headers).status_code == 404
+    response = client.delete(path, params={"row_version": theirs["row_version"]}, headers=admin_headers)
+    assert response.status_code == 404
+    assert client.get(f"/t/acme{path}", headers=acme_headers).json()["title"] == theirs["title"]
+    
+    # Nor can they be the parent of a row
+    their_experience = client.get("/t/acme/api/admin/experience", headers=acme_headers).json()[0]
+    response = client.post("/api/admin/responsibilities",
+                           json={"experience_id": their_experience["id"], "description": "Borrowed"},
+                           headers=admin_headers)
+    assert response.status_code == 422
+    ours = client.get("/api/admin/responsibilities", headers=admin_headers).json()[0]
+    moved = {"row_version": ours["row_version"], "experience_id": their_experience["id"]}
+    response = client.patch(f"/api/admin/responsibilities/{ours['id']}", json=moved, headers=admin_headers)
+    assert response.status_code == 422
+
+
+def test_search_is_scoped_to_the_tenant(client, acme, acme_headers):
+    created = client.post("/t/acme/api/admin/projects", json={"title": "Wombat burrow survey"},
+                          headers=acme_headers)
+    assert created.status_code == 201
+    hits = client.get("/t/acme/api/search", params={"q": "wombat"}).json()["hits"]
+    assert [(hit["kind"], hit["id"]) for hit in hits] == [("project", created.json()["id"])]
+    assert client.get("/api/search", params={"q": "wombat"}).json()["hits"] == []
+    # Seeded into both tenants, found once in each
+    default_hits = client.get("/api/search", params={"q": "routing"}).json()["hits"]
+    acme_hits = client.get("/t/acme/api/search", params={"q": "routing"}).json()["hits"]
+    assert len(default_hits) == len(acme_hits)
+    hit_keys = [{(hit["kind"], hit["id"]) for hit in hits} for hits in (default_hits, acme_hits)]
+    assert not hit_keys[0] & hit_keys[1]
+
+
+def test_sparse_selections_are_cached_per_tenant(client, acme):
+    selection = {"include": "projects", "fields[projects]": "title"}
+    assert client.get("/api/portfolio", params=selection).status_code == 200
+    fields = ["title", "description", "technologies", "highlights", "link", "github", "is_featured"]
+    selections = (
+        {"include": include, "fields[projects]": ",".join(chosen)}
+        for include in ["projects", "projects,education"]
+        for size in range(1, len(fields) + 1)
+        for chosen in itertools.combinations(fields, size)
+    )
+    for params in itertools.islice(selections, MAX_TRANSIENT_VIEWS + 1):
+        response = client.get("/t/acme/api/portfolio", params=params)
+        assert response.status_code == 200, response.text
+    # Still served from the default tenant's snapshot
+    assert client.get("/api/portfolio", params=selection).headers["x-query-count"] == "0"
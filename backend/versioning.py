@@ -0,0 +1,205 @@
+"""
+Content Versioning
+==================
+Keeps a version stamp per tenant and content resource in the
+``content_versions`` table. A session's changes are stamped for its tenant.
+
+Session hooks record which resources a transaction touches, through ORM
+flushes as well as bulk ``query.delete()``/``update()`` statements, and bump
+their versions right before the transaction commits. Every committed change
+gets a new version number that is higher than any previous one, so the
+largest version among a set of resources identifies its state. Numbers come
+from the ``content_version_counter`` row, which the bump updates: the row
+stays locked until the transaction ends, so concurrent commits are numbered
+one after the other, in the order they commit.
+
+Each commit also logs the rows it changed in ``content_changes`` (upserts
+and deletes, stamped with the new version), which ``changes.py`` turns into
+deltas between versions. Bulk statements do not say which rows they hit, so
+they log a ``reset`` of the whole table, unless the caller logs the rows
+itself with ``record_changes`` and sets the ``CHANGES_RECORDED`` execution
+option (as ``seed.py`` does).
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from sqlalchemy import Connection, event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from database import DEFAULT_TENANT_ID, tenant_of
+from models import ContentChange, ContentVersion, ContentVersionCounter
+
+# Resource name for each content table
+RESOURCE_BY_TABLE = {
+    "profile": "profile",
+    "education": "education",
+    "experience": "experience",
+    "responsibilities": "experience",
+    "projects": "projects",
+    "skill_categories": "skills",
+    "skills": "skills",
+    "certifications": "certifications",
+}
+
+ALL_RESOURCES = tuple(sorted(set(RESOURCE_BY_TABLE.values())))
+
+_TOUCHED_KEY = "touched_resources"
+_COMMITTED_KEY = "committed_resources"
+_CHANGES_KEY = "changed_rows"
+
+# Execution option of bulk statements whose rows are logged by the caller
+CHANGES_RECORDED = "changes_recorded"
+
+UPSERT, DELETE, RESET = "upsert", "delete", "reset"
+
+_commit_listeners = []
+
+
+def on_commit(listener):
+    """Register ``listener(resources, tenant_id)``, called after each commit that changed content"""
+    _commit_listeners.append(listener)
+    return listener
+
+
+def _resource_for_table(table) -> Optional[str]:
+    return RESOURCE_BY_TABLE.get(getattr(table, "name", None))
+
+
+def _mark(session: Session, resources: Iterable[str]):
+    resources = {r for r in resources if r}
+    if resources:
+        session.info.setdefault(_TOUCHED_KEY, set()).update(resources)
+
+
+def record_changes(session: Session, table: str, operation: str, ids: Iterable[Optional[int]]):
+    """Log ``operation`` on rows ``ids`` of content ``table`` in the session's transaction"""
+    if table not in RESOURCE_BY_TABLE:
+        return
+    changes = session.info.setdefault(_CHANGES_KEY, {})
+    for row_id in ids:
+        changes[(table, row_id)] = operation
+    _mark(session, [RESOURCE_BY_TABLE[table]])
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    for objects, operation in (
+        (session.new, UPSERT),
+        ([obj for obj in session.dirty if session.is_modified(obj)], UPSERT),
+        (session.deleted, DELETE),
+    ):
+        for obj in objects:
+            table = getattr(getattr(obj, "__table__", None), "name", None)
+            record_changes(session, table, operation, [getattr(obj, "id", None)])
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(getattr(orm_execute_state.statement, "table", None), "name", None)
+        if orm_execute_state.execution_options.get(CHANGES_RECORDED):
+            _mark(orm_execute_state.session, [RESOURCE_BY_TABLE.get(table)])
+        else:
+            record_changes(orm_execute_state.session, table, RESET, [None])
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session):
+    # Flush now so that pending ORM changes are tracked before we stamp them
+    session.flush()
+    touched = session.info.pop(_TOUCHED_KEY, None)
+    if touched:
+        tenant_id = tenant_of(session)
+        version = bump(session, touched, tenant_id)
+        log_changes(session.connection(), version, session.info.pop(_CHANGES_KEY, {}), tenant_id)
+        session.info[_COMMITTED_KEY] = (touched, version, tenant_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_commit(session):
+    committed = session.info.pop(_COMMITTED_KEY, None)
+    if committed:
+        resources, version, tenant_id = committed
+        # Imported here, coherence builds on this module
+        from coherence import get_version_cache
+        get_version_cache().publish(version)
+        for listener in _commit_listeners:
+            listener(frozenset(resources), tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched(session):
+    session.info.pop(_TOUCHED_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
+    session.info.pop(_CHANGES_KEY, None)
+
+
+def bump(bind: Union[Session, Connection], resources: Iterable[str],
+         tenant_id: int = DEFAULT_TENANT_ID) -> int:
+    """
+    Give a tenant's ``resources`` a new version in the session's (or connection's) transaction
+    
+    Versions are numbered across all tenants, so a version number is never reused.
+    """
+    conn = bind.connection() if isinstance(bind, Session) else bind
+    counter = ContentVersionCounter.__table__
+    if conn.execute(update(counter).values(version=counter.c.version + 1)).rowcount == 0:
+        # First bump of the database: continue from the versions stamped so far
+        conn.execute(insert(counter).values(
+            id=1,
+            version=select(func.coalesce(func.max(ContentVersion.version), 0) + 1).scalar_subquery(),
+        ))
+    version = conn.execute(select(counter.c.version)).scalar_one()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    
+    for resource in sorted(set(resources)):
+        result = conn.execute(
+            update(ContentVersion)
+            .where(ContentVersion.tenant_id == tenant_id, ContentVersion.resource == resource)
+            .values(version=version, updated_at=now)
+        )
+        if result.rowcount == 0:
+            conn.execute(
+                insert(ContentVersion).values(
+                    tenant_id=tenant_id, resource=resource, version=version, updated_at=now
+                )
+            )
+    return version
+
+
+def log_changes(conn: Connection, version: int, changes: Dict[Tuple[str, Optional[int]], str],
+                tenant_id: int = DEFAULT_TENANT_ID):
+    """Write ``{(table, row id): operation}`` to a tenant's change log at ``version``"""
+    resets = {table for (table, _), operation in changes.items() if operation == RESET}
+    rows = [
+        {"tenant_id": tenant_id, "version": version, "table_name": table, "row_id": row_id,
+         "operation": operation}
+        for (table, row_id), operation in sorted(changes.items(), key=lambda c: (c[0][0], c[0][1] or 0))
+        if operation == RESET or table not in resets
+    ]
+    if rows:
+        conn.execute(insert(ContentChange), rows)
+
+
+class ContentVersions:
+    """Snapshot of every resource's version, read in a single query"""
+    
+    def __init__(self, rows: Dict[str, Tuple[int, Optional[datetime]]]):
+        self.rows = rows
+    
+    def version(self, resources: Iterable[str] = ALL_RESOURCES) -> int:
+        return max((self.rows.get(r, (0, None))[0] for r in resources), default=0)
+    
+    def last_modified(self, resources: Iterable[str] = ALL_RESOURCES) -> Optional[datetime]:
+        stamps = [self.rows[r][1] for r in resources if r in self.rows and self.rows[r][1]]
+        return max(stamps) if stamps else None
+
+
+def get_versions(db: Session) -> ContentVersions:
+    """Versions of the content of the session's tenant"""
+    rows = db.execute(
+        select(ContentVersion.resource, ContentVersion.version, ContentVersion.updated_at)
+        .where(ContentVersion.tenant_id == tenant_of(db))
+    ).all()
+    return ContentVersions({r.resource: (r.version, r.updated_at) for r in rows})
@@ -50,14 +50,14 @@ export function Experience({ experiences }: ExperienceProps) {
                                         ))}
                                     </ul>
                                 )}
-                                {exp.technologies && (
+                                {exp.technologies.length > 0 && (
                                     <div className="flex flex-wrap gap-2 mt-6">
-                                        {exp.technologies.split(',').map((tech, i) => (
+                                        {exp.technologies.map((tech, i) => (
                                             <span
                                                 key={i}
                                                 className="px-3 py-1 text-xs font-mono rounded-full bg-primary/10 text-primary border border-primary/20"
                                             >
-                                                {tech.trim()}
+                                                {tech}
                                             </span>
                                         ))}
                                     </div>
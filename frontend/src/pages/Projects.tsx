@@ -22,7 +22,7 @@ export function Projects({ projects }: ProjectsProps) {
                 {/* Featured Projects */}
                 <div className="space-y-12 mb-16">
                     {featuredProjects.map((project) => {
-                        const highlights = project.highlights ? JSON.parse(project.highlights) : [];
+                        const highlights = project.highlights;
                         return (
                             <Card key={project.id} className="relative overflow-hidden group glass glow">
                                 <CardHeader>
@@ -56,7 +56,7 @@ export function Projects({ projects }: ProjectsProps) {
                                     <CardDescription className="text-base mb-6">{project.description}</CardDescription>
                                     {highlights.length > 0 && (
                                         <ul className="space-y-2 mb-6">
-                                            {highlights.map((highlight: string, i: number) => (
+                                            {highlights.map((highlight, i) => (
                                                 <li key={i} className="flex gap-3 text-muted-foreground">
                                                     <span className="text-primary shrink-0">▹</span>
                                                     <span>{highlight}</span>
@@ -64,11 +64,11 @@ export function Projects({ projects }: ProjectsProps) {
                                             ))}
                                         </ul>
                                     )}
-                                    {project.technologies && (
+                                    {project.technologies.length > 0 && (
                                         <div className="flex flex-wrap gap-2">
-                                            {project.technologies.split(',').map((tech, i) => (
+                                            {project.technologies.map((tech, i) => (
                                                 <span key={i} className="px-3 py-1 text-xs font-mono rounded-full bg-primary/10 text-primary border border-primary/20">
-                                                    {tech.trim()}
+                                                    {tech}
                                                 </span>
                                             ))}
                                         </div>
@@ -85,7 +85,7 @@ export function Projects({ projects }: ProjectsProps) {
                         <h3 className="text-xl font-semibold mb-8 text-muted-foreground">Other Projects</h3>
                         <div className="grid md:grid-cols-2 gap-6">
                             {otherProjects.map((project) => {
-                                const highlights = project.highlights ? JSON.parse(project.highlights) : [];
+                                const highlights = project.highlights;
                                 return (
                                     <Card key={project.id} className="group hover:border-primary/50 transition-all hover:-translate-y-1">
                                         <CardHeader>
@@ -105,18 +105,18 @@ export function Projects({ projects }: ProjectsProps) {
                                             <CardDescription className="mb-4">{project.description}</CardDescription>
                                             {highlights.length > 0 && (
                                                 <div className="flex flex-wrap gap-2 mb-4">
-                                                    {highlights.map((h: string, i: number) => (
+                                                    {highlights.map((h, i) => (
                                                         <span key={i} className="px-2 py-1 text-xs rounded bg-accent/20 text-accent">
                                                             {h}
                                                         </span>
                                                     ))}
                                                 </div>
                                             )}
-                                            {project.technologies && (
+                                            {project.technologies.length > 0 && (
                                                 <div className="flex flex-wrap gap-2">
-                                                    {project.technologies.split(',').map((tech, i) => (
+                                                    {project.technologies.map((tech, i) => (
                                                         <span key={i} className="text-xs text-muted-foreground font-mono">
-                                                            {tech.trim()}{i < project.technologies!.split(',').length - 1 && ' •'}
+                                                            {tech}{i < project.technologies.length - 1 && ' •'}
                                                         </span>
                                                     ))}
                                                 </div>
@@ -34,7 +34,7 @@ export interface Experience {
     start_date?: string;
     end_date?: string;
     description?: string;
-    technologies?: string;
+    technologies: string[];
     responsibilities: Responsibility[];
 }
 
@@ -42,8 +42,8 @@ export interface Project {
     id: number;
     title: string;
     description?: string;
-    technologies?: string;
-    highlights?: string;
+    technologies: string[];
+    highlights: string[];
     link?: string;
     github?: string;
     is_featured: number;